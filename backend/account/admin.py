@@ -1,7 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Institute, Student
+from .models import CustomUser, Institute, OutboundEmail, Student
+from .filters import CachedValuesFieldListFilter
 from .forms import CustomUserCreationForm, CustomUserChangeForm
+from .pagination import EstimatedCountPaginator
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
@@ -32,7 +34,7 @@ class CustomUserAdmin(UserAdmin):
     model = CustomUser
 
     list_display = ['id', 'username', 'first_name', 'last_name', 'email', 'role', 'phone_number', 'province', 'city', 'is_active', 'is_staff', 'is_superuser']
-    list_filter = ['role', 'province', 'city']
+    list_filter = ['role', ('province', CachedValuesFieldListFilter), ('city', CachedValuesFieldListFilter)]
     search_fields = ['username', 'first_name', 'last_name']
 
     sortable_by = []
@@ -40,6 +42,13 @@ class CustomUserAdmin(UserAdmin):
     date_hierarchy = 'date_joined'
     list_per_page = 20
 
+    # Counting is the slowest part of the changelist on a large user table:
+    # skip the unfiltered total and estimate big counts (see EstimatedCountPaginator).
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    estimated_count_threshold = 100_000
+    exact_count_var = '_exact_count'
+
     fieldsets = (
         (None,
             {
@@ -78,6 +87,37 @@ class CustomUserAdmin(UserAdmin):
     )
 
     inlines = ()
+    actions = ['activate_users']
+
+    def changelist_view(self, request, extra_context=None):
+        """
+        Override: Take the "compute exact count" flag out of the query string before
+        the ChangeList parses it as a lookup.
+        """
+        request.exact_count = self.exact_count_var in request.GET
+        if request.exact_count:
+            request.GET = request.GET.copy()
+            del request.GET[self.exact_count_var]
+
+        extra_context = {**(extra_context or {}), 'exact_count_var': self.exact_count_var}
+        return super().changelist_view(request, extra_context)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Override: Search through the normalized, indexed name columns
+        (CustomUserQuerySet.search) instead of LIKE '%term%' over search_fields.
+        """
+        if not search_term:
+            return queryset, False
+
+        return queryset.search(search_term), False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            threshold=self.estimated_count_threshold,
+            exact=getattr(request, 'exact_count', False),
+        )
 
     def get_inline_instances(self, request, obj=None):
         """
@@ -118,17 +158,13 @@ class CustomUserAdmin(UserAdmin):
 
         return ['username', 'role']
 
-    def save_model(self, request, obj, form, change):
+    @admin.action(description="Activate selected users", permissions=['change'])
+    def activate_users(self, request, queryset):
         """
-            Override: to handle profile creation conflict between Admin and Signals.
-
-            Sets a temporary 'skip_signal' flag on the object to prevent the post_save
-            signal from running. This avoids an IntegrityError caused by the signal
-            and Admin inlines trying to create the same profile simultaneously.
-            """
-        obj.skip_signal = True
-        
-        super().save_model(request, obj, form, change)
+        Activates the selected users in bulk (single UPDATE, batched profile creation).
+        """
+        activated = queryset.activate()
+        self.message_user(request, f"{activated} user(s) activated.", messages.SUCCESS)
 
 @admin.register(Institute)
 class InstituteAdmin(admin.ModelAdmin):
@@ -168,4 +204,22 @@ class StudentAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         """Prevent creating profile outside of the User flow."""
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    # The bodies hold activation and password reset links; staff never see them.
+    fields = ['subject', 'from_email', 'to', 'cc', 'bcc', 'reply_to', 'status', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at']
+    list_filter = ['status']
+    ordering = ['-id']
+    list_per_page = 20
+
+    def has_change_permission(self, request, obj=None):
+        """Make the view read-only; the send_queued_emails worker owns these rows."""
+        return False
+
+    def has_add_permission(self, request):
+        """Emails are queued by the application only."""
+        return False
@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class AccountConfig(AppConfig):
@@ -6,4 +8,9 @@ class AccountConfig(AppConfig):
     name = 'account'
 
     def ready(self):
-        import account.signals
\ No newline at end of file
+        import account.signals
+        from account.images import precompute_default_derivatives
+        from account.routers import watch_replica_connection
+
+        post_migrate.connect(precompute_default_derivatives, sender=self)
+        connection_created.connect(watch_replica_connection)
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Native async versions of the hot auth endpoints, for deployments behind the ASGI
+entry point (sodooronline.asgi): token login, users/me GET and PATCH, and activation.
+
+DRF views are synchronous, so under an ASGI server each request would hold a thread
+while it waits on the database and on password hashing. These views run on the event
+loop instead: reads use the async ORM and cache API, password hashing (the CPU heavy
+part of a login) runs on hashing_executor, a small thread pool of
+PASSWORD_HASHING_WORKERS threads that bounds how many hashes run at once, and only the
+writes of a PATCH and of an activation are handed to a thread with sync_to_async.
+
+Requests and responses follow the djoser endpoints they mirror (same fields, status
+codes and error bodies), and the same token cache, representation cache and throttles
+apply. Their reads go to the primary (account.routers.read_from_primary), as a user or
+token created moments before may not be on the replicas yet. Bodies are JSON; form
+encoded and multipart bodies are accepted on POST only, so avatar and logo uploads keep
+using the synchronous users/me/.
+"""
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from djoser import signals, utils
+from djoser.conf import settings as djoser_settings
+from rest_framework.authtoken.models import Token
+
+from .cache import acache_token, aget_cached_token, aget_user_representation
+from .models import CustomUser
+from .routers import read_from_primary
+from .serializers import CustomUserSerializer
+from .throttling import LoginIdentifierThrottle, LoginIPThrottle
+from .views import CustomUserViewSet
+
+
+hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix='password-hashing'
+)
+
+messages = djoser_settings.CONSTANTS.messages
+
+
+def _json(data, status=200, **kwargs):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False}, **kwargs)
+
+
+def _detail(message, status, **kwargs):
+    return _json({'detail': str(message)}, status=status, **kwargs)
+
+
+class _ParseError(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as error:
+            raise _ParseError(_detail(f"JSON parse error - {error}", 400))
+        if not isinstance(data, dict):
+            raise _ParseError(_detail("Expected a JSON object.", 400))
+        return data
+    if request.method == 'POST':
+        return request.POST
+    raise _ParseError(_detail(f'Unsupported media type "{request.content_type}" in request.', 415))
+
+
+def _required(data, *fields):
+    missing = {field: ["This field is required."] for field in fields if not data.get(field)}
+    return _json(missing, status=400) if missing else None
+
+
+async def _run_hashing(function, *args):
+    return await asyncio.get_running_loop().run_in_executor(hashing_executor, function, *args)
+
+
+def _verify_password(password, encoded):
+    """check_password() that hands back the rehashed value instead of saving it."""
+    rehashed = []
+    valid = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, rehashed[0] if rehashed else None
+
+
+async def _throttle(request, throttle_classes, data):
+    """Run DRF throttles against an async request; the 429 response or None."""
+    shim = SimpleNamespace(META=request.META, headers=request.headers, data=data)
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        allowed = await sync_to_async(throttle.allow_request, thread_sensitive=False)(shim, None)
+        if not allowed:
+            wait = math.ceil(throttle.wait())
+            return _detail(
+                f"Request was throttled. Expected available in {wait} seconds.", 429,
+                headers={'Retry-After': str(wait)},
+            )
+    return None
+
+
+async def _authenticate(request):
+    """
+    CachedTokenAuthentication for async views: (user, None) or (None, a 401 response).
+    A warm token costs no query; a cold one one query, after which it is cached.
+    """
+    header = request.headers.get('Authorization', '').split()
+    if not header or header[0].lower() != 'token':
+        return None, _detail("Authentication credentials were not provided.", 401, headers={'WWW-Authenticate': 'Token'})
+    if len(header) != 2:
+        return None, _detail("Invalid token header.", 401, headers={'WWW-Authenticate': 'Token'})
+
+    token = await aget_cached_token(header[1])
+    if token is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=header[1])
+        except Token.DoesNotExist:
+            return None, _detail("Invalid token.", 401, headers={'WWW-Authenticate': 'Token'})
+        if token.user.is_active:
+            await acache_token(token)
+
+    if not token.user.is_active:
+        return None, _detail("User inactive or deleted.", 401, headers={'WWW-Authenticate': 'Token'})
+    return token.user, None
+
+
+@csrf_exempt
+@require_http_methods(['POST'])
+@read_from_primary
+async def token_login(request):
+    """Async djoser token/login: {"auth_token": ...} for a valid username and password."""
+    try:
+        data = _request_data(request)
+    except _ParseError as error:
+        return error.response
+
+    throttled = await _throttle(request, [LoginIPThrottle, LoginIdentifierThrottle], data)
+    if throttled:
+        return throttled
+
+    username, password = data.get(djoser_settings.LOGIN_FIELD), data.get('password')
+    user = None
+    if username is not None and password is not None:
+        user = await CustomUser.objects.filter(**{CustomUser.USERNAME_FIELD: username}).afirst()
+
+    if user is None:
+        if password is not None:
+            # Hash anyway, so unknown usernames take as long as wrong passwords (as
+            # ModelBackend does).
+            await _run_hashing(make_password, password)
+        return _json({'non_field_errors': [str(messages.INVALID_CREDENTIALS_ERROR)]}, status=400)
+
+    valid, rehashed = await _run_hashing(_verify_password, password, user.password)
+    if not valid or not user.is_active:
+        return _json({'non_field_errors': [str(messages.INVALID_CREDENTIALS_ERROR)]}, status=400)
+    if rehashed:
+        user.password = rehashed
+        await user.asave(update_fields=['password'])
+
+    token, _ = await Token.objects.aget_or_create(user=user)
+    await user_logged_in.asend(sender=user.__class__, request=request, user=user)
+    return _json({'auth_token': token.key})
+
+
+def _update_user(user, data, request):
+    serializer = CustomUserSerializer(user, data=data, partial=True, context={'request': request})
+    if not serializer.is_valid():
+        return serializer.errors, 400
+    serializer.save()
+    signals.user_updated.send(sender=CustomUserViewSet, user=serializer.instance, request=request)
+    return serializer.data, 200
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'PATCH'])
+@read_from_primary
+async def me(request):
+    """
+    Async users/me/. GET is answered from the representation cache like the sync view;
+    PATCH validates and saves through CustomUserSerializer in a worker thread.
+    """
+    user, failed = await _authenticate(request)
+    if failed:
+        return failed
+
+    async def load():
+        return await CustomUser.objects.select_related('institute', 'student').aget(pk=user.pk)
+
+    if request.method == 'GET':
+        async def build():
+            return CustomUserSerializer(await load(), context={'request': request}).data
+
+        return _json(await aget_user_representation(user.pk, request.build_absolute_uri("/"), build))
+
+    try:
+        data = _request_data(request)
+    except _ParseError as error:
+        return error.response
+
+    body, status = await sync_to_async(_update_user)(await load(), data, request)
+    return _json(body, status=status)
+
+
+def _activate(user, request):
+    # The activation and its confirmation email are committed together (account.mailqueue).
+    with transaction.atomic():
+        user.is_active = True
+        user.save()
+        signals.user_activated.send(sender=CustomUserViewSet, user=user, request=request)
+
+        if djoser_settings.SEND_CONFIRMATION_EMAIL:
+            email = djoser_settings.EMAIL.confirmation(request, {'user': user})
+            email.send([utils.get_user_email(user)])
+
+
+@csrf_exempt
+@require_http_methods(['POST'])
+@read_from_primary
+async def activation(request):
+    """Async djoser users/activation/: activate the user of a valid uid and token."""
+    try:
+        data = _request_data(request)
+    except _ParseError as error:
+        return error.response
+
+    missing = _required(data, 'uid', 'token')
+    if missing:
+        return missing
+
+    try:
+        user = await CustomUser.objects.aget(pk=utils.decode_uid(data['uid']))
+    except (CustomUser.DoesNotExist, ValueError, TypeError, OverflowError):
+        return _json({'uid': [str(messages.INVALID_UID_ERROR)]}, status=400)
+
+    if not default_token_generator.check_token(user, data['token']):
+        return _json({'token': [str(messages.INVALID_TOKEN_ERROR)]}, status=400)
+    if user.is_active:
+        return _detail(messages.STALE_TOKEN_ERROR, 403)
+
+    await sync_to_async(_activate)(user, request)
+    return HttpResponse(status=204)
@@ -0,0 +1,33 @@
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import cache_token, get_cached_token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that looks tokens up in a per-process LRU, then the shared cache,
+    and only then in the database, so a client with a warm token costs no queries.
+
+    Cached entries are evicted (see account.signals) when the token is deleted, which
+    covers djoser's token logout and LOGOUT_ON_PASSWORD_CHANGE, and whenever the user
+    is saved, which covers deactivation and keeps request.user current. The database
+    is read on the primary: a token issued moments ago may not be on the replicas yet.
+    """
+    def authenticate_credentials(self, key):
+        token = get_cached_token(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.using(router.db_for_write(model)).select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            cache_token(token)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
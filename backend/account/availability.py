@@ -0,0 +1,238 @@
+"""
+In-process Bloom filter over the unique CustomUser columns (username, email,
+phone_number), answering "is this value free?" for the signup form.
+
+A value the filter has never seen is free without touching the database; a possible
+hit (taken, or a false positive at roughly ERROR_RATE) is confirmed with an indexed
+lookup. Values are only ever added, so the filter can err towards "maybe taken" but
+never answers "free" for a value that is in the table.
+
+Each process keeps its own filter. New and changed values reach the other processes
+through a short change log in the shared cache: record() appends the values under an
+increasing sequence number and every check first applies the entries it has not seen
+(one cache round trip when there are none). An entry is written before the sequence
+is advanced past it, so a missing entry always means it expired. Bumping the
+AVAILABILITY version (see account.cache) makes every process rebuild from the table
+instead, and starts a new log; a rebuild also replays the latest entries, whose rows
+may not be committed yet.
+
+The change log needs a cache shared by every process (see CACHES in the settings);
+with a per-process backend such as LocMemCache other processes never see new values.
+The filter is built when the server process starts (warm_up(), called from the WSGI
+and ASGI modules), and rebuilt from the primary database: a lagging replica would
+miss rows the log no longer carries.
+"""
+import hashlib
+import logging
+import math
+import threading
+
+import numpy as np
+from django.core.cache import cache
+from django.db import DatabaseError, router
+
+from .cache import bump_version, version_key
+from .models import CustomUser
+from .routers import unpin
+
+
+logger = logging.getLogger(__name__)
+
+
+AVAILABILITY = 'availability'
+AVAILABILITY_FIELDS = ('username', 'email', 'phone_number')
+
+ERROR_RATE = 0.01
+MIN_CAPACITY = 10_000
+LOG_TIMEOUT = 60 * 60
+# Latest log entries a rebuild applies on top of the table, as their rows may not be
+# committed yet; far more than the saves in flight at any time.
+REPLAY_ENTRIES = 1000
+
+_SEQUENCE_KEY = 'account:availability:seq'
+
+
+def _log_key(generation, sequence):
+    return f"account:availability:log:{generation}:{sequence}"
+
+
+def filter_key(field, value):
+    # The email column compares case-insensitively (utf8mb4_unicode_ci).
+    if field == 'email':
+        value = value.lower()
+    return f"{field}:{value}"
+
+
+class BloomFilter:
+    """
+    Bloom filter on a packed numpy bit array, with Kirsch-Mitzenmacher double hashing
+    of one 128 bit BLAKE2b digest per key.
+    """
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys):
+        digests = b"".join(hashlib.blake2b(key.encode(), digest_size=16).digest() for key in keys)
+        hashes = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        # uint64 arithmetic wraps, which is fine for hashing.
+        return (hashes[:, :1] + steps * hashes[:, 1:]) % np.uint64(self.size)
+
+    def add_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        positions = self._positions(keys).ravel()
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(keys)
+
+    def __contains__(self, key):
+        positions = self._positions([key])[0]
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return bool(np.all(self.bits[positions >> np.uint64(3)] & masks))
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._sequence = 0
+        self._generation = None
+
+    def rebuild(self):
+        """Build a new filter from the table, with room for twice its current values."""
+        # Start the change log if there is none, so record() can append to it.
+        cache.add(_SEQUENCE_KEY, 0, None)
+        sequence, generation, _ = self._shared_state()
+        users = CustomUser.objects.using(router.db_for_write(CustomUser))
+        rows = users.count()
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * rows * len(AVAILABILITY_FIELDS)))
+
+        batch = []
+        for row in users.order_by().values_list(*AVAILABILITY_FIELDS).iterator(chunk_size=10_000):
+            batch.extend(filter_key(field, value) for field, value in zip(AVAILABILITY_FIELDS, row) if value)
+            if len(batch) >= 30_000:
+                bloom.add_many(batch)
+                batch = []
+        bloom.add_many(batch)
+
+        # record() runs before the commit, so the table may not have the latest values
+        # yet; replay their entries (and the one being published, see sync()).
+        numbers = range(max(1, sequence - REPLAY_ENTRIES + 1), sequence + 2)
+        for keys in cache.get_many([_log_key(generation, number) for number in numbers]).values():
+            bloom.add_many(keys)
+
+        with self._lock:
+            # Log entries written while the table was read are applied again by the
+            # next sync(); adding a value twice is harmless.
+            self._filter, self._sequence, self._generation = bloom, sequence, generation
+
+    def sync(self):
+        """Apply the shared change log, or rebuild when that is not possible."""
+        sequence, generation, entries = self._shared_state()
+        bloom = self._filter
+        if bloom is None or generation != self._generation or bloom.count > bloom.capacity:
+            self.rebuild()
+            return
+
+        # Up to one past the published sequence: that entry may be written already, its
+        # writer about to advance the sequence (or gone before it could).
+        first = self._sequence + 1
+        wanted = [_log_key(generation, number) for number in range(first, max(sequence, self._sequence) + 2)]
+        if len(wanted) > 1:
+            entries.update(cache.get_many(wanted[1:]))
+
+        found = []
+        for number, key in enumerate(wanted, first):
+            if key not in entries:
+                if number <= sequence:
+                    # Expired or evicted; the log can no longer be trusted.
+                    self.rebuild()
+                    return
+                break
+            found.append(entries[key])
+        if not found:
+            return
+
+        with self._lock:
+            for keys in found:
+                bloom.add_many(keys)
+            self._sequence = max(self._sequence, first + len(found) - 1)
+
+    def record(self, keys):
+        """Add filter_key()s to this process's filter and to the shared change log."""
+        keys = list(keys)
+        if self._filter is not None:
+            with self._lock:
+                self._filter.add_many(keys)
+
+        sequence, generation = self._log_state()
+        if sequence is None:
+            # The sequence is gone, so other processes cannot tell which entries they
+            # have seen: make everyone rebuild and start a new log for the new
+            # generation. The keys still go into it, for the rebuilds to replay.
+            bump_version(AVAILABILITY)
+            cache.add(_SEQUENCE_KEY, 0, None)
+            sequence, generation = self._log_state()
+
+        # Write the entry before publishing its number: claim the first free number
+        # after the published sequence, then advance the sequence. Entries up to the
+        # sequence are all written, as every writer claims one number and advances once.
+        number = sequence + 1
+        while not cache.add(_log_key(generation, number), keys, LOG_TIMEOUT):
+            number += 1
+        try:
+            cache.incr(_SEQUENCE_KEY)
+        except ValueError:
+            # Gone meanwhile; the next record() starts a new log.
+            pass
+
+    def might_exist(self, field, value):
+        self.sync()
+        return filter_key(field, value) in self._filter
+
+    def taken(self, values):
+        """{field: whether the value is taken} for {field: value}, syncing once for all."""
+        self.sync()
+        return {field: self._confirm(field, value) for field, value in values.items()}
+
+    def is_taken(self, field, value):
+        return self.taken({field: value})[field]
+
+    def _confirm(self, field, value):
+        if filter_key(field, value) not in self._filter:
+            return False
+
+        lookup = 'email__iexact' if field == 'email' else field
+        return CustomUser.objects.filter(**{lookup: value}).exists()
+
+    def _log_state(self):
+        found = cache.get_many([_SEQUENCE_KEY, version_key(AVAILABILITY)])
+        return found.get(_SEQUENCE_KEY), found.get(version_key(AVAILABILITY))
+
+    def _shared_state(self):
+        """(sequence, generation, {log key: entry}) with the next entry this process needs."""
+        next_key = _log_key(self._generation, self._sequence + 1)
+        found = cache.get_many([_SEQUENCE_KEY, version_key(AVAILABILITY), next_key])
+        entries = {next_key: found[next_key]} if next_key in found else {}
+        return found.get(_SEQUENCE_KEY, 0), found.get(version_key(AVAILABILITY)), entries
+
+
+index = AvailabilityIndex()
+
+
+def warm_up():
+    """Build the filter as a server process starts, instead of in its first check."""
+    try:
+        index.rebuild()
+    except DatabaseError:
+        # Not worth failing the start over; the first check builds it.
+        logger.exception("Could not build the availability filter")
+    finally:
+        # The rebuild pinned this context to the primary (see account.routers).
+        unpin()
@@ -0,0 +1,298 @@
+"""
+Small helpers around the default cache for data derived from the account tables.
+
+Cached entries are keyed with a namespace version; bumping the version invalidates
+every entry of the namespace at once without having to know their keys.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import CustomUser
+
+
+DATE_HIERARCHY = 'date_hierarchy'
+# CustomUser columns that decide which date-hierarchy buckets a user shows up in.
+DATE_HIERARCHY_FIELDS = {'date_joined', 'role', 'province', 'city'}
+# Days on which a signup has already outdated the date hierarchy; kept past the day's end.
+DATE_HIERARCHY_DAY_TIMEOUT = 60 * 60 * 48
+
+# CustomUser columns whose distinct values (with counts) back the admin list filters.
+FACET_FIELDS = ('province', 'city')
+FACET_TIMEOUT = 60 * 60 * 24
+
+# Token -> user entries of account.authentication.CachedTokenAuthentication. The local
+# tier is not told about evictions made by other processes, so its entries are short
+# lived: a token revoked elsewhere keeps working here for at most LOCAL_TOKEN_TIMEOUT.
+TOKEN_TIMEOUT = 60 * 60
+LOCAL_TOKEN_TIMEOUT = 5
+LOCAL_TOKEN_MAXSIZE = 1024
+
+# Serialized /users/me/ responses, one version namespace per user. The per-user
+# versions expire too, so their number does not grow with the user count; outliving
+# the entries, they only force a rebuild of entries that would have expired anyway.
+USER_REPRESENTATION_TIMEOUT = 60 * 60
+USER_VERSION_TIMEOUT = 2 * USER_REPRESENTATION_TIMEOUT
+
+
+def version_key(namespace):
+    """Cache key of a namespace's version, e.g. to read it along with other keys."""
+    return f"account:version:{namespace}"
+
+
+def get_version(namespace, timeout=None):
+    # Seed with the clock, so a version lost to eviction or expiry never reuses an old number.
+    return cache.get_or_set(version_key(namespace), time.time_ns(), timeout)
+
+
+def bump_version(namespace):
+    try:
+        cache.incr(version_key(namespace))
+    except ValueError:
+        cache.set(version_key(namespace), time.time_ns(), None)
+
+
+def note_date_joined(user):
+    """
+    Outdate the cached admin date hierarchy for a new `user`, unless it already shows the
+    user's day in every changelist the user appears in. The day marker is keyed by the
+    user's list_filter values (role, province, city) and by the hierarchy version, so it
+    only records signups the currently cached buckets were built with.
+    """
+    parts = ("day", f"{user.date_joined:%Y-%m-%d}", user.role, user.province, user.city)
+    if cache.get(make_key(DATE_HIERARCHY, *parts)) is None:
+        bump_version(DATE_HIERARCHY)
+        cache.set(make_key(DATE_HIERARCHY, *parts), True, DATE_HIERARCHY_DAY_TIMEOUT)
+
+
+def make_key(namespace, *parts):
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f"account:{namespace}:{get_version(namespace)}:{digest}"
+
+
+def _facet_key(field):
+    return f"account:facets:{field}"
+
+
+def _facet_count_key(field, generation, value):
+    digest = hashlib.md5(repr(value).encode()).hexdigest()
+    return f"account:facets:{field}:{generation}:{digest}"
+
+
+def get_facet_counts(field):
+    """
+    {value: number of users} for a CustomUser facet field, rebuilt from the
+    database when missing from the cache.
+
+    The cache holds the field's values under one key and a counter per value, so
+    saves can move a user with atomic incr/decr (see update_facet_counts).
+    """
+    entry = cache.get(_facet_key(field))
+    if entry is not None:
+        generation, values = entry
+        keys = {_facet_count_key(field, generation, value): value for value in values}
+        found = cache.get_many(keys)
+        if len(found) == len(keys):
+            return {keys[key]: count for key, count in found.items() if count > 0}
+    return rebuild_facet_counts(field)
+
+
+def rebuild_facet_counts(field):
+    counts = dict(CustomUser.objects.order_by().values_list(field).annotate(Count('pk')))
+    # A fresh generation, so counters left over from an earlier build are never reused.
+    generation = time.time_ns()
+    cache.set_many(
+        {_facet_count_key(field, generation, value): count for value, count in counts.items()},
+        FACET_TIMEOUT,
+    )
+    cache.set(_facet_key(field), (generation, list(counts)), FACET_TIMEOUT)
+    return counts
+
+
+def update_facet_counts(field, old_value=None, new_value=None):
+    """
+    Move one user from `old_value` to `new_value` (either may be None for inserts
+    and deletes). Nothing is cached yet -> nothing to do; the next read rebuilds.
+
+    Counters are moved with incr/decr, so concurrent saves never lose an update. A
+    value whose count reaches 0 stays listed (and is hidden by get_facet_counts). A
+    value that is not listed yet, or a missing counter, drops the cached values
+    instead, so the next read rebuilds them from the database.
+    """
+    entry = cache.get(_facet_key(field))
+    if entry is None:
+        return
+    generation, _ = entry
+
+    # Only listed values have a counter in this generation, so incr raises for new ones.
+    try:
+        if old_value is not None:
+            cache.decr(_facet_count_key(field, generation, old_value))
+        if new_value is not None:
+            cache.incr(_facet_count_key(field, generation, new_value))
+    except ValueError:
+        cache.delete(_facet_key(field))
+
+
+def clear_facet_counts():
+    cache.delete_many([_facet_key(field) for field in FACET_FIELDS])
+
+
+class LocalLRU:
+    """
+    Thread safe, per-process LRU mapping whose entries also expire after `timeout` seconds.
+    """
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Pickled tokens, so no two requests ever share (and mutate) one user instance.
+local_tokens = LocalLRU(LOCAL_TOKEN_MAXSIZE, LOCAL_TOKEN_TIMEOUT)
+
+
+def _token_key(key):
+    return f"account:token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def _user_token_key(user_id):
+    return f"account:user-token:{user_id}"
+
+
+def get_cached_token(key):
+    """The Token (with its user) cached under `key`, or None."""
+    data = local_tokens.get(key)
+    if data is None:
+        data = cache.get(_token_key(key))
+        if data is None:
+            return None
+        local_tokens.set(key, data)
+    return pickle.loads(data)
+
+
+async def aget_cached_token(key):
+    data = local_tokens.get(key)
+    if data is None:
+        data = await cache.aget(_token_key(key))
+        if data is None:
+            return None
+        local_tokens.set(key, data)
+    return pickle.loads(data)
+
+
+def _token_entries(token):
+    data = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+    local_tokens.set(token.key, data)
+    return {_token_key(token.key): data, _user_token_key(token.user_id): token.key}
+
+
+def cache_token(token):
+    cache.set_many(_token_entries(token), TOKEN_TIMEOUT)
+
+
+async def acache_token(token):
+    await cache.aset_many(_token_entries(token), TOKEN_TIMEOUT)
+
+
+def evict_token(key):
+    cache.delete(_token_key(key))
+    local_tokens.delete(key)
+
+
+def evict_user_token(user_id):
+    """Evict the cached token of a user, found through the user -> token entry."""
+    key = cache.get(_user_token_key(user_id))
+    if key is not None:
+        cache.delete_many([_token_key(key), _user_token_key(user_id)])
+        local_tokens.delete(key)
+
+
+def _user_namespace(user_id):
+    return f"user:{user_id}"
+
+
+def _user_representation_keys(user_id, variant):
+    entry_key = f"account:me:{user_id}:{hashlib.md5(variant.encode()).hexdigest()}"
+    return version_key(_user_namespace(user_id)), entry_key
+
+
+def get_user_representation(user_id, variant, build):
+    """
+    The cached result of build() for one user, valid until bump_user_versions() is
+    called for them. `variant` separates representations that differ by request
+    (absolute media URLs depend on the host). A warm entry costs one cache round trip:
+    the user's version and the entry are fetched together and the entry is used only
+    if it was built under the current version.
+    """
+    user_version_key, entry_key = _user_representation_keys(user_id, variant)
+
+    found = cache.get_many([user_version_key, entry_key])
+    version, entry = found.get(user_version_key), found.get(entry_key)
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+
+    # Read the version before building: a save landing meanwhile bumps it, so the
+    # entry built from the older row is never served.
+    if version is None:
+        version = get_version(_user_namespace(user_id), USER_VERSION_TIMEOUT)
+    data = build()
+    cache.set(entry_key, (version, data), USER_REPRESENTATION_TIMEOUT)
+    return data
+
+
+async def aget_user_representation(user_id, variant, build):
+    """get_user_representation() for async views; `build` is a coroutine function."""
+    user_version_key, entry_key = _user_representation_keys(user_id, variant)
+
+    found = await cache.aget_many([user_version_key, entry_key])
+    version, entry = found.get(user_version_key), found.get(entry_key)
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+
+    if version is None:
+        version = await cache.aget_or_set(user_version_key, time.time_ns(), USER_VERSION_TIMEOUT)
+    data = await build()
+    await cache.aset(entry_key, (version, data), USER_REPRESENTATION_TIMEOUT)
+    return data
+
+
+def bump_user_versions(user_ids):
+    # Fresh clock based versions, one round trip however many users changed.
+    version = time.time_ns()
+    cache.set_many(
+        {version_key(_user_namespace(user_id)): version for user_id in user_ids}, USER_VERSION_TIMEOUT
+    )
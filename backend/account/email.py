@@ -0,0 +1,37 @@
+"""
+Djoser's emails, queued instead of sent from the request (see account.mailqueue).
+"""
+from django.conf import settings
+from djoser import email
+
+from .mailqueue import enqueue
+
+
+class QueuedEmailMixin:
+    # Same signature as djoser's BaseEmailMessage.send, which `to` is required for.
+    def send(self, to, fail_silently=False, **kwargs):
+        self.render()
+
+        self.to = to
+        self.cc = kwargs.pop("cc", [])
+        self.bcc = kwargs.pop("bcc", [])
+        self.reply_to = kwargs.pop("reply_to", [])
+        self.from_email = kwargs.pop("from_email", settings.DEFAULT_FROM_EMAIL)
+        self.request = None
+        enqueue(self)
+
+
+class ActivationEmail(QueuedEmailMixin, email.ActivationEmail):
+    pass
+
+
+class ConfirmationEmail(QueuedEmailMixin, email.ConfirmationEmail):
+    pass
+
+
+class PasswordResetEmail(QueuedEmailMixin, email.PasswordResetEmail):
+    pass
+
+
+class PasswordChangedConfirmationEmail(QueuedEmailMixin, email.PasswordChangedConfirmationEmail):
+    pass
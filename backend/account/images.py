@@ -0,0 +1,241 @@
+"""
+Fixed-size derivatives of the profile images (Student.avatar, Institute.logo), so
+clients can fetch a thumbnail instead of the full upload.
+
+Every image gets a square crop at each of VARIANT_SIZES, in WebP and as a JPEG fallback,
+stored under a name derived from the original's: derivatives/<original name>/<size>.<ext>.
+Regenerating rewrites the same derivative names, as does a changed default image, so
+derivative URLs carry a version (?v=) that changes with their content: the time the
+profile was stamped (VARIANTS_READY_FIELDS), or for the default image the modification
+time of its derivatives. Versioned derivative URLs are served as immutable (see
+sodooronline.media).
+
+Derivatives are generated after the upload is committed, on a small background thread
+pool (see account.signals), never on the request thread. The job stamps the profiles using
+the image (VARIANTS_READY_FIELDS) once every derivative is written; until then the
+serializers hand out the original's URL. The shared default image is done by migrate
+(precompute_default_derivatives). The generate_image_derivatives command fills in
+whatever is missing: images uploaded before this existed, and uploads whose job failed
+or was lost with its process.
+"""
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_user_versions
+from .models import Institute, Student
+from .utils import default_file_path
+
+
+logger = logging.getLogger(__name__)
+
+VARIANT_SIZES = (256, 128, 64)
+# (extension, Pillow format, save options); the first one is the preferred format.
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+DERIVATIVES_DIR = 'derivatives'
+
+# Model -> name of its image field.
+IMAGE_FIELDS = {Institute: 'logo', Student: 'avatar'}
+# Model -> field stamped when the derivatives of its current image exist (null until then).
+VARIANTS_READY_FIELDS = {Institute: 'logo_variants_at', Student: 'avatar_variants_at'}
+
+# How long a process trusts that the default image's derivatives are still missing.
+DEFAULT_VARIANTS_RECHECK = 60
+
+# Default image name -> (version of its derivatives or None while missing, monotonic time
+# of the check). Per process: the derivatives are only rewritten by migrate and
+# generate_image_derivatives.
+_default_variants_version = {}
+
+derivative_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix='image-derivatives'
+)
+
+
+def variant_name(name, size, extension):
+    return f"{DERIVATIVES_DIR}/{name}/{size}.{extension}"
+
+
+def variant_names(name):
+    return [variant_name(name, size, extension) for size in VARIANT_SIZES for extension, _, _ in VARIANT_FORMATS]
+
+
+def variant_urls(name, build_url=None, version=None):
+    """
+    {size: {extension: url}} of an image's derivatives, e.g. for a serializer, each with
+    `version` (see derivatives_version) in its query string. Without a version the
+    derivatives are not ready and every entry is the URL of the original, so clients get
+    the same shape.
+    """
+    urls = {}
+    for size in VARIANT_SIZES:
+        urls[str(size)] = {
+            extension: _url(variant_name(name, size, extension), build_url, version) if version else _url(name, build_url)
+            for extension, _, _ in VARIANT_FORMATS
+        }
+    return urls
+
+
+def derivatives_version(profile):
+    """
+    Version of the derivatives of the profile's current image, changing whenever they are
+    rewritten, or None until every one of them has been written.
+    """
+    name = getattr(profile, IMAGE_FIELDS[type(profile)]).name
+    if name == default_file_path():
+        return _default_derivatives_version(name)
+    return _version(getattr(profile, VARIANTS_READY_FIELDS[type(profile)]))
+
+
+def _version(moment):
+    return f"{moment:%Y%m%d%H%M%S%f}" if moment else None
+
+
+def _default_derivatives_version(name):
+    """
+    The default image is shared by every new profile, so it is not stamped on the rows.
+    Its derivatives are looked up in the storage (render_variants writes the checked one
+    last) once per process, or once per DEFAULT_VARIANTS_RECHECK while still missing,
+    rather than on every serialization.
+    """
+    version, checked = _default_variants_version.get(name, (None, None))
+    if version or (checked is not None and time.monotonic() - checked < DEFAULT_VARIANTS_RECHECK):
+        return version
+    last = variant_names(name)[-1]
+    if default_storage.exists(last):
+        version = _version(default_storage.get_modified_time(last))
+    _default_variants_version[name] = (version, time.monotonic())
+    return version
+
+
+def mark_derivatives_ready(name, rewritten=True):
+    """
+    Stamp the profiles whose image is `name` as having its derivatives. The stamp is
+    their URLs' version, so unless the derivatives were `rewritten`, only profiles not
+    stamped yet are.
+    """
+    if name == default_file_path():
+        # Looked up again with its new modification time.
+        _default_variants_version.pop(name, None)
+        return
+    user_ids = []
+    for model, field in IMAGE_FIELDS.items():
+        profiles = model.objects.filter(**{field: name})
+        if not rewritten:
+            profiles = profiles.filter(**{f"{VARIANTS_READY_FIELDS[model]}__isnull": True})
+        user_ids += profiles.values_list('user_id', flat=True)
+        profiles.update(**{VARIANTS_READY_FIELDS[model]: timezone.now()})
+    # update() sends no post_save; outdate the cached /users/me/ responses.
+    if user_ids:
+        bump_user_versions(user_ids)
+
+
+def _url(name, build_url, version=None):
+    url = default_storage.url(name)
+    if version:
+        # Storages such as S3 may already sign the URL with a query string.
+        url += f"{'&' if '?' in url else '?'}v={version}"
+    return build_url(url) if build_url else url
+
+
+def _flatten(image):
+    """RGB copy for JPEG, with any transparency composited onto white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(source):
+    """
+    Yield (size, extension, bytes) for every derivative of the image in the file-like
+    `source`. The image is decoded once, at a reduced scale where the format allows it
+    (JPEG draft mode), and each size is scaled down from the previous one.
+    """
+    with Image.open(source) as image:
+        largest = VARIANT_SIZES[0]
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale directly, still at least `largest` px.
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        current = ImageOps.fit(image, (largest, largest), Image.Resampling.LANCZOS)
+        for size in VARIANT_SIZES:
+            if current.width != size:
+                current = current.resize((size, size), Image.Resampling.LANCZOS)
+            for extension, image_format, options in VARIANT_FORMATS:
+                output = io.BytesIO()
+                (current if image_format == 'WEBP' else _flatten(current)).save(output, image_format, **options)
+                yield size, extension, output.getvalue()
+
+
+def generate_derivatives(name, storage=default_storage, overwrite=True):
+    """Write every derivative of the stored image `name`. Returns the number written."""
+    if not overwrite and all(storage.exists(variant) for variant in variant_names(name)):
+        return 0
+
+    written = 0
+    with storage.open(name, 'rb') as source:
+        for size, extension, data in render_variants(source):
+            variant = variant_name(name, size, extension)
+            # Names are fixed, so replace rather than let the storage pick a new one.
+            if storage.exists(variant):
+                storage.delete(variant)
+            storage.save(variant, ContentFile(data))
+            written += 1
+    return written
+
+
+def precompute_default_derivatives(**kwargs):
+    """
+    post_migrate receiver (see AccountConfig.ready): generate the derivatives of the
+    default profile image when they are missing or older than the image, so every
+    deployment ships them.
+    """
+    name = default_file_path()
+    if not default_storage.exists(name):
+        return
+    modified = default_storage.get_modified_time(name)
+    if all(
+        default_storage.exists(variant) and default_storage.get_modified_time(variant) >= modified
+        for variant in variant_names(name)
+    ):
+        return
+    try:
+        generate_derivatives(name)
+        _default_variants_version.pop(name, None)
+    except Exception:
+        # Not worth failing migrate over; the original is served meanwhile.
+        logger.exception("Could not generate derivatives of %s", name)
+
+
+def _generate_logged(name):
+    try:
+        written = generate_derivatives(name)
+        mark_derivatives_ready(name)
+        return written
+    except Exception:
+        # Left for generate_image_derivatives to retry; the original is still served.
+        logger.exception("Could not generate derivatives of %s", name)
+        return 0
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(name):
+    """Generate the derivatives of `name` on the background pool; returns the Future."""
+    return derivative_executor.submit(_generate_logged, name)
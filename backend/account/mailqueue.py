@@ -0,0 +1,184 @@
+"""
+Outgoing email queue. Requests only render the message and insert an OutboundEmail
+row (enqueue()); the send_queued_emails worker drains the table with send_batch(),
+which delivers a whole batch over one backend connection (one SMTP handshake and
+login) and retries failures with exponential backoff.
+
+Views that change a user and queue an email about it (signup, activation, password
+and username changes) do both in one transaction (CustomUserViewSet.atomic_actions,
+account.async_views.activation), so the email is queued if and only if the change is
+committed.
+
+Bodies carry activation and password reset tokens. They are cleared once an email is
+sent or given up on, and sent rows are deleted after SENT_RETENTION (purge_sent()).
+
+Delivery is at least once: a worker that dies mid-batch leaves the batch claimed but
+unrecorded, and after LEASE another worker sends it again, including the emails the
+dead worker had already delivered.
+"""
+import datetime
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+RETRY_BASE = 60
+RETRY_MAX = 60 * 60
+# How long a claimed batch is hidden from other workers before it can be claimed
+# again, e.g. after the worker holding it died.
+LEASE = 10 * 60
+# How long sent rows are kept, without their bodies, for the admin.
+SENT_RETENTION = datetime.timedelta(days=7)
+
+
+def enqueue(message):
+    """
+    Store a rendered EmailMultiAlternatives (or subclass) for the worker. Attachments
+    and alternatives other than one HTML part are not stored; messages carrying them
+    are refused rather than sent without them.
+    """
+    mimetypes = [mimetype for _, mimetype in message.alternatives]
+    if message.attachments or mimetypes not in ([], ['text/html']):
+        raise ValueError("Queued emails can only carry a text body and one HTML alternative.")
+
+    html_body = message.alternatives[0][0] if message.alternatives else ''
+    return OutboundEmail.objects.create(
+        subject=message.subject,
+        body=message.body,
+        html_body=html_body,
+        from_email=message.from_email or '',
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+    )
+
+
+def retry_delay(attempts):
+    return datetime.timedelta(seconds=min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX))
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Lease up to `batch_size` due emails to this worker. Rows locked by another
+    worker's claim are skipped instead of waited for.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + datetime.timedelta(seconds=LEASE)
+            )
+    return emails
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body or email.html_body,
+        from_email=email.from_email or None,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        connection=connection,
+    )
+    if email.html_body:
+        if email.body:
+            message.attach_alternative(email.html_body, 'text/html')
+        else:
+            message.content_subtype = 'html'
+    return message
+
+
+def _clear_body(email):
+    email.body = email.html_body = ''
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboundEmail.Status.FAILED
+        _clear_body(email)
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def send_batch(batch_size=BATCH_SIZE, connection=None):
+    """
+    Claim and send one batch over a single connection. Returns (sent, failed) counts.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as error:
+        # No connection, nothing was sent: the whole batch backs off.
+        now = timezone.now()
+        for email in emails:
+            _record_failure(email, error, now)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                try:
+                    _build_message(email, connection).send()
+                except Exception as error:
+                    _record_failure(email, error, timezone.now())
+                    failed += 1
+                else:
+                    email.status = OutboundEmail.Status.SENT
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    _clear_body(email)
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body', 'html_body']
+    )
+    return sent, failed
+
+
+def purge_sent(retention=SENT_RETENTION):
+    """Delete the emails sent more than `retention` ago; returns how many."""
+    deleted, _ = OutboundEmail.objects.filter(
+        status=OutboundEmail.Status.SENT, sent_at__lt=timezone.now() - retention
+    ).delete()
+    return deleted
+
+
+def queue_depth():
+    """Pending (and of those, due), failed counts and the age of the oldest pending email."""
+    now = timezone.now()
+    pending = Q(status=OutboundEmail.Status.PENDING)
+    stats = OutboundEmail.objects.aggregate(
+        pending=Count('pk', filter=pending),
+        due=Count('pk', filter=pending & Q(next_attempt_at__lte=now)),
+        failed=Count('pk', filter=Q(status=OutboundEmail.Status.FAILED)),
+        oldest=Min('created_at', filter=pending),
+    )
+    oldest = stats.pop('oldest')
+    stats['oldest_pending_seconds'] = (now - oldest).total_seconds() if oldest else 0
+    return stats
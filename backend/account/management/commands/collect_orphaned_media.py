@@ -0,0 +1,189 @@
+"""
+Removal of uploaded images that no profile refers to any more.
+
+Replaced avatars and logos, and the files of accounts deleted through the cascade on
+Student.user and Institute.user, stay under MEDIA_ROOT. This command walks students/
+and institutes/, plus the derivatives generated from them (account.images), and deletes
+every file that is not, or is not a derivative of, the avatar or logo of some profile.
+It also sweeps the content store of account.storage: blobs no name links to any more
+(left by a save that fell back to a plain copy, or by a crash) and the temporary files
+of interrupted uploads in blobs/tmp.
+
+The tree is read as a stream, one directory listing at a time, in the order of the path
+components. Names are checked in batches of --batch-size with one IN query per image
+field, so memory use depends on the batch size and the largest directory, never on the
+number of files. After each batch the last name handled is written to the checkpoint
+file, so an interrupted run resumes after it; a completed run removes the checkpoint.
+
+Files created or linked within the grace period are kept: an upload is stored before the
+row naming it is committed. Deleting goes through the storage, so content shared with
+other names (account.storage) is only freed with its last name. Emptied directories are
+left in place.
+
+Usage:
+    python manage.py collect_orphaned_media --dry-run
+    python manage.py collect_orphaned_media --checkpoint /var/tmp/media-gc.ckpt
+"""
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+
+from account.images import DERIVATIVES_DIR, IMAGE_FIELDS
+from account.storage import BLOB_DIR
+
+
+UPLOAD_DIRS = ('students', 'institutes')
+SCANNED_DIRS = (BLOB_DIR,) + UPLOAD_DIRS + tuple(f'{DERIVATIVES_DIR}/{directory}' for directory in UPLOAD_DIRS)
+
+
+def _parts(name):
+    return tuple(name.split('/'))
+
+
+def walk(location, directory, after=()):
+    """
+    Yield (name, stat) for the files under `directory`, relative to `location`, ordered
+    by path components and skipping every name up to and including `after`.
+    """
+    try:
+        with os.scandir(os.path.join(location, directory)) as scan:
+            entries = sorted(scan, key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        name = f'{directory}/{entry.name}'
+        parts = _parts(name)
+        if entry.is_dir(follow_symlinks=False):
+            # A directory sorting before the checkpoint holds nothing left to do.
+            if parts >= after[:len(parts)]:
+                yield from walk(location, name, after)
+        elif entry.is_file(follow_symlinks=False) and parts > after:
+            yield name, entry.stat(follow_symlinks=False)
+
+
+def walk_media(location, after=()):
+    for directory in sorted(SCANNED_DIRS, key=_parts):
+        parts = _parts(directory)
+        if parts >= after[:len(parts)]:
+            yield from walk(location, directory, after)
+
+
+def image_name(name):
+    """The uploaded image `name` is, or is a derivative of."""
+    if name.startswith(f'{DERIVATIVES_DIR}/'):
+        return os.path.dirname(name)[len(DERIVATIVES_DIR) + 1:]
+    return name
+
+
+def is_blob(name):
+    return name.startswith(f'{BLOB_DIR}/')
+
+
+def blob_in_use(name, file_stat):
+    """A blob is in use while some name links to it; temporary files never are."""
+    return not name.startswith(f'{BLOB_DIR}/tmp/') and file_stat.st_nlink > 1
+
+
+def referenced(names):
+    """
+    The subset of `names` that is the avatar or logo of some profile. Read from the
+    primary: on a lagging replica a row committed moments ago would look missing.
+    """
+    names = list(names)
+    found = set()
+    for model, field in IMAGE_FIELDS.items():
+        profiles = model.objects.using(router.db_for_write(model))
+        found.update(profiles.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+    return found
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Delete uploaded avatars, logos and their derivatives that no profile refers to."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="List the orphaned files (name and size) without deleting.")
+        parser.add_argument('--grace-hours', type=float, default=24.0, help="Keep files created or linked more recently.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Names checked per database query.")
+        parser.add_argument('--checkpoint', help="Progress file; an existing one resumes the run. Not used with --dry-run.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        checkpoint_path = None if dry_run else options['checkpoint']
+        location = default_storage.location
+        cutoff = time.time() - options['grace_hours'] * 3600
+
+        progress = self.load_checkpoint(checkpoint_path, location)
+        if progress['cursor']:
+            self.stdout.write(f"Resuming after {progress['cursor']}.")
+        after = _parts(progress['cursor']) if progress['cursor'] else ()
+
+        for batch in chunked(walk_media(location, after), options['batch_size']):
+            in_use = referenced({image_name(name) for name, _ in batch if not is_blob(name)})
+            for name, file_stat in batch:
+                if blob_in_use(name, file_stat) if is_blob(name) else image_name(name) in in_use:
+                    progress['referenced'] += 1
+                    continue
+                # Linking a new name to stored content (account.storage) changes the
+                # ctime only; the mtime is that of the first upload of the content. A
+                # save about to link a blob deleted here stores the content again.
+                if max(file_stat.st_mtime, file_stat.st_ctime) > cutoff:
+                    progress['recent'] += 1
+                    continue
+
+                progress['orphaned'] += 1
+                progress['bytes'] += file_stat.st_size
+                if dry_run:
+                    self.stdout.write(f"{name}\t{file_stat.st_size}")
+                    continue
+                default_storage.delete(name)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"deleted: {name}")
+
+            progress['scanned'] += len(batch)
+            progress['cursor'] = batch[-1][0]
+            self.save_checkpoint(checkpoint_path, progress)
+
+        self.stdout.write(
+            f"{progress['scanned']} scanned, {progress['referenced']} referenced, "
+            f"{progress['recent']} within the grace period, {progress['orphaned']} orphaned "
+            f"({progress['bytes']} bytes) {'to delete' if dry_run else 'deleted'}"
+        )
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def load_checkpoint(self, checkpoint_path, location):
+        progress = {
+            'location': os.path.abspath(location), 'cursor': '',
+            'scanned': 0, 'referenced': 0, 'recent': 0, 'orphaned': 0, 'bytes': 0,
+        }
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return progress
+
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+
+        if saved.get('location') != progress['location']:
+            raise CommandError(f"Checkpoint {checkpoint_path} belongs to {saved.get('location')}.")
+
+        return saved
+
+    def save_checkpoint(self, checkpoint_path, progress):
+        if not checkpoint_path:
+            return
+
+        # Write then rename, so a crash never leaves a half-written checkpoint.
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,51 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from account.images import IMAGE_FIELDS, generate_derivatives, mark_derivatives_ready
+from account.utils import default_file_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the missing thumbnails (account.images) of the default profile image "
+        "and of every stored avatar and logo, and mark the profiles using them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate derivatives that already exist.")
+        parser.add_argument('--default-only', action='store_true', help="Only the shared default profile image.")
+
+    def handle(self, *args, **options):
+        names = [default_file_path()]
+        if not options['default_only']:
+            names = self.image_names()
+
+        generated = skipped = missing = failed = 0
+        for name in names:
+            if not default_storage.exists(name):
+                missing += 1
+                self.stderr.write(f"missing: {name}")
+                continue
+            try:
+                written = generate_derivatives(name, overwrite=options['force'])
+                mark_derivatives_ready(name, rewritten=bool(written))
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f"failed: {name}: {error}")
+                continue
+            if written:
+                generated += 1
+            else:
+                skipped += 1
+
+        self.stdout.write(f"{generated} generated, {skipped} up to date, {missing} missing, {failed} failed")
+
+    def image_names(self):
+        """The default image first, then each distinct stored image name once."""
+        yield default_file_path()
+        for model, field in IMAGE_FIELDS.items():
+            names = (
+                model.objects.exclude(**{field: ''}).exclude(**{field: default_file_path()})
+                .order_by(field).values_list(field, flat=True).distinct().iterator(chunk_size=2000)
+            )
+            yield from names
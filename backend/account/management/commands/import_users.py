@@ -0,0 +1,272 @@
+"""
+Bulk import of user accounts from a CSV or JSONL file.
+
+Rows are read as a stream and handled in fixed-size chunks, so memory use does not
+depend on the size of the file. For every chunk the usernames and phone numbers are
+checked with the model validators and column lengths, the passwords are hashed in a process pool and the
+users plus their Student/Institute profiles are written with bulk_create in a single
+transaction. After each committed chunk the number of consumed rows is written to the
+checkpoint file, so an interrupted import resumes where it stopped.
+
+Expected columns / keys: username, first_name, last_name, email, phone_number, role,
+and optionally password (accounts without one get an unusable password).
+
+Usage:
+    python manage.py import_users students.csv --checkpoint students.ckpt
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import connections, router, transaction
+from django.db.models.functions import Lower
+
+from account.availability import AVAILABILITY_FIELDS, filter_key, index as availability_index
+from account.cache import DATE_HIERARCHY, bump_version, clear_facet_counts
+from account.models import CustomUser, Institute, Student
+from account.validators import phone_number_validator, username_validator
+
+
+REQUIRED_FIELDS = ('username', 'first_name', 'last_name', 'email', 'phone_number', 'role')
+UNIQUE_FIELDS = ('username', 'email', 'phone_number')
+PROFILE_MODELS = {
+    CustomUser.Roles.STUDENT: Student,
+    CustomUser.Roles.INSTITUTE: Institute,
+}
+
+
+def unique_value(field, value):
+    # The unique email index compares case-insensitively (utf8mb4_unicode_ci).
+    return value.lower() if field == 'email' else value
+
+
+def _init_worker(settings_module):
+    # Spawned workers (macOS/Windows) start without a configured Django.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def read_rows(path, file_format):
+    """Yield one dict per data row without loading the file into memory."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Import users from a CSV or JSONL file with batched validation, hashing and inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with a header row) or JSONL file.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Password hashing processes.")
+        parser.add_argument('--checkpoint', help="Progress file; an existing one resumes the import.")
+        parser.add_argument('--inactive', action='store_true', help="Import the accounts inactive, without profiles.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        checkpoint_path = options['checkpoint']
+
+        progress = self.load_checkpoint(checkpoint_path, path)
+        if progress['offset']:
+            self.stdout.write(f"Resuming after row {progress['offset']}.")
+
+        rows = islice(read_rows(path, file_format), progress['offset'], None)
+
+        self.workers = options['workers']
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE),),
+            )
+
+        try:
+            for chunk in chunked(rows, options['batch_size']):
+                created, rejected = self.import_chunk(chunk, progress['offset'], pool, not options['inactive'])
+
+                progress['offset'] += len(chunk)
+                progress['created'] += created
+                progress['rejected'] += len(rejected)
+                self.save_checkpoint(checkpoint_path, progress)
+
+                for line, reason in sorted(rejected):
+                    self.stderr.write(f"row {line}: {reason}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {progress['created']} users, rejected {progress['rejected']} rows."
+        ))
+
+    def import_chunk(self, chunk, offset, pool, active):
+        """
+        Validate, hash and insert one chunk. Returns the number of created users
+        and a list of (row number, reason) for the rejected rows.
+        """
+        rejected = []
+        rows = []
+        for line, row in enumerate(chunk, start=offset + 1):
+            password = row.get('password') or None
+            row = {key: str(value or '').strip() for key, value in row.items() if key}
+            row['password'] = password
+            missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+            if missing:
+                rejected.append((line, f"missing {', '.join(missing)}"))
+                continue
+            rows.append((line, row))
+
+        codes = username_validator.validate_many(row['username'] for _, row in rows)
+        existing = self.existing_values(rows)
+        seen = {field: set() for field in UNIQUE_FIELDS}
+
+        valid = []
+        for (line, row), code in zip(rows, codes):
+            row['email'] = CustomUser.objects.normalize_email(row['email'])
+            reason = self.check_row(row, code, existing, seen)
+            if reason:
+                rejected.append((line, reason))
+                continue
+
+            for field in UNIQUE_FIELDS:
+                seen[field].add(unique_value(field, row[field]))
+            valid.append(row)
+
+        if not valid:
+            return 0, rejected
+
+        passwords = [row['password'] for row in valid]
+        if pool is not None:
+            chunksize = max(1, len(passwords) // (self.workers * 4))
+            hashes = list(pool.map(make_password, passwords, chunksize=chunksize))
+        else:
+            hashes = [make_password(password) for password in passwords]
+
+        users = [
+            CustomUser(
+                **{field: row[field] for field in REQUIRED_FIELDS},
+                password=password_hash,
+                is_active=active,
+            )
+            for row, password_hash in zip(valid, hashes)
+        ]
+        for user in users:
+            user.normalize_search_fields()
+
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+
+            # MySQL does not return primary keys from bulk inserts.
+            if active:
+                user_ids = dict(
+                    CustomUser.objects.filter(username__in=[user.username for user in users])
+                    .values_list('username', 'pk')
+                )
+                for role, model in PROFILE_MODELS.items():
+                    model.objects.bulk_create([
+                        model(user_id=user_ids[user.username]) for user in users if user.role == role
+                    ])
+
+        # bulk_create sends no post_save, so invalidate the admin caches and feed the
+        # availability filter here.
+        bump_version(DATE_HIERARCHY)
+        clear_facet_counts()
+        availability_index.record(
+            filter_key(field, getattr(user, field)) for user in users for field in AVAILABILITY_FIELDS
+        )
+
+        return len(users), rejected
+
+    def check_row(self, row, code, existing, seen):
+        # Too long a value would fail the whole insert (a DataError on MySQL).
+        for field in REQUIRED_FIELDS:
+            max_length = CustomUser._meta.get_field(field).max_length
+            if max_length and len(row[field]) > max_length:
+                return f"{field} longer than {max_length} characters"
+
+        if code != username_validator.VALID:
+            return f"invalid username {row['username']!r}"
+
+        try:
+            phone_number_validator(row['phone_number'])
+        except ValidationError:
+            return f"invalid phone number {row['phone_number']!r}"
+
+        try:
+            validate_email(row['email'])
+        except ValidationError:
+            return f"invalid email {row['email']!r}"
+
+        if row['role'] not in PROFILE_MODELS:
+            return f"invalid role {row['role']!r}"
+
+        for field in UNIQUE_FIELDS:
+            value = unique_value(field, row[field])
+            if value in existing[field]:
+                return f"{field} {row[field]!r} already exists"
+            if value in seen[field]:
+                return f"duplicate {field} {row[field]!r} in file"
+
+        return None
+
+    def existing_values(self, rows):
+        """
+        One query per unique column for the values of this chunk already in the
+        database, as unique_value()s.
+        """
+        users = CustomUser.objects.using(router.db_for_write(CustomUser))
+        existing = {}
+        for field in UNIQUE_FIELDS:
+            values = {unique_value(field, row[field]) for _, row in rows}
+            if field == 'email' and connections[users.db].vendor != 'mysql':
+                # MySQL's collation already compares case-insensitively, through the index.
+                queryset = users.alias(email_lower=Lower('email')).filter(email_lower__in=values)
+            else:
+                queryset = users.filter(**{f"{field}__in": values})
+            existing[field] = {unique_value(field, value) for value in queryset.values_list(field, flat=True)}
+        return existing
+
+    def load_checkpoint(self, checkpoint_path, path):
+        progress = {'path': os.path.abspath(path), 'offset': 0, 'created': 0, 'rejected': 0}
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return progress
+
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+
+        if saved.get('path') != progress['path']:
+            raise CommandError(f"Checkpoint {checkpoint_path} belongs to {saved.get('path')}.")
+
+        return saved
+
+    def save_checkpoint(self, checkpoint_path, progress):
+        if not checkpoint_path:
+            return
+
+        # Write then rename, so a crash never leaves a half-written checkpoint.
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,111 @@
+"""
+Move uploaded avatars and logos to the fanned-out layout of account.utils.image_directory
+(students/ab/cd/<username>/ instead of students/<username>/).
+
+For every profile whose image is outside its directory in that layout:
+1. the image and its derivatives (account.images) are stored under the new name as well;
+   the storage keeps one copy per content (account.storage), so no second copy is written;
+2. the profile is switched to the new name, provided it still names the old one, so an
+   image uploaded meanwhile is left alone;
+3. the old names stay, for clients and caches still holding the old URLs. Nothing refers
+   to them any more, so collect_orphaned_media removes them after its grace period.
+
+The site keeps working throughout, as both names exist until the row is switched.
+Profiles are handled in primary key order, --batch-size at a time, with the updates of a
+batch in one transaction. Profiles already moved are skipped, so running the command
+again resumes an interrupted run. Missing derivatives are left to
+generate_image_derivatives.
+
+Usage:
+    python manage.py migrate_image_layout --dry-run
+    python manage.py migrate_image_layout --batch-size 500
+"""
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from account.cache import bump_user_versions
+from account.images import IMAGE_FIELDS, variant_names
+from account.utils import default_file_path, image_directory
+
+
+def target_name(user, name):
+    return f"{image_directory(user.role, user.username)}/{posixpath.basename(name)}"
+
+
+def link_image(name, new_name, storage=default_storage):
+    """Store the image `name` and its derivatives under `new_name`; returns the name used."""
+    with storage.open(name, 'rb') as content:
+        new_name = storage.save(new_name, content)
+    for variant, new_variant in zip(variant_names(name), variant_names(new_name)):
+        if not storage.exists(variant):
+            continue
+        # Derivative names are fixed (see generate_derivatives).
+        if storage.exists(new_variant):
+            storage.delete(new_variant)
+        with storage.open(variant, 'rb') as content:
+            storage.save(new_variant, content)
+    return new_name
+
+
+def profile_batches(model, field, batch_size):
+    """Profiles with an uploaded image, in primary key order, `batch_size` per query."""
+    queryset = (
+        model.objects.exclude(**{field: ''}).exclude(**{field: default_file_path()})
+        .select_related('user').only('pk', field, 'user__role', 'user__username').order_by('pk')
+    )
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+class Command(BaseCommand):
+    help = "Move uploaded avatars and logos to the fanned-out directory layout, batch by batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="List the moves without making them.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        moved = current = missing = changed = 0
+
+        for model, field in IMAGE_FIELDS.items():
+            for batch in profile_batches(model, field, options['batch_size']):
+                moves = []
+                for profile in batch:
+                    name = getattr(profile, field).name
+                    new_name = target_name(profile.user, name)
+                    if posixpath.dirname(name) == posixpath.dirname(new_name):
+                        current += 1
+                    elif not default_storage.exists(name):
+                        missing += 1
+                        self.stderr.write(f"missing: {name}")
+                    elif dry_run:
+                        moved += 1
+                        self.stdout.write(f"{name} -> {new_name}")
+                    else:
+                        moves.append((profile, name, link_image(name, new_name)))
+
+                with transaction.atomic():
+                    switched = [
+                        profile.user_id for profile, name, new_name in moves
+                        if model.objects.filter(pk=profile.pk, **{field: name}).update(**{field: new_name})
+                    ]
+                # update() sends no post_save; outdate the cached /users/me/ responses.
+                if switched:
+                    bump_user_versions(switched)
+                moved += len(switched)
+                changed += len(moves) - len(switched)
+
+        self.stdout.write(
+            f"{moved} {'to move' if dry_run else 'moved'}, {current} already in place, "
+            f"{missing} missing, {changed} changed meanwhile"
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from account.cache import FACET_FIELDS, rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached province/city counts behind the CustomUser admin filters."
+
+    def handle(self, *args, **options):
+        for field in FACET_FIELDS:
+            counts = rebuild_facet_counts(field)
+            self.stdout.write(f"{field}: {len(counts)} values")
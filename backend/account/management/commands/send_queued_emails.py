@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from account.mailqueue import BATCH_SIZE, purge_sent, send_batch
+
+
+class Command(BaseCommand):
+    help = "Send queued emails in batches, one mail server connection per batch, and purge old sent ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting once the queue is drained.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent + failed:
+                self.stdout.write(f"sent {sent}, failed {failed}")
+            if sent + failed < options['batch_size']:
+                purge_sent()
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(f"{total_sent} sent, {total_failed} failed")
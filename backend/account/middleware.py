@@ -0,0 +1,38 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .routers import unpin
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scope the read-your-writes pin of account.routers.ReplicaRouter to one request:
+    every request starts reading from the replicas, whatever the previous request
+    handled by this thread did.
+
+    Sync and async capable, so async views (account.async_views) keep running on the
+    event loop under ASGI instead of being adapted to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        unpin()
+        try:
+            return self.get_response(request)
+        finally:
+            unpin()
+
+    async def __acall__(self, request):
+        unpin()
+        try:
+            return await self.get_response(request)
+        finally:
+            unpin()
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:21
+
+import account.utils
+from django.db import migrations, models
+
+
+def populate_normalized_names(apps, schema_editor):
+    CustomUser = apps.get_model('account', 'CustomUser')
+    manager = CustomUser.objects.db_manager(schema_editor.connection.alias)
+    users = manager.only('pk', 'first_name', 'last_name')
+
+    batch = []
+    for user in users.iterator(chunk_size=2000):
+        user.first_name_normalized = account.utils.normalize_persian(user.first_name)
+        user.last_name_normalized = account.utils.normalize_persian(user.last_name)
+        batch.append(user)
+        if len(batch) == 2000:
+            manager.bulk_update(batch, ['first_name_normalized', 'last_name_normalized'])
+            batch = []
+
+    manager.bulk_update(batch, ['first_name_normalized', 'last_name_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_customuser_filter_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='first_name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='last_name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_normalized_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['first_name_normalized'], name='user_first_name_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['last_name_normalized'], name='user_last_name_norm_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='institute',
+            name='logo_variants_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='avatar_variants_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,12 +1,84 @@
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from .validators import phone_number_validator, username_validator, image_file_extension_validator
-from .utils import default_file_path, get_image_file_path
+from .utils import default_file_path, get_image_file_path, normalize_persian
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
-class CustomUserManager(BaseUserManager):
+class CustomUserQuerySet(models.QuerySet):
+    def activate(self):
+        """
+        Activate the inactive users of this queryset with a single UPDATE and create their
+        missing role profiles with one bulk insert per role, all in one transaction.
+        post_save is not sent, so create_profile does not run per user.
+
+        Returns the number of users that were activated.
+        """
+        from .cache import bump_user_versions
+
+        profile_models = {
+            CustomUser.Roles.STUDENT: Student,
+            CustomUser.Roles.INSTITUTE: Institute,
+        }
+
+        # A read queryset may be routed to a replica; lock, update and insert on the
+        # primary, in one transaction there.
+        using = self._db or router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            pending = list(
+                self.using(using).filter(is_active=False).select_for_update().values_list('pk', 'role')
+            )
+            if not pending:
+                return 0
+
+            activated = self.model._default_manager.using(using).filter(
+                pk__in=[pk for pk, _ in pending]
+            ).update(is_active=True)
+
+            for role, model in profile_models.items():
+                model.objects.using(using).bulk_create(
+                    [model(user_id=pk) for pk, user_role in pending if user_role == role],
+                    batch_size=1000,
+                    ignore_conflicts=True,
+                )
+
+            # No post_save either: outdate the cached /users/me/ responses here.
+            transaction.on_commit(lambda: bump_user_versions([pk for pk, _ in pending]), using=using)
+
+        return activated
+
+    def search(self, query):
+        """
+        Users matching every term of the query as a prefix of their username, first
+        name or last name. Terms and names are compared in their normalize_persian()
+        form, so Arabic and Persian spellings (ي/ی, ك/ک) and digits match each other,
+        and each term is a range seek on an index instead of a LIKE '%term%' scan.
+        """
+        # The database the query runs on, e.g. a replica, not necessarily the default one.
+        vendor = connections[self.db].vendor
+        queryset = self
+        for term in normalize_persian(query).split():
+            queryset = queryset.filter(
+                _prefix_q('username', term, vendor)
+                | _prefix_q('first_name_normalized', term, vendor)
+                | _prefix_q('last_name_normalized', term, vendor)
+            )
+        return queryset
+
+
+def _prefix_q(field, prefix, vendor):
+    # MySQL compares LIKE 'prefix%' through the column collation and seeks the index.
+    # SQLite only optimizes LIKE on NOCASE indexes, so use the equivalent range of
+    # its binary ordering instead.
+    if vendor == 'sqlite':
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return models.Q(**{f"{field}__gte": prefix, f"{field}__lt": upper})
+    return models.Q(**{f"{field}__istartswith": prefix})
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     def create_user(self, username, first_name, last_name, email, phone_number, password=None, **extra_fields):
         if not username:
             raise ValueError("Users must have a username.")
@@ -58,14 +130,92 @@ class CustomUser(AbstractUser):
     role            = models.CharField(max_length=1, choices=Roles.choices, blank=True, help_text="Leave blank for superusers.")
     is_active       = models.BooleanField(default=False)
 
+    # normalize_persian() copies of the names, maintained by save(); see CustomUserQuerySet.search.
+    first_name_normalized = models.CharField(max_length=100, blank=True, editable=False)
+    last_name_normalized  = models.CharField(max_length=100, blank=True, editable=False)
+
     objects = CustomUserManager()
 
     USERNAME_FIELD  = 'username'
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name', 'phone_number', 'role']
 
+    class Meta(AbstractUser.Meta):
+        # Access paths of the CustomUserAdmin changelist (list_filter, date_hierarchy)
+        # and of the activation flow.
+        indexes = [
+            models.Index(fields=['role', 'province', 'city'], name='user_role_province_city_idx'),
+            models.Index(fields=['province', 'city'], name='user_province_city_idx'),
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+            models.Index(fields=['is_active', 'date_joined'], name='user_active_date_joined_idx'),
+            models.Index(fields=['first_name_normalized'], name='user_first_name_norm_idx'),
+            models.Index(fields=['last_name_normalized'], name='user_last_name_norm_idx'),
+        ]
+
+    # Fields whose last saved value is remembered, so post_save receivers can act on
+    # actual changes only (see save() and `changed_values`).
+    tracked_fields = ('is_active', 'role', 'province', 'city', 'username', 'email', 'phone_number', 'date_joined')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_values = self._tracked_values()
+
     def __str__(self):
         return self.username
 
+    def _tracked_values(self):
+        # Deferred fields are absent from __dict__ and stay None (unknown).
+        return {name: self.__dict__.get(name) for name in self.tracked_fields}
+
+    def save(self, *args, **kwargs):
+        """
+        Override: Keep the normalized search columns in step with the names, and record
+        which tracked fields this save changes, so the post_save receivers can react to
+        changes only:
+        - `changed_values` maps each changed tracked field to its previous value
+          (None for new users).
+        - `activated` flags the save that moves an existing account from inactive to active.
+        """
+        update_fields = kwargs.get('update_fields')
+
+        self.normalize_search_fields()
+        if update_fields is not None:
+            extra_fields = {
+                f"{name}_normalized" for name in ('first_name', 'last_name') if name in update_fields
+            }
+            kwargs['update_fields'] = set(update_fields) | extra_fields
+
+        written = set(self.tracked_fields) - self.get_deferred_fields()
+        if update_fields is not None:
+            written &= set(update_fields)
+
+        current = self._tracked_values()
+        adding = self._state.adding
+        self.changed_values = {
+            name: None if adding else self._saved_values[name]
+            for name in written
+            if adding or current[name] != self._saved_values[name]
+        }
+        self.activated = (
+            not adding
+            and self.is_active
+            and self.changed_values.get('is_active', True) is False
+        )
+        super().save(*args, **kwargs)
+
+        self._saved_values.update({name: current[name] for name in written})
+
+    def normalize_search_fields(self):
+        """
+        Refresh the normalized name columns. Called by save(); bulk writers that
+        bypass save() call it themselves.
+        """
+        self.first_name_normalized = normalize_persian(self.first_name)
+        self.last_name_normalized = normalize_persian(self.last_name)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._saved_values = self._tracked_values()
+
 
 class Institute(models.Model):
     user            = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
@@ -73,6 +223,8 @@ class Institute(models.Model):
     description     = models.TextField(blank=True)
     website         = models.URLField(null=True, blank=True, unique=True)
     logo            = models.ImageField(upload_to=get_image_file_path, default=default_file_path, blank=True, validators=[image_file_extension_validator])
+    # When the job of account.images wrote the logo's derivatives; null until then.
+    logo_variants_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at      = models.DateTimeField(auto_now_add=True)
     updated_at      = models.DateTimeField(auto_now=True)
 
@@ -91,6 +243,8 @@ class Student(models.Model):
     birth_date      = models.DateField(null=True, blank=True, help_text="The date must be in the YYYY-MM-DD format.")
     bio             = models.TextField(blank=True)
     avatar          = models.ImageField(upload_to=get_image_file_path, default=default_file_path, blank=True, validators=[image_file_extension_validator])
+    # When the job of account.images wrote the avatar's derivatives; null until then.
+    avatar_variants_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at      = models.DateTimeField(auto_now_add=True)
     updated_at      = models.DateTimeField(auto_now=True)
 
@@ -102,4 +256,38 @@ class Student(models.Model):
             raise ValidationError(
                 _("Can't assign Student profile to user with role '%(role)s'."),
                 params={'role': self.user.get_role_display()}
-            )
\ No newline at end of file
+            )
+
+class OutboundEmail(models.Model):
+    """
+    A rendered email waiting for the send_queued_emails worker (see account.mailqueue).
+    """
+    class Status(models.TextChoices):
+        PENDING = 'P', 'Pending'
+        SENT = 'S', 'Sent'
+        FAILED = 'F', 'Failed'
+
+    subject         = models.CharField(max_length=255)
+    body            = models.TextField(blank=True)
+    html_body       = models.TextField(blank=True)
+    from_email      = models.CharField(max_length=254)
+    to              = models.JSONField()
+    cc              = models.JSONField(default=list, blank=True)
+    bcc             = models.JSONField(default=list, blank=True)
+    reply_to        = models.JSONField(default=list, blank=True)
+    headers         = models.JSONField(default=dict, blank=True)
+    status          = models.CharField(max_length=1, choices=Status.choices, default=Status.PENDING)
+    attempts        = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error      = models.TextField(blank=True)
+    created_at      = models.DateTimeField(auto_now_add=True)
+    sent_at         = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: pending rows that are due, oldest first.
+            models.Index(fields=['status', 'next_attempt_at'], name='email_status_next_attempt_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
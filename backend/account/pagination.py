@@ -0,0 +1,196 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class UserCursorPagination(BasePagination):
+    """
+    Keyset pagination for the user list, ordered by (date_joined, id).
+
+    Each page is fetched with a "(date_joined, id) > last seen" condition over the
+    date_joined index instead of an OFFSET, so page 10,000 costs the same as page 1 and
+    rows inserted meanwhile never shift or duplicate results. The cursor is opaque to
+    clients: base64 of the boundary row's position and the paging direction.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        date_joined, pk, reverse = self.decode_cursor(request)
+
+        # "(date_joined, id) > (d, i)" written with a plain range on the leading column,
+        # so both MySQL and SQLite seek into the date_joined index instead of scanning it.
+        if date_joined is not None:
+            if reverse:
+                queryset = queryset.filter(Q(date_joined__lt=date_joined) | Q(pk__lt=pk), date_joined__lte=date_joined)
+            else:
+                queryset = queryset.filter(Q(date_joined__gt=date_joined) | Q(pk__gt=pk), date_joined__gte=date_joined)
+
+        ordering = ('-date_joined', '-pk') if reverse else ('date_joined', 'pk')
+        results = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = date_joined is not None, has_more
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, None, False
+
+        try:
+            date_joined, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return datetime.fromisoformat(date_joined), int(pk), bool(reverse)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, user, reverse):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.get_cursor_token(user, reverse))
+
+    def get_cursor_token(self, user, reverse=False):
+        position = json.dumps([user.date_joined.isoformat(), user.pk, int(reverse)])
+        return base64.urlsafe_b64encode(position.encode('ascii')).decode('ascii')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that avoids COUNT(*) over large tables.
+
+    The count of an unfiltered changelist comes from the database's table statistics.
+    Filtered changelists are counted with a LIMIT threshold + 1 subquery, so at most
+    `threshold` rows are read; larger results fall back to the planner's estimate
+    (or the table estimate where the backend has none). Below the threshold, or with
+    exact=True, counts are exact. `is_estimate` tells the template which case applied.
+    """
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, threshold=100_000, exact=False):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.threshold = threshold
+        self.exact = exact
+        self.is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.exact:
+            return queryset.count()
+
+        if not queryset.query.has_filters():
+            estimate = table_row_estimate(queryset.model, queryset.db)
+            if estimate is None or estimate <= self.threshold:
+                return queryset.count()
+        else:
+            bounded = queryset.order_by()[:self.threshold + 1].count()
+            if bounded <= self.threshold:
+                return bounded
+
+            estimate = query_row_estimate(queryset) or table_row_estimate(queryset.model, queryset.db) or bounded
+            estimate = max(estimate, bounded)
+
+        self.is_estimate = True
+        return estimate
+
+
+def table_row_estimate(model, using):
+    """Row count from the table statistics, or None when the backend keeps none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'mysql': ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                  "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"),
+        'postgresql': "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+        # Populated by ANALYZE; the first number of a stat row is the table size.
+        'sqlite': "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+    }
+    if connection.vendor not in queries:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+
+    if not row or row[0] is None:
+        return None
+
+    return int(str(row[0]).split()[0])
+
+
+def query_row_estimate(queryset):
+    """Rows the MySQL planner expects the query to return, or None elsewhere."""
+    if connections[queryset.db].vendor != 'mysql':
+        return None
+
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        table = plan['query_block']['table']
+        return int(float(table['rows_examined_per_scan']) * float(table.get('filtered', 100)) / 100)
+    except (DatabaseError, KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,148 @@
+"""
+Database routing for the account tables.
+
+Reads of the user, profile and token tables go to one of settings.DATABASE_REPLICAS;
+every write goes to the primary ('default'). Three things keep replica lag and
+outages invisible:
+
+* Read-your-writes: the first write pins the current context (one request, see
+  ReplicaPinningMiddleware) to the primary, so a request never reads back an older
+  copy of a row it just changed.
+* Primary reads for auth: activation, token login and the async auth views read rows
+  a client may have created moments before, in an earlier request (see
+  read_from_primary() and the views using it).
+* Fallback: a replica that refuses connections, or whose connection fails during a
+  query (watch_replica_connection()), is skipped for REPLICA_RETRY_AFTER seconds and
+  its reads go to the primary meanwhile. The query that failed still raises.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, InterfaceError, OperationalError, connections
+
+
+REPLICATED_MODELS = frozenset({
+    'account.customuser',
+    'account.institute',
+    'account.student',
+    'authtoken.token',
+})
+
+# Seconds a replica that failed to connect is left out of rotation.
+REPLICA_RETRY_AFTER = 30
+
+_pinned = ContextVar('account_primary_pinned', default=False)
+
+# {alias: monotonic time before which the replica is not tried again}, per process.
+_unavailable = {}
+
+
+def pin_to_primary():
+    """Send every following read of the current context to the primary."""
+    return _pinned.set(True)
+
+
+def unpin(token=None):
+    """End the pin started by pin_to_primary() (or any pin, without a token)."""
+    if token is None:
+        _pinned.set(False)
+    else:
+        _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def read_from_primary(view):
+    """
+    Decorator for sync and async function views: pin the request to the primary before
+    the view runs, so it never misses a row a replica has not received yet.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            pin_to_primary()
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            pin_to_primary()
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _mark_unavailable(alias):
+    _unavailable[alias] = time.monotonic() + REPLICA_RETRY_AFTER
+
+
+def replica_is_available(alias):
+    retry_at = _unavailable.get(alias)
+    if retry_at is not None:
+        if time.monotonic() < retry_at:
+            return False
+        del _unavailable[alias]
+
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _mark_unavailable(alias)
+        return False
+    return True
+
+
+def _note_replica_failure(execute, sql, params, many, context):
+    try:
+        return execute(sql, params, many, context)
+    except (OperationalError, InterfaceError):
+        # Lost connection, server gone away, ...; errors in the query itself are
+        # ProgrammingError/IntegrityError and leave the replica in rotation.
+        _mark_unavailable(context['connection'].alias)
+        raise
+
+
+def watch_replica_connection(sender, connection, **kwargs):
+    """
+    connection_created receiver (see AccountConfig.ready): take a replica out of
+    rotation when one of its queries fails on the connection, not only when connecting
+    fails (replica_is_available()).
+    """
+    if connection.alias in settings.DATABASE_REPLICAS and _note_replica_failure not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_note_replica_failure)
+
+
+def _is_replicated(model):
+    return model._meta.label_lower in REPLICATED_MODELS
+
+
+class ReplicaRouter:
+    """
+    Primary/replica router for REPLICATED_MODELS; other models are left to Django.
+    """
+    def db_for_read(self, model, **hints):
+        if not _is_replicated(model) or is_pinned():
+            return None
+
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_is_available(alias)]
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if not _is_replicated(model):
+            return None
+
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replicas hold the same rows, so objects may relate across them.
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
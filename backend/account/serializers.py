@@ -1,24 +1,59 @@
 from djoser.serializers import UserSerializer, UserCreatePasswordRetypeSerializer
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from .images import IMAGE_FIELDS, derivatives_version, variant_urls
 from .models import CustomUser, Institute, Student
 
 
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only URLs of a profile image's derivatives (see account.images), as
+    {"64": {"webp": ..., "jpg": ...}, ...}; absolute when a request is in the context.
+    Each one is the original's URL until the derivatives have been generated.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, profile):
+        image = getattr(profile, IMAGE_FIELDS[type(profile)])
+        if not image:
+            return None
+        request = self.context.get('request')
+        return variant_urls(
+            image.name, request.build_absolute_uri if request else None, version=derivatives_version(profile),
+        )
+
+
 class InstituteSerializer(serializers.ModelSerializer):
+    logo_variants = ImageVariantsField()
+
     class Meta:
         model = Institute
-        fields = ('institute_name', 'description', 'website', 'logo')
+        fields = ('institute_name', 'description', 'website', 'logo', 'logo_variants')
 
 
 class StudentSerializer(serializers.ModelSerializer):
+    avatar_variants = ImageVariantsField()
+
     class Meta:
         model = Student
-        fields = ('birth_date', 'bio', 'avatar')
+        fields = ('birth_date', 'bio', 'avatar', 'avatar_variants')
 
 
 class CustomUserSerializer(UserSerializer):
     institute = InstituteSerializer()
     student = StudentSerializer()
 
+    # Profile field serialized for each role; the other one is left out entirely. Users
+    # without one of these roles (e.g. superusers) get both, as null when missing.
+    profile_fields = {
+        CustomUser.Roles.INSTITUTE: 'institute',
+        CustomUser.Roles.STUDENT: 'student',
+    }
+
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ('institute', 'student', )
         read_only_fields = UserSerializer.Meta.read_only_fields + ('role', )
@@ -43,15 +78,26 @@ class CustomUserSerializer(UserSerializer):
 
         return instance
 
-    
     def to_representation(self, instance):
-        data = super().to_representation(instance)
-
-        if instance.role == CustomUser.Roles.INSTITUTE:
-            data.pop('student')
-
-        if instance.role == CustomUser.Roles.STUDENT:
-            data.pop('institute')
+        """
+        Override: Serialize only the profile matching the user's role, so the other
+        relation is never touched (no lazy query for it).
+        """
+        profile_field = self.profile_fields.get(instance.role)
+        skipped = set(self.profile_fields.values()) - {profile_field} if profile_field else set()
+
+        data = {}
+        for field in self._readable_fields:
+            if field.field_name in skipped:
+                continue
+
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            data[field.field_name] = None if check_for_none is None else field.to_representation(attribute)
 
         return data
 
@@ -67,4 +113,7 @@ class CustomUserCreatePasswordRetypeSerializer(UserCreatePasswordRetypeSerialize
                     'invalid_choice': 'Invalid choice. Please select either "S" for Student or "I" for Institute.'
                 }
             },
-        }
\ No newline at end of file
+        }
+
+class UserBulkActivationSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=10000)
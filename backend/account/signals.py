@@ -1,29 +1,159 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
+from .availability import AVAILABILITY_FIELDS, filter_key, index as availability_index
+from .cache import (
+    DATE_HIERARCHY, DATE_HIERARCHY_FIELDS, FACET_FIELDS, bump_user_versions, bump_version, evict_token, evict_user_token,
+    note_date_joined, update_facet_counts,
+)
+from .images import IMAGE_FIELDS, VARIANTS_READY_FIELDS, schedule_derivatives
 from .models import CustomUser, Institute, Student
 
 @receiver(post_save, sender=CustomUser)
-def create_profile(sender, instance, created, **kwargs):
+def create_profile(sender, instance, using, **kwargs):
     """
     Signal receiver to handle automatic profile creation.
 
     Behavior:
-    1. Checks if the 'skip_signal' flag is present (e.g., when saving from Admin).
-       If True, it exits early to let the Admin panel handle profile creation via inlines.
-    2. Skips execution on initial creation (created=True) since profiles are created upon activation.
-    3. Checks if the user is active. Profile creation is deferred until the account is activated.
-           Once active, it uses get_or_create to generate the specific profile (Institute or Student) based on the role.
+    1. Runs only when the save activated the account (is_active went from False to True,
+       see CustomUser.save). Creation, ordinary edits and last_login updates cost no queries.
+    2. Defers the work with transaction.on_commit, so profiles created in the same transaction
+       (e.g. by the Admin inlines) are already in place and get_or_create simply finds them.
+    3. Uses get_or_create to generate the specific profile (Institute or Student) based on the role.
     """
-    if getattr(instance, 'skip_signal', False):
+    if not getattr(instance, 'activated', False):
         return
 
+    if instance.role == CustomUser.Roles.INSTITUTE:
+        transaction.on_commit(lambda: Institute.objects.get_or_create(user=instance), using=using)
+
+    elif instance.role == CustomUser.Roles.STUDENT:
+        transaction.on_commit(lambda: Student.objects.get_or_create(user=instance), using=using)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_date_hierarchy(sender, instance, created, using, **kwargs):
+    """
+    A signup may open a new year/month/day bucket in the admin date hierarchy, and an
+    edited date_joined or list_filter value may open or empty one. Logins, activations
+    and other edits leave it cached. Runs on commit, so buckets rebuilt under the new
+    version include the row.
+    """
+    changed = getattr(instance, 'changed_values', {})
+    if not created and not DATE_HIERARCHY_FIELDS.intersection(changed):
+        return
+    if created:
+        transaction.on_commit(lambda: note_date_joined(instance), using=using)
+    else:
+        transaction.on_commit(lambda: bump_version(DATE_HIERARCHY), using=using)
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_date_hierarchy_on_delete(sender, instance, using, **kwargs):
+    # The deleted user may have been the last one in their bucket.
+    transaction.on_commit(lambda: bump_version(DATE_HIERARCHY), using=using)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_facets_on_save(sender, instance, using, **kwargs):
+    """
+    Keep the cached province/city filter counts in step once the change is committed.
+    """
+    changes = [
+        (field, instance.changed_values[field], getattr(instance, field))
+        for field in FACET_FIELDS
+        if field in getattr(instance, 'changed_values', {})
+    ]
+    if changes:
+        transaction.on_commit(
+            lambda: [update_facet_counts(field, old, new) for field, old, new in changes],
+            using=using,
+        )
+
+
+@receiver(post_delete, sender=CustomUser)
+def update_facets_on_delete(sender, instance, using, **kwargs):
+    values = [(field, getattr(instance, field)) for field in FACET_FIELDS]
+    transaction.on_commit(
+        lambda: [update_facet_counts(field, old_value=value) for field, value in values],
+        using=using,
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+def evict_cached_token_on_save(sender, instance, created, using, **kwargs):
+    """
+    request.user comes from the token cache (CachedTokenAuthentication), so drop the
+    cached copy whenever the user changes. It is evicted again after commit, so a
+    request that cached the old row in between cannot keep using it.
+    """
     if created:
         return
 
-    if instance.is_active:
-        if instance.role == CustomUser.Roles.INSTITUTE:
-            Institute.objects.get_or_create(user=instance)
+    evict_user_token(instance.pk)
+    transaction.on_commit(lambda: evict_user_token(instance.pk), using=using)
+
+
+@receiver(post_delete, sender=Token)
+def evict_cached_token_on_delete(sender, instance, **kwargs):
+    """
+    Token logout and LOGOUT_ON_PASSWORD_CHANGE both delete the user's token.
+    """
+    evict_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Institute)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Institute)
+@receiver(post_delete, sender=Student)
+def invalidate_user_representation(sender, instance, using, **kwargs):
+    """
+    Any save of a user or their profile (serializer update, admin inlines, create_profile)
+    outdates the cached /users/me/ response. The version is bumped once the change is
+    committed, so a response rebuilt in between cannot be cached under the new version.
+    """
+    user_id = instance.pk if sender is CustomUser else instance.user_id
+    transaction.on_commit(lambda: bump_user_versions([user_id]), using=using)
+
+
+@receiver(post_save, sender=CustomUser)
+def record_availability(sender, instance, **kwargs):
+    """
+    Add new usernames, emails and phone numbers to the availability filter right away
+    (not on commit): a value that is added and then rolled back only costs a false
+    positive, while one added late could be reported as free.
+    """
+    changed = getattr(instance, 'changed_values', {})
+    keys = [
+        filter_key(field, getattr(instance, field))
+        for field in AVAILABILITY_FIELDS
+        if field in changed and getattr(instance, field)
+    ]
+    if keys:
+        availability_index.record(keys)
+
+
+@receiver(pre_save, sender=Institute)
+@receiver(pre_save, sender=Student)
+def note_image_upload(sender, instance, **kwargs):
+    # A new upload is still uncommitted here; the field writes it to storage during save.
+    image = getattr(instance, IMAGE_FIELDS[sender])
+    instance._image_uploaded = bool(image) and not image._committed
+    if instance._image_uploaded:
+        # Stamped again by the derivatives job; the original is served until then.
+        setattr(instance, VARIANTS_READY_FIELDS[sender], None)
+
 
-        elif instance.role == CustomUser.Roles.STUDENT:
-            Student.objects.get_or_create(user=instance)
\ No newline at end of file
+@receiver(post_save, sender=Institute)
+@receiver(post_save, sender=Student)
+def generate_image_derivatives(sender, instance, using, **kwargs):
+    """
+    Queue the thumbnails of a newly uploaded avatar or logo (see account.images) once
+    the upload is committed. They are generated on a background pool, off the request.
+    """
+    if getattr(instance, '_image_uploaded', False):
+        name = getattr(instance, IMAGE_FIELDS[sender]).name
+        transaction.on_commit(lambda: schedule_derivatives(name), using=using)
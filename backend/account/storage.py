@@ -0,0 +1,148 @@
+"""
+Media storage that keeps one copy of each distinct file content.
+
+Uploads are written once to blobs/<ab>/<cd>/<sha256 of the content> and the name the
+model asked for (its upload_to path) is created as a hard link to that blob. The
+names, and so the URLs, stay exactly what FileSystemStorage would produce and are
+served the same way, but a thousand students uploading the same school logo, or a
+user re-uploading an unchanged photo, take the disk space of one file, and saving
+bytes that are already stored writes nothing but a directory entry.
+
+The link count of the blob's inode is its reference count: every name is one link,
+the blob itself another. Deleting a name removes its link, and the blob too once no
+other name refers to it. Files written before this storage was used are ordinary
+single-link files and are deleted as before.
+
+Hard links need the blobs and the names on one filesystem; where linking fails the
+file is stored as a plain copy instead, and the blob written for it is removed again
+unless another name shares it. Blobs left without names and temporary files left by a
+crash (blobs/tmp) are removed by the collect_orphaned_media command.
+"""
+import errno
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+BLOB_DIR = 'blobs'
+
+
+@deconstructible(path='account.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    CHUNK_SIZE = 64 * 2**10
+
+    def blob_name(self, digest):
+        return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def _makedirs(self, directory):
+        if self.directory_permissions_mode is None:
+            os.makedirs(directory, exist_ok=True)
+            return
+        # os.makedirs() does not apply the mode to intermediate directories.
+        old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+        try:
+            os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+        finally:
+            os.umask(old_umask)
+
+    def _store_blob(self, content):
+        """Write `content` to its blob unless that blob exists; returns the blob path."""
+        temp_dir = self.path(f"{BLOB_DIR}/tmp")
+        self._makedirs(temp_dir)
+        # Created like FileSystemStorage creates files (mode 0o666 less the umask), as
+        # every name linked to the blob shares its permissions.
+        temp_path = os.path.join(temp_dir, uuid.uuid4().hex)
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            blob_path = self.path(self.blob_name(digest.hexdigest()))
+            if os.path.exists(blob_path):
+                os.remove(temp_path)
+            else:
+                self._makedirs(os.path.dirname(blob_path))
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return blob_path
+
+    def _save(self, name, content):
+        blob_path = self._store_blob(content)
+        full_path = self.path(name)
+        self._makedirs(os.path.dirname(full_path))
+
+        while True:
+            try:
+                os.link(blob_path, full_path)
+            except FileExistsError:
+                # Same race as in FileSystemStorage._save: pick another name.
+                name = self.get_available_name(name)
+                full_path = self.path(name)
+            except FileNotFoundError:
+                # The last other name of this content was deleted meanwhile, and its blob
+                # with it; store it again.
+                blob_path = self._store_blob(content)
+            except OSError as error:
+                if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+                self._remove_unlinked_blob(blob_path)
+                return super()._save(name, content)
+            else:
+                break
+
+        name = os.path.relpath(full_path, self.location)
+        return str(name).replace("\\", "/")
+
+    def _remove_unlinked_blob(self, blob_path):
+        # A concurrent save linking to it meanwhile gets FileNotFoundError and stores it again.
+        try:
+            if os.stat(blob_path).st_nlink == 1:
+                os.remove(blob_path)
+        except FileNotFoundError:
+            pass
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if os.path.isdir(path) or stat.st_nlink != 2:
+            # A directory, a plain file, or content that other names still refer to.
+            return super().delete(name)
+
+        # The blob is the only other link; find it by content and drop it as well.
+        blob_path = self.path(self.blob_name(self.content_digest(name)))
+        super().delete(name)
+        try:
+            blob = os.stat(blob_path)
+        except FileNotFoundError:
+            return
+        if blob.st_ino == stat.st_ino and blob.st_nlink == 1:
+            os.remove(blob_path)
+
+    def content_digest(self, name):
+        digest = hashlib.sha256()
+        with open(self.path(name), 'rb') as stored:
+            for chunk in iter(lambda: stored.read(self.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def reference_count(self, name):
+        """How many names share the content of `name` (1 for a file stored as a plain copy)."""
+        return max(1, os.stat(self.path(name)).st_nlink - 1)
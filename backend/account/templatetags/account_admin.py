@@ -0,0 +1,65 @@
+import copy
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.core.cache import cache
+
+from account.cache import DATE_HIERARCHY, make_key
+
+
+register = template.Library()
+
+# Safety net for what does not invalidate: a signup that opens a bucket only in a
+# changelist narrowed by search, bulk updates, and raw SQL. Signups, deletes and edits
+# of date_joined or a list_filter value invalidate on commit (see account.signals), so
+# those changes can leave a changelist stale for at most this long.
+DATE_HIERARCHY_TIMEOUT = 60 * 10
+
+
+class CachedDateBuckets:
+    """
+    Stands in for the changelist queryset inside Django's date_hierarchy() and serves
+    the Min/Max range and the year/month/day buckets from the cache.
+    """
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.sql = str(queryset.query)
+
+    def _cached(self, name, compute):
+        key = make_key(DATE_HIERARCHY, self.queryset.model._meta.label, self.sql, name)
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, DATE_HIERARCHY_TIMEOUT)
+        return value
+
+    def aggregate(self, **kwargs):
+        return self._cached(f"aggregate:{sorted(kwargs)}", lambda: self.queryset.aggregate(**kwargs))
+
+    def dates(self, field_name, kind, *args, **kwargs):
+        return self._cached(f"dates:{field_name}:{kind}", lambda: list(self.queryset.dates(field_name, kind, *args, **kwargs)))
+
+    def datetimes(self, field_name, kind, *args, **kwargs):
+        return self._cached(f"datetimes:{field_name}:{kind}", lambda: list(self.queryset.datetimes(field_name, kind, *args, **kwargs)))
+
+
+def cached_date_hierarchy(cl):
+    """
+    Same output as the admin's date_hierarchy tag, with the distinct-date
+    aggregations cached per filter combination.
+    """
+    cached_cl = copy.copy(cl)
+    cached_cl.queryset = CachedDateBuckets(cl.queryset)
+    return date_hierarchy(cached_cl)
+
+
+@register.tag(name="cached_date_hierarchy")
+def cached_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=cached_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
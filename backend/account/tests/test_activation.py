@@ -0,0 +1,117 @@
+from django.contrib.admin import helpers
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from account.models import CustomUser, Institute, Student
+
+
+def create_users(count, start=0):
+    users = []
+    for i in range(start, start + count):
+        users.append(CustomUser.objects.create_user(
+            username=f"{i:010d}",
+            email=f"user{i}@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number=f"09{i:09d}",
+            role="S" if i % 2 else "I",
+        ))
+    return users
+
+
+class BulkActivationQuerySetTests(TestCase):
+    def test_activate_creates_profiles(self):
+        create_users(6)
+
+        activated = CustomUser.objects.all().activate()
+
+        self.assertEqual(activated, 6)
+        self.assertEqual(CustomUser.objects.filter(is_active=True).count(), 6)
+        self.assertEqual(Student.objects.count(), 3)
+        self.assertEqual(Institute.objects.count(), 3)
+
+    def test_activate_query_count_is_constant(self):
+        create_users(50)
+
+        # SELECT pending, UPDATE, one INSERT per role (plus the savepoint pair).
+        with self.assertNumQueries(6):
+            CustomUser.objects.all().activate()
+
+    def test_activate_skips_active_users_and_existing_profiles(self):
+        users = create_users(4)
+        with self.captureOnCommitCallbacks(execute=True):
+            users[1].is_active = True
+            users[1].save()
+
+        activated = CustomUser.objects.all().activate()
+
+        self.assertEqual(activated, 3)
+        self.assertEqual(Student.objects.filter(user=users[1]).count(), 1)
+        self.assertEqual(CustomUser.objects.all().activate(), 0)
+
+
+class BulkActivationAdminActionTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            username="1234567891",
+            email="bb@cc.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_active=True,
+        )
+        self.client.force_login(self.admin)
+
+    def test_activate_users_action(self):
+        users = create_users(3)
+
+        response = self.client.post(reverse("admin:account_customuser_changelist"), {
+            "action": "activate_users",
+            helpers.ACTION_CHECKBOX_NAME: [user.pk for user in users[:2]],
+        }, follow=True)
+
+        self.assertContains(response, "2 user(s) activated.")
+        self.assertEqual(CustomUser.objects.filter(is_active=True, role__in=["S", "I"]).count(), 2)
+
+
+class BulkActivationAPITests(APITestCase):
+    url = reverse("customuser-bulk-activation")
+
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(
+            username="1234567891",
+            email="staff@bb.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_staff=True,
+            is_active=True,
+        )
+
+    def test_staff_can_bulk_activate(self):
+        users = create_users(4)
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(self.url, {"ids": [user.pk for user in users]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"activated": 4})
+        self.assertEqual(Student.objects.count() + Institute.objects.count(), 4)
+
+    def test_non_staff_is_forbidden(self):
+        users = create_users(1)
+        self.staff.is_staff = False
+        self.staff.save()
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(self.url, {"ids": [users[0].pk]}, format="json")
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(CustomUser.objects.get(pk=users[0].pk).is_active)
+
+    def test_empty_ids_rejected(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(self.url, {"ids": []}, format="json")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,195 @@
+from datetime import datetime
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from account.admin import CustomUserAdmin
+from account.cache import DATE_HIERARCHY, get_version
+from account.models import CustomUser
+from account.pagination import EstimatedCountPaginator
+
+
+def create_users(count, start=0, **fields):
+    CustomUser.objects.bulk_create([
+        CustomUser(
+            username=f"{i:010d}",
+            email=f"user{i}@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number=f"09{i:09d}",
+            role="S",
+            date_joined=datetime(2023 + i % 2, 1 + i % 12, 1),
+            **fields,
+        )
+        for i in range(start, start + count)
+    ])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        create_users(30)
+
+    def test_small_table_is_counted_exactly(self):
+        paginator = EstimatedCountPaginator(CustomUser.objects.order_by("id"), 20, threshold=100)
+
+        self.assertEqual(paginator.count, 30)
+        self.assertFalse(paginator.is_estimate)
+
+    def test_large_table_uses_table_statistics(self):
+        with mock.patch("account.pagination.table_row_estimate", return_value=5000) as estimate:
+            paginator = EstimatedCountPaginator(CustomUser.objects.order_by("id"), 20, threshold=10)
+
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 5000)
+
+        self.assertTrue(paginator.is_estimate)
+        estimate.assert_called_once()
+
+    def test_sqlite_statistics_after_analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        paginator = EstimatedCountPaginator(CustomUser.objects.order_by("id"), 20, threshold=10)
+
+        self.assertEqual(paginator.count, 30)
+        self.assertTrue(paginator.is_estimate)
+
+    def test_filtered_count_is_bounded(self):
+        queryset = CustomUser.objects.filter(role="S").order_by("id")
+        paginator = EstimatedCountPaginator(queryset, 20, threshold=10)
+
+        with mock.patch("account.pagination.table_row_estimate", return_value=None):
+            self.assertEqual(paginator.count, 11)
+        self.assertTrue(paginator.is_estimate)
+
+        self.assertEqual(EstimatedCountPaginator(queryset, 20, threshold=100).count, 30)
+
+    def test_exact_count(self):
+        with mock.patch("account.pagination.table_row_estimate", return_value=5000):
+            paginator = EstimatedCountPaginator(CustomUser.objects.order_by("id"), 20, threshold=10, exact=True)
+            self.assertEqual(paginator.count, 30)
+
+        self.assertFalse(paginator.is_estimate)
+
+
+class CustomUserChangelistTests(TestCase):
+    url = reverse("admin:account_customuser_changelist")
+
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_superuser(
+            username="1234567891",
+            email="bb@cc.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_active=True,
+            date_joined=datetime(2023, 5, 5),
+        )
+        self.client.force_login(self.admin)
+        create_users(10)
+
+    def test_changelist_skips_full_count(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context["cl"].result_count, 11)
+        self.assertIsNone(response.context["cl"].full_result_count)
+
+    def test_estimated_count_offers_exact_count_link(self):
+        with mock.patch.object(CustomUserAdmin, "estimated_count_threshold", 5), \
+                mock.patch("account.pagination.table_row_estimate", return_value=5000):
+            response = self.client.get(self.url)
+            self.assertContains(response, "Compute exact count")
+            self.assertEqual(response.context["cl"].result_count, 5000)
+
+            response = self.client.get(self.url, {"_exact_count": "1"})
+            self.assertEqual(response.context["cl"].result_count, 11)
+            self.assertNotContains(response, "Compute exact count")
+
+    def test_date_hierarchy_buckets_are_cached(self):
+        first = self.client.get(self.url)
+
+        with mock.patch("django.db.models.QuerySet.datetimes") as datetimes, \
+                mock.patch("django.db.models.QuerySet.aggregate") as aggregate:
+            second = self.client.get(self.url)
+
+        datetimes.assert_not_called()
+        aggregate.assert_not_called()
+        self.assertEqual(
+            [choice["title"] for choice in first.context["choices"]],
+            [choice["title"] for choice in second.context["choices"]],
+        )
+
+    def create_user(self, number, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CustomUser.objects.create_user(
+                username=f"09328338{number:02d}",
+                email=f"new{number}@bb.com",
+                first_name="تست",
+                last_name="کاربر",
+                phone_number=f"093955512{number:02d}",
+                role="S",
+                **fields,
+            )
+
+    def test_date_hierarchy_invalidated_on_insert(self):
+        response = self.client.get(self.url)
+        self.assertEqual([choice["title"] for choice in response.context["choices"]], ["2023", "2024"])
+
+        self.create_user(10, date_joined=datetime(2025, 2, 2))
+
+        response = self.client.get(self.url)
+        self.assertEqual([choice["title"] for choice in response.context["choices"]], ["2023", "2024", "2025"])
+
+    def test_date_hierarchy_kept_by_saves_that_open_no_bucket(self):
+        self.client.get(self.url)
+        version = get_version(DATE_HIERARCHY)
+
+        first = self.create_user(10, date_joined=datetime(2025, 2, 2, 9))
+        self.assertNotEqual(get_version(DATE_HIERARCHY), version)
+        version = get_version(DATE_HIERARCHY)
+
+        self.create_user(11, date_joined=datetime(2025, 2, 2, 17))
+        first.first_name = "دیگر"
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertEqual(get_version(DATE_HIERARCHY), version)
+
+        first.date_joined = datetime(2022, 1, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertNotEqual(get_version(DATE_HIERARCHY), version)
+
+    def test_date_hierarchy_invalidated_for_filtered_views(self):
+        self.create_user(10, date_joined=datetime(2025, 2, 2, 9), province="Tehran")
+        self.client.get(self.url, {"province": "Fars"})
+        self.assertEqual(self.client.get(self.url, {"province": "Fars"}).context["choices"], [])
+
+        # Same day, but the first user in this province.
+        user = self.create_user(11, date_joined=datetime(2025, 2, 2, 17), province="Fars")
+
+        response = self.client.get(self.url, {"province": "Fars"})
+        self.assertEqual([choice["title"] for choice in response.context["choices"]], ["February 2"])
+
+        version = get_version(DATE_HIERARCHY)
+        user.province = "Tehran"
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertNotEqual(get_version(DATE_HIERARCHY), version)
+
+    def test_date_hierarchy_invalidated_on_delete(self):
+        user = self.create_user(10, date_joined=datetime(2025, 2, 2))
+        response = self.client.get(self.url)
+        self.assertEqual([choice["title"] for choice in response.context["choices"]], ["2023", "2024", "2025"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual([choice["title"] for choice in response.context["choices"]], ["2023", "2024"])
+
+        # The day was seen before the delete; the new signup opens the bucket again.
+        self.create_user(11, date_joined=datetime(2025, 2, 2))
+        response = self.client.get(self.url)
+        self.assertEqual([choice["title"] for choice in response.context["choices"]], ["2023", "2024", "2025"])
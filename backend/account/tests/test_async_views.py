@@ -0,0 +1,144 @@
+from django.contrib.auth.tokens import default_token_generator
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from djoser.utils import encode_uid
+from rest_framework.authtoken.models import Token
+from account.cache import local_tokens
+from account.models import CustomUser, Student
+
+
+class AsyncViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            password="Sodoor-1234",
+        )
+
+
+class AsyncTokenLoginTests(AsyncViewTestCase):
+    url = reverse("async-login")
+
+    async def test_login(self):
+        await CustomUser.objects.filter(pk=self.user.pk).aupdate(is_active=True)
+
+        response = await self.async_client.post(
+            self.url, {"username": "0932833810", "password": "Sodoor-1234"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        token = await Token.objects.aget(user_id=self.user.pk)
+        self.assertEqual(response.json(), {"auth_token": token.key})
+        user = await CustomUser.objects.aget(pk=self.user.pk)
+        self.assertIsNotNone(user.last_login)
+
+    async def test_invalid_credentials(self):
+        await CustomUser.objects.filter(pk=self.user.pk).aupdate(is_active=True)
+        for username, password in (("0932833810", "wrong"), ("7966299813", "Sodoor-1234")):
+            response = await self.async_client.post(self.url, {"username": username, "password": password})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("non_field_errors", response.json())
+
+    async def test_inactive_user_cannot_log_in(self):
+        response = await self.async_client.post(self.url, {"username": "0932833810", "password": "Sodoor-1234"})
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_login_is_throttled(self):
+        rates = {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "login_identifier": "1/min"}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}):
+            await self.async_client.post(self.url, {"username": "0932833810", "password": "x"})
+            response = await self.async_client.post(self.url, {"username": "0932833810", "password": "x"})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response.headers)
+
+
+class AsyncCurrentUserTests(AsyncViewTestCase):
+    url = reverse("async-me")
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = True
+            self.user.save()
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+
+    async def test_get_matches_the_sync_view(self):
+        response = await self.async_client.get(self.url, headers=self.headers)
+        expected = await self.async_client.get(reverse("customuser-me"), headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+        self.assertIn("student", response.json())
+
+    def test_warm_get_costs_no_queries(self):
+        self.client.get(self.url, headers=self.headers)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers=self.headers)
+
+        self.assertEqual(response.json()["username"], "0932833810")
+
+    async def test_patch(self):
+        response = await self.async_client.patch(
+            self.url, {"last_name": "اسدی", "student": {"bio": "سلام"}}, content_type="application/json", headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["last_name"], "اسدی")
+        student = await Student.objects.aget(user_id=self.user.pk)
+        self.assertEqual(student.bio, "سلام")
+
+    async def test_patch_validation_errors(self):
+        response = await self.async_client.patch(
+            self.url, {"email": "not-an-email"}, content_type="application/json", headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json())
+
+    async def test_requires_a_valid_token(self):
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 401)
+        response = await self.async_client.get(self.url, headers={"Authorization": "Token unknown"})
+        self.assertEqual(response.status_code, 401)
+
+
+class AsyncActivationTests(AsyncViewTestCase):
+    url = reverse("async-activation")
+
+    def setUp(self):
+        super().setUp()
+        self.data = {"uid": encode_uid(self.user.pk), "token": default_token_generator.make_token(self.user)}
+
+    def test_activation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.data)
+
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertTrue(Student.objects.filter(user=self.user).exists())
+
+        # Activating again is refused, as by djoser.
+        self.assertEqual(self.client.post(self.url, self.data).status_code, 403)
+
+    async def test_invalid_token_and_uid(self):
+        response = await self.async_client.post(self.url, {**self.data, "token": "bad"})
+        self.assertEqual(response.json(), {"token": ["Invalid token for given user."]})
+
+        response = await self.async_client.post(self.url, {**self.data, "uid": "bad"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("uid", response.json())
+
+        response = await self.async_client.post(self.url, {})
+        self.assertEqual(set(response.json()), {"uid", "token"})
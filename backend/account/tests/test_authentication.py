@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from account.authentication import CachedTokenAuthentication
+from account.cache import cache_token, get_cached_token, local_tokens
+from account.models import CustomUser
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            is_active=True,
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate(self.request)
+
+    def test_warm_token_costs_no_queries(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_shared_cache_serves_other_processes(self):
+        self.authenticate()
+        local_tokens.clear()
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user.username, "0932833810")
+
+    def test_each_request_gets_its_own_user_instance(self):
+        first, _ = self.authenticate()
+        second, _ = self.authenticate()
+
+        self.assertIsNot(first, second)
+
+    def test_user_changes_are_picked_up(self):
+        self.authenticate()
+        self.user.last_name = "اسدی"
+        self.user.save()
+
+        user, _ = self.authenticate()
+
+        self.assertEqual(user.last_name, "اسدی")
+
+    def test_token_cached_before_commit_is_evicted_after(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.last_name = "اسدی"
+            self.user.save()
+            # A request in between caches the row it read.
+            cache_token(Token.objects.select_related("user").get(key=self.token.key))
+
+        self.assertIsNone(get_cached_token(self.token.key))
+
+    def test_deactivation_evicts(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_token_logout_evicts(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assertEqual(self.client.get(reverse("customuser-me")).status_code, 200)
+
+        response = self.client.post(reverse("logout"))
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.client.get(reverse("customuser-me")).status_code, 401)
+
+    def test_unknown_token(self):
+        self.request = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Token unknown")
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
@@ -0,0 +1,173 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from account import routers
+from account.availability import AvailabilityIndex, BloomFilter, _log_key, filter_key, index, warm_up
+from account.models import CustomUser
+
+
+def create_user(username, email, phone_number):
+    return CustomUser.objects.create_user(
+        username=username,
+        email=email,
+        first_name="تست",
+        last_name="کاربر",
+        phone_number=phone_number,
+        role="S",
+    )
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(5_000, error_rate=0.01)
+        bloom.add_many(f"username:{i}" for i in range(5_000))
+
+        self.assertTrue(all(f"username:{i}" in bloom for i in range(5_000)))
+        false_positives = sum(f"username:{i}" in bloom for i in range(5_000, 15_000))
+        self.assertLess(false_positives, 300)
+
+    def test_email_keys_ignore_case(self):
+        self.assertEqual(filter_key("email", "A@BB.com"), filter_key("email", "a@bb.com"))
+
+
+class AvailabilityEndpointTests(APITestCase):
+    url = reverse("customuser-availability")
+
+    def setUp(self):
+        cache.clear()
+        index._filter = None
+        create_user("0932833810", "Taken@bb.com", "09395551212")
+
+    def test_free_values_cost_no_queries(self):
+        self.client.get(self.url, {"username": "7966299813"})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.url, {"username": "7966299813", "email": "free@bb.com", "phone_number": "09120000000"}
+            )
+
+        self.assertEqual(response.data, {"username": True, "email": True, "phone_number": True})
+
+    def test_taken_values_are_confirmed(self):
+        response = self.client.get(
+            self.url, {"username": "0932833810", "email": "taken@BB.com", "phone_number": "09395551212"}
+        )
+
+        self.assertEqual(response.data, {"username": False, "email": False, "phone_number": False})
+
+    def test_new_users_are_added(self):
+        self.client.get(self.url, {"username": "7966299813"})
+        create_user("7966299813", "new@bb.com", "09120000000")
+
+        self.assertEqual(self.client.get(self.url, {"username": "7966299813"}).data, {"username": False})
+
+    def test_changed_values_are_added(self):
+        self.client.get(self.url, {"email": "changed@bb.com"})
+        user = CustomUser.objects.get(username="0932833810")
+        user.email = "changed@bb.com"
+        user.save()
+
+        self.assertEqual(self.client.get(self.url, {"email": "changed@bb.com"}).data, {"email": False})
+
+    def test_change_log_is_read_once_per_request(self):
+        with mock.patch.object(index, "sync", wraps=index.sync) as sync:
+            self.client.get(self.url, {"username": "7966299813", "email": "free@bb.com", "phone_number": "09120000000"})
+
+        sync.assert_called_once()
+
+    def test_requires_a_value(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+class AvailabilityIndexSyncTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        index._filter = None
+        # A different worker process, with a filter of its own.
+        self.other = AvailabilityIndex()
+        self.other.rebuild()
+        index.sync()
+
+    def test_other_processes_apply_the_change_log(self):
+        create_user("7966299813", "new@bb.com", "09120000000")
+
+        with mock.patch.object(self.other, "rebuild") as rebuild:
+            self.assertTrue(self.other.might_exist("username", "7966299813"))
+        rebuild.assert_not_called()
+
+    def test_entry_is_written_before_the_sequence_moves(self):
+        written = []
+        real_incr = cache.incr
+
+        def incr(key, *args, **kwargs):
+            if key == "account:availability:seq":
+                written.append(cache.get(_log_key(index._generation, 1)))
+            return real_incr(key, *args, **kwargs)
+
+        with mock.patch.object(cache, "incr", side_effect=incr):
+            create_user("7966299813", "new@bb.com", "09120000000")
+
+        self.assertEqual(len(written), 1)
+        self.assertIn(filter_key("username", "7966299813"), written[0])
+
+    def test_entry_of_an_unpublished_sequence_is_applied(self):
+        # Its writer died between writing the entry and advancing the sequence.
+        with mock.patch.object(cache, "incr", side_effect=ValueError):
+            create_user("7966299813", "new@bb.com", "09120000000")
+
+        with mock.patch.object(self.other, "rebuild") as rebuild:
+            self.assertTrue(self.other.might_exist("username", "7966299813"))
+        rebuild.assert_not_called()
+
+    def test_lost_log_entries_force_a_rebuild(self):
+        create_user("7966299813", "new@bb.com", "09120000000")
+        create_user("5116168395", "other@bb.com", "09120000001")
+        cache.delete(_log_key(index._generation, 1))
+
+        with mock.patch.object(self.other, "rebuild") as rebuild:
+            self.other.sync()
+        rebuild.assert_called_once()
+
+    def test_lost_sequence_still_logs_the_keys(self):
+        cache.delete("account:availability:seq")
+        # Recorded before the commit: the rebuilds it causes do not find the row.
+        index.record([filter_key("username", "7966299813")])
+
+        self.assertTrue(self.other.might_exist("username", "7966299813"))
+        self.assertTrue(index.might_exist("username", "7966299813"))
+
+    def test_rebuild_sizes_the_filter_from_the_table(self):
+        create_user("7966299813", "new@bb.com", "09120000000")
+        self.other.rebuild()
+
+        self.assertEqual(self.other._filter.count, 6)  # the row, and its log entry replayed
+        self.assertTrue(self.other.might_exist("email", "NEW@bb.com"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class AvailabilityRebuildTests(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        create_user("0932833810", "taken@bb.com", "09395551212")
+        cache.clear()  # only the table can tell
+        routers.unpin()
+        self.addCleanup(routers.unpin)
+
+    def test_rebuild_reads_the_primary(self):
+        other = AvailabilityIndex()
+        other.rebuild()
+
+        self.assertIn(filter_key("username", "0932833810"), other._filter)
+
+    def test_warm_up_builds_the_filter_and_unpins(self):
+        with mock.patch.object(index, "_filter", None):
+            warm_up()
+            self.assertIn(filter_key("email", "taken@bb.com"), index._filter)
+        self.assertFalse(routers.is_pinned())
+
+        with mock.patch.object(index, "rebuild", side_effect=OperationalError), self.assertLogs("account.availability"):
+            warm_up()
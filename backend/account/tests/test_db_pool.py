@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from account.models import CustomUser
+from sodooronline.db import pool as db_pool
+from sodooronline.db.pool import ConnectionPool, PooledDatabaseWrapperMixin, PoolTimeout
+
+
+class PooledSQLiteWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    pass
+
+
+class DatabaseFileMixin:
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE item (name TEXT)")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def make_pool(self, **options):
+        pool = ConnectionPool(lambda: sqlite3.connect(self.path, check_same_thread=False), **options)
+        self.addCleanup(pool.close)
+        return pool
+
+
+class ConnectionPoolTests(DatabaseFileMixin, SimpleTestCase):
+    def test_released_connections_are_reused(self):
+        pool = self.make_pool()
+        first, fresh = pool.acquire()
+        self.assertTrue(fresh)
+        pool.release(first)
+
+        second, fresh = pool.acquire()
+
+        self.assertIs(second, first)
+        self.assertFalse(fresh)
+        self.assertEqual(pool.stats()["opened"], 1)
+        self.assertEqual(pool.stats()["checkouts"], 2)
+
+    def test_min_size_is_opened_up_front(self):
+        pool = self.make_pool(min_size=2, max_size=4)
+        pool.warm()
+
+        self.assertEqual(pool.stats()["idle"], 2)
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+    def test_checkout_waits_for_a_release(self):
+        pool = self.make_pool(max_size=1)
+        conn, _ = pool.acquire()
+        threading.Timer(0.05, pool.release, [conn]).start()
+
+        self.assertIs(pool.acquire()[0], conn)
+        stats = pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_time_max"], 0.01)
+        self.assertEqual(stats["utilization"], 1.0)
+
+    def test_checkout_times_out(self):
+        pool = self.make_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_unhealthy_connection_is_replaced(self):
+        pool = self.make_pool(check=lambda conn: conn.execute("SELECT 1"))
+        conn, _ = pool.acquire()
+        pool.release(conn)
+        conn.close()
+
+        replacement, fresh = pool.acquire()
+
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(fresh)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_connections_past_max_lifetime_are_closed(self):
+        pool = self.make_pool(max_lifetime=0)
+        conn, _ = pool.acquire()
+        pool.release(conn)
+
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertIsNot(pool.acquire()[0], conn)
+
+    def test_release_ends_open_transaction(self):
+        pool = self.make_pool()
+        conn, _ = pool.acquire()
+        conn.execute("INSERT INTO item VALUES ('left open')")
+        pool.release(conn)
+
+        conn, _ = pool.acquire()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM item").fetchone(), (0,))
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(lambda: sqlite3.connect("/nonexistent/dir/db.sqlite3"), max_size=1)
+
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.acquire()
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+
+class PooledDatabaseWrapperTests(DatabaseFileMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        settings_dict = {**connections["default"].settings_dict, "NAME": self.path, "POOL": {"MAX_SIZE": 2}}
+        self.wrapper = PooledSQLiteWrapper(settings_dict, alias="pooled")
+        self.addCleanup(lambda: db_pool._pools.pop(("pooled", self.path)).close())
+
+    def test_close_returns_the_connection_to_the_pool(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("INSERT INTO item VALUES ('a')")
+        raw = self.wrapper.connection
+        self.wrapper.close()
+
+        self.assertIsNone(self.wrapper.connection)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM item")
+            self.assertEqual(cursor.fetchone(), (1,))
+        self.assertIs(self.wrapper.connection, raw)
+        self.assertEqual(db_pool.pool_stats()["pooled"]["opened"], 1)
+        self.wrapper.close()
+
+    def test_close_in_atomic_block_discards_the_connection(self):
+        self.wrapper.ensure_connection()
+        self.wrapper.set_autocommit(False)
+        self.wrapper.in_atomic_block = True
+        self.wrapper.close()
+
+        stats = db_pool.pool_stats()["pooled"]
+        self.assertEqual((stats["size"], stats["discarded"]), (0, 1))
+
+
+class PoolStatsEndpointTests(APITestCase):
+    def test_staff_only(self):
+        staff = CustomUser.objects.create_superuser(
+            username="1234567891",
+            email="staff@bb.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_active=True,
+        )
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.get(reverse("db-pool-stats")).status_code, 200)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse("db-pool-stats")).status_code, 401)
@@ -0,0 +1,155 @@
+import io
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from account.cache import get_facet_counts, update_facet_counts
+from account.models import CustomUser
+
+
+def create_user(i, province, city, **fields):
+    return CustomUser.objects.create_user(
+        username=f"{i:010d}",
+        email=f"user{i}@bb.com",
+        first_name="تست",
+        last_name="کاربر",
+        phone_number=f"09{i:09d}",
+        role="S",
+        province=province,
+        city=city,
+        **fields,
+    )
+
+
+class FacetCountsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(1, "تهران", "تهران")
+        create_user(2, "تهران", "ری")
+        create_user(3, "فارس", "شیراز")
+
+    def test_counts_are_built_on_first_read(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_facet_counts("province"), {"تهران": 2, "فارس": 1})
+
+        with self.assertNumQueries(0):
+            get_facet_counts("province")
+
+    def test_counts_follow_changes(self):
+        get_facet_counts("province")
+        get_facet_counts("city")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.province = "فارس"
+            self.user.city = "شیراز"
+            self.user.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facet_counts("province"), {"تهران": 1, "فارس": 2})
+            self.assertEqual(get_facet_counts("city"), {"ری": 1, "شیراز": 2})
+
+    def test_counts_follow_inserts_and_deletes(self):
+        get_facet_counts("province")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_user(4, "گیلان", "رشت")
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(username__in=["0000000002", "0000000003"]).delete()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_facet_counts("province"), {"تهران": 1, "گیلان": 1})
+
+    def test_known_values_are_counted_without_queries(self):
+        get_facet_counts("province")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_user(4, "فارس", "شیراز")
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(username__in=["0000000002", "0000000003"]).delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facet_counts("province"), {"تهران": 1, "فارس": 1})
+
+    def test_value_counted_down_to_zero_comes_back(self):
+        get_facet_counts("province")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(username="0000000003").delete()
+        self.assertEqual(get_facet_counts("province"), {"تهران": 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_user(4, "فارس", "شیراز")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facet_counts("province"), {"تهران": 2, "فارس": 1})
+
+    def test_concurrent_updates_are_not_lost(self):
+        get_facet_counts("province")
+        get = cache.get
+
+        def interleaved_get(key, *args, **kwargs):
+            # Another save lands between this update's read and its write.
+            value = get(key, *args, **kwargs)
+            if key == "account:facets:province" and not interleaved_get.done:
+                interleaved_get.done = True
+                update_facet_counts("province", new_value="فارس")
+            return value
+        interleaved_get.done = False
+
+        with mock.patch.object(cache, "get", interleaved_get):
+            update_facet_counts("province", old_value="تهران", new_value="فارس")
+
+        self.assertEqual(get_facet_counts("province"), {"تهران": 1, "فارس": 3})
+
+    def test_unrelated_save_leaves_counts_alone(self):
+        counts = get_facet_counts("province")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.last_name = "اسدی"
+            self.user.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facet_counts("province"), counts)
+
+    def test_rebuild_command(self):
+        get_facet_counts("province")
+        CustomUser.objects.filter(pk=self.user.pk).update(province="البرز")
+
+        call_command("rebuild_user_facets", stdout=io.StringIO())
+
+        self.assertEqual(get_facet_counts("province"), {"البرز": 1, "تهران": 1, "فارس": 1})
+
+
+class CachedFacetFilterTests(TestCase):
+    url = reverse("admin:account_customuser_changelist")
+
+    def setUp(self):
+        cache.clear()
+        admin_user = CustomUser.objects.create_superuser(
+            username="1234567891",
+            email="bb@cc.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_active=True,
+        )
+        self.client.force_login(admin_user)
+        create_user(1, "تهران", "تهران")
+        create_user(2, "تهران", "ری")
+
+    def test_sidebar_shows_cached_values_with_counts(self):
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertContains(response, "تهران (2)")
+        self.assertContains(response, "ری (1)")
+        self.assertFalse([query for query in queries if "DISTINCT" in query["sql"]])
+
+    def test_filtering_by_cached_value(self):
+        response = self.client.get(self.url, {"city": "ری"})
+
+        self.assertEqual([user.username for user in response.context["cl"].result_list], ["0000000002"])
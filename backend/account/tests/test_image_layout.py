@@ -0,0 +1,83 @@
+import io
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from account.images import variant_name
+from account.models import CustomUser, Student
+from account.tests.test_images import MediaRootMixin
+from account.utils import get_image_file_path, image_directory
+
+
+class ImageDirectoryTests(SimpleTestCase):
+    def test_fanned_out_by_username_hash(self):
+        directory = image_directory("S", "0932833810")
+
+        top, first, second, username = directory.split("/")
+        self.assertEqual((top, username), ("students", "0932833810"))
+        self.assertRegex(first + second, r"^[0-9a-f]{4}$")
+        self.assertEqual(image_directory("S", "0932833810"), directory)
+        self.assertNotEqual(image_directory("S", "0932833811"), directory)
+        self.assertTrue(image_directory("I", "10103765178").startswith("institutes/"))
+
+    def test_upload_path_has_no_empty_segment(self):
+        profile = mock.Mock(user=mock.Mock(role="S", username="0932833810"))
+
+        self.assertEqual(get_image_file_path(profile, "a.png"), f"{image_directory('S', '0932833810')}/a.png")
+        self.assertNotIn("//", get_image_file_path(profile, "a.png"))
+
+
+class MigrateImageLayoutTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            is_active=True,
+        )
+        self.old = default_storage.save("students/0932833810/photo.png", io.BytesIO(b"photo"))
+        self.old_variant = default_storage.save(variant_name(self.old, 64, "webp"), io.BytesIO(b"photo 64"))
+        self.student = Student.objects.create(user=self.user, avatar=self.old)
+        self.new = f"{image_directory('S', '0932833810')}/photo.png"
+
+    def migrate(self, *args):
+        stdout = io.StringIO()
+        call_command("migrate_image_layout", *args, stdout=stdout, stderr=io.StringIO())
+        return stdout.getvalue()
+
+    def test_moves_image_and_derivatives_keeping_the_old_names(self):
+        output = self.migrate()
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.avatar.name, self.new)
+        self.assertEqual(default_storage.open(self.new).read(), b"photo")
+        self.assertEqual(default_storage.open(variant_name(self.new, 64, "webp")).read(), b"photo 64")
+        self.assertTrue(default_storage.exists(self.old))
+        self.assertEqual(default_storage.reference_count(self.new), 2)  # one copy, two names
+        self.assertIn("1 moved", output)
+
+        self.assertIn("0 moved, 1 already in place", self.migrate())
+
+    def test_dry_run_changes_nothing(self):
+        output = self.migrate("--dry-run")
+
+        self.assertIn(f"{self.old} -> {self.new}", output)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.avatar.name, self.old)
+        self.assertFalse(default_storage.exists(self.new))
+
+    def test_image_replaced_meanwhile_is_kept(self):
+        def replace_avatar(name, new_name):
+            Student.objects.filter(pk=self.student.pk).update(avatar="students/0932833810/newer.png")
+            return new_name
+
+        with mock.patch("account.management.commands.migrate_image_layout.link_image", side_effect=replace_avatar):
+            output = self.migrate()
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.avatar.name, "students/0932833810/newer.png")
+        self.assertIn("0 moved, 0 already in place, 0 missing, 1 changed meanwhile", output)
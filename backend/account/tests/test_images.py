@@ -0,0 +1,201 @@
+import io
+import shutil
+import tempfile
+import time
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.test import TestCase, override_settings
+from PIL import Image, ImageOps
+from account.images import VARIANT_SIZES, _default_variants_version, _generate_logged, generate_derivatives, render_variants, variant_name, variant_names
+from account.models import CustomUser, Student
+from account.serializers import StudentSerializer
+
+
+def image_bytes(size=(640, 480), mode="RGBA", image_format="PNG"):
+    output = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)).save(output, image_format)
+    return output.getvalue()
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        _default_variants_version.clear()
+
+
+class RenderVariantsTests(TestCase):
+    def test_every_size_and_format(self):
+        variants = list(render_variants(io.BytesIO(image_bytes())))
+
+        self.assertEqual(len(variants), len(VARIANT_SIZES) * 2)
+        for size, extension, data in variants:
+            with Image.open(io.BytesIO(data)) as image:
+                self.assertEqual(image.size, (size, size))
+                self.assertEqual(image.format, {"webp": "WEBP", "jpg": "JPEG"}[extension])
+
+    def test_large_jpeg_is_decoded_at_reduced_scale(self):
+        source = io.BytesIO(image_bytes((4000, 3000), "RGB", "JPEG"))
+        with mock.patch("account.images.ImageOps.fit", wraps=ImageOps.fit) as fit:
+            sizes = {size for size, _, _ in render_variants(source)}
+
+        decoded = fit.call_args.args[0]
+        self.assertEqual(decoded.size, (500, 375))  # 1/8 scale, still covering 256 px
+        self.assertEqual(sizes, set(VARIANT_SIZES))
+
+
+class GenerateDerivativesTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            is_active=True,
+        )
+
+    def test_upload_schedules_derivatives_after_commit(self):
+        student = Student.objects.create(user=self.user)
+
+        with mock.patch("account.signals.schedule_derivatives") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                student.avatar = SimpleUploadedFile("photo.png", image_bytes(), content_type="image/png")
+                student.save()
+            schedule.assert_called_once_with(student.avatar.name)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                student.bio = "سلام"
+                student.save()
+            schedule.assert_called_once()
+
+    def test_generate_writes_every_variant_once(self):
+        name = default_storage.save("students/0932833810/photo.png", io.BytesIO(image_bytes()))
+
+        self.assertEqual(generate_derivatives(name), len(variant_names(name)))
+        self.assertTrue(all(default_storage.exists(variant) for variant in variant_names(name)))
+        self.assertEqual(generate_derivatives(name, overwrite=False), 0)
+
+        # Regenerating keeps the fixed names instead of adding suffixed copies.
+        generate_derivatives(name)
+        self.assertEqual(len(default_storage.listdir(f"derivatives/{name}")[1]), len(variant_names(name)))
+
+    def test_command_keeps_the_version_of_existing_derivatives(self):
+        student = Student.objects.create(user=self.user)
+        with mock.patch("account.signals.schedule_derivatives"):
+            student.avatar = SimpleUploadedFile("photo.png", image_bytes(), content_type="image/png")
+            student.save()
+        default_storage.save("default/profile_256x256.png", io.BytesIO(image_bytes((256, 256))))
+
+        call_command("generate_image_derivatives", stdout=io.StringIO())
+        student.refresh_from_db()
+        stamp = student.avatar_variants_at
+        self.assertIsNotNone(stamp)
+
+        call_command("generate_image_derivatives", stdout=io.StringIO())
+        student.refresh_from_db()
+        self.assertEqual(student.avatar_variants_at, stamp)
+
+        call_command("generate_image_derivatives", "--force", stdout=io.StringIO())
+        student.refresh_from_db()
+        self.assertNotEqual(student.avatar_variants_at, stamp)
+
+    def test_command_precomputes_the_default_image(self):
+        default_storage.save("default/profile_256x256.png", io.BytesIO(image_bytes((256, 256))))
+
+        call_command("generate_image_derivatives", "--default-only", stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists(variant_name("default/profile_256x256.png", 64, "webp")))
+
+    def test_default_image_is_precomputed_by_migrate(self):
+        name = default_storage.save("default/profile_256x256.png", io.BytesIO(image_bytes((256, 256))))
+
+        emit_post_migrate_signal(0, False, "default")
+
+        self.assertTrue(all(default_storage.exists(variant) for variant in variant_names(name)))
+        with mock.patch("account.images.generate_derivatives") as generate:
+            emit_post_migrate_signal(0, False, "default")
+        generate.assert_not_called()
+
+    def test_serializer_falls_back_to_the_original_until_generated(self):
+        student = Student.objects.create(user=self.user)
+        default_storage.save("default/profile_256x256.png", io.BytesIO(image_bytes((256, 256))))
+
+        self.assertEqual(
+            StudentSerializer(student).data["avatar_variants"]["64"],
+            {"webp": "/media/default/profile_256x256.png", "jpg": "/media/default/profile_256x256.png"},
+        )
+
+        call_command("generate_image_derivatives", "--default-only", stdout=io.StringIO())
+        version = f"{default_storage.get_modified_time(variant_names('default/profile_256x256.png')[-1]):%Y%m%d%H%M%S%f}"
+        self.assertEqual(
+            StudentSerializer(student).data["avatar_variants"]["64"],
+            {
+                "webp": f"/media/derivatives/default/profile_256x256.png/64.webp?v={version}",
+                "jpg": f"/media/derivatives/default/profile_256x256.png/64.jpg?v={version}",
+            },
+        )
+
+    def test_default_image_is_checked_once_per_process(self):
+        student = Student.objects.create(user=self.user)
+        default_storage.save("default/profile_256x256.png", io.BytesIO(image_bytes((256, 256))))
+        call_command("generate_image_derivatives", "--default-only", stdout=io.StringIO())
+        _default_variants_version.clear()
+
+        with mock.patch.object(default_storage, "exists", wraps=default_storage.exists) as exists:
+            for _ in range(3):
+                StudentSerializer(student).data
+        exists.assert_called_once()
+
+    def test_missing_default_derivatives_are_rechecked(self):
+        student = Student.objects.create(user=self.user)
+        default_storage.save("default/profile_256x256.png", io.BytesIO(image_bytes((256, 256))))
+        StudentSerializer(student).data
+        # Written by another process (e.g. migrate on deploy).
+        generate_derivatives("default/profile_256x256.png")
+
+        self.assertEqual(StudentSerializer(student).data["avatar_variants"]["64"]["webp"], "/media/default/profile_256x256.png")
+        with mock.patch("account.images.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertTrue(
+                StudentSerializer(student).data["avatar_variants"]["64"]["webp"].startswith(
+                    "/media/derivatives/default/profile_256x256.png/64.webp?v="
+                )
+            )
+
+    def test_job_marks_the_upload_ready(self):
+        student = Student.objects.create(user=self.user)
+        with mock.patch("account.signals.schedule_derivatives"):
+            student.avatar = SimpleUploadedFile("photo.png", image_bytes(), content_type="image/png")
+            student.save()
+        name = student.avatar.name
+        self.assertEqual(StudentSerializer(student).data["avatar_variants"]["64"]["webp"], f"/media/{name}")
+
+        with mock.patch("account.images.close_old_connections"):  # runs on a pool thread otherwise
+            _generate_logged(name)
+
+        student.refresh_from_db()
+        self.assertIsNotNone(student.avatar_variants_at)
+        url = StudentSerializer(student).data["avatar_variants"]["64"]["webp"]
+        self.assertEqual(url, f"/media/derivatives/{name}/64.webp?v={student.avatar_variants_at:%Y%m%d%H%M%S%f}")
+
+        # Regenerating restamps the profile, so clients fetch the new bytes under a new URL.
+        with mock.patch("account.images.close_old_connections"):
+            _generate_logged(name)
+        student.refresh_from_db()
+        self.assertNotEqual(StudentSerializer(student).data["avatar_variants"]["64"]["webp"], url)
+
+        # A new upload is not ready until its own job has run.
+        with mock.patch("account.signals.schedule_derivatives"):
+            student.avatar = SimpleUploadedFile("photo.png", image_bytes(), content_type="image/png")
+            student.save()
+        student.refresh_from_db()
+        self.assertIsNone(student.avatar_variants_at)
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from account.models import CustomUser, Institute, Student
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ImportUsersCommandTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.rows = [
+            {"username": "0932833810", "first_name": "تست", "last_name": "کاربر", "email": "a@bb.com",
+             "phone_number": "09395551212", "role": "S", "password": "S3cure-pass"},
+            {"username": "10103765178", "first_name": "تست", "last_name": "موسسه", "email": "b@bb.com",
+             "phone_number": "02145665544", "role": "I", "password": ""},
+            {"username": "7966299813", "first_name": "نریمان", "last_name": "اسدی", "email": "c@bb.com",
+             "phone_number": "09199876543", "role": "S", "password": "S3cure-pass"},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write_csv(self, rows, name="users.csv"):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def _write_jsonl(self, rows, name="users.jsonl"):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return path
+
+    def _call(self, path, **options):
+        options.setdefault("workers", 1)
+        call_command("import_users", path, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def test_import_csv_creates_users_and_profiles(self):
+        self._call(self._write_csv(self.rows), batch_size=2)
+
+        self.assertEqual(CustomUser.objects.count(), 3)
+        self.assertEqual(CustomUser.objects.filter(is_active=True).count(), 3)
+        self.assertEqual(Student.objects.count(), 2)
+        self.assertEqual(Institute.objects.filter(user__username="10103765178").count(), 1)
+
+        student = CustomUser.objects.get(username="0932833810")
+        self.assertTrue(student.check_password("S3cure-pass"))
+        self.assertFalse(CustomUser.objects.get(username="10103765178").has_usable_password())
+
+    def test_import_with_process_pool(self):
+        self._call(self._write_csv(self.rows), workers=2)
+
+        self.assertTrue(CustomUser.objects.get(username="7966299813").check_password("S3cure-pass"))
+
+    def test_import_jsonl_inactive(self):
+        self._call(self._write_jsonl(self.rows), inactive=True)
+
+        self.assertEqual(CustomUser.objects.filter(is_active=False).count(), 3)
+        self.assertEqual(Student.objects.count() + Institute.objects.count(), 0)
+
+    def test_invalid_and_duplicate_rows_are_rejected(self):
+        CustomUser.objects.create_user(
+            username="7966299813", email="x@bb.com", first_name="تست",
+            last_name="کاربر", phone_number="09121112233", role="S",
+        )
+        rows = self.rows + [
+            dict(self.rows[0], email="d@bb.com", phone_number="09120000000"),  # duplicate username in file
+            dict(self.rows[0], username="1234567890", email="e@bb.com"),        # invalid checksum
+            dict(self.rows[0], username="5116168395", phone_number="123"),      # invalid phone
+            dict(self.rows[0], username="8912812262", role=""),                 # missing role
+            dict(self.rows[0], username="0018034938", email="f@bb.com", phone_number="09120000001",
+                 last_name="ک" * 101),                                           # too long
+            dict(self.rows[0], username="1234560003", email="X@BB.com", phone_number="09120000001"),
+            dict(self.rows[0], username="1234560003", email="A@bb.com", phone_number="09120000001"),
+        ]
+        stderr = io.StringIO()
+        call_command("import_users", self._write_csv(rows), workers=1, stdout=io.StringIO(), stderr=stderr)
+
+        self.assertEqual(CustomUser.objects.count(), 3)
+        self.assertIn("row 3: username '7966299813' already exists", stderr.getvalue())
+        self.assertIn("row 4: duplicate username", stderr.getvalue())
+        self.assertIn("row 5: invalid username", stderr.getvalue())
+        self.assertIn("row 6: invalid phone number", stderr.getvalue())
+        self.assertIn("row 7: missing role", stderr.getvalue())
+        self.assertIn("row 8: last_name longer than 100 characters", stderr.getvalue())
+        # Emails are unique regardless of case.
+        self.assertIn("row 9: email 'X@bb.com' already exists", stderr.getvalue())
+        self.assertIn("row 10: duplicate email 'A@bb.com' in file", stderr.getvalue())
+
+    def test_checkpoint_resumes_import(self):
+        path = self._write_csv(self.rows)
+        checkpoint = os.path.join(self.tmp_dir, "users.ckpt")
+        with open(checkpoint, "w") as f:
+            json.dump({"path": os.path.abspath(path), "offset": 2, "created": 2, "rejected": 0}, f)
+
+        self._call(path, checkpoint=checkpoint)
+
+        self.assertEqual(list(CustomUser.objects.values_list("username", flat=True)), ["7966299813"])
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f)["offset"], 3)
@@ -0,0 +1,57 @@
+from datetime import datetime
+from django.db import connection
+from django.test import TestCase
+from account.models import CustomUser
+
+
+class CustomUserIndexTests(TestCase):
+    """
+    Check that the planner picks the composite indexes for the admin changelist
+    filters and the activation checks instead of scanning the table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        provinces = ["تهران", "اصفهان", "فارس", "گیلان"]
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f"{i:010d}",
+                email=f"user{i}@bb.com",
+                first_name="تست",
+                last_name="کاربر",
+                phone_number=f"09{i:09d}",
+                role="S" if i % 3 else "I",
+                province=provinces[i % 4],
+                city=f"city-{i % 40}",
+                is_active=bool(i % 10),
+                date_joined=datetime(2024, 1 + i % 12, 1 + i % 28),
+            )
+            for i in range(500)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_role_province_city_filter(self):
+        queryset = CustomUser.objects.filter(role="S", province="تهران", city="city-4")
+        self.assertUsesIndex(queryset, "user_role_province_city_idx")
+
+    def test_role_filter(self):
+        self.assertUsesIndex(CustomUser.objects.filter(role="I"), "user_role_province_city_idx")
+
+    def test_province_city_filter(self):
+        queryset = CustomUser.objects.filter(province="فارس", city="city-6")
+        self.assertUsesIndex(queryset, "user_province_city_idx")
+
+    def test_date_hierarchy_filter(self):
+        queryset = CustomUser.objects.filter(date_joined__year=2024, date_joined__month=3)
+        self.assertUsesIndex(queryset, "user_date_joined_idx")
+
+    def test_active_date_joined_filter(self):
+        # SQLite renders is_active=False as "NOT is_active", which no index can serve,
+        # while MySQL compares the column directly; __in gives the MySQL shape here.
+        queryset = CustomUser.objects.filter(is_active__in=[False], date_joined__gte=datetime(2024, 6, 1))
+        self.assertUsesIndex(queryset, "user_active_date_joined_idx")
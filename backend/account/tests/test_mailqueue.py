@@ -0,0 +1,177 @@
+import datetime
+from smtplib import SMTPException
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from account import mailqueue
+from account.models import CustomUser, OutboundEmail
+
+
+def queue(count):
+    for i in range(count):
+        message = mail.EmailMultiAlternatives(f"subject {i}", "text", "noreply@bb.com", [f"user{i}@bb.com"])
+        message.attach_alternative("<p>html</p>", "text/html")
+        mailqueue.enqueue(message)
+
+
+class QueuedDjoserEmailTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            password="Sodoor-1234",
+        )
+
+    def test_request_queues_instead_of_sending(self):
+        response = self.client.post(reverse("customuser-resend-activation"), {"email": "aaaa@bb.com"})
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.to, ["aaaa@bb.com"])
+        self.assertIn("activate", email.body)
+
+        mailqueue.send_batch()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["aaaa@bb.com"])
+        self.assertEqual(mail.outbox[0].subject, email.subject)
+        # The activation link is not kept once delivered.
+        email.refresh_from_db()
+        self.assertEqual((email.body, email.html_body), ("", ""))
+
+    def test_signup_and_its_email_commit_together(self):
+        data = {
+            "username": "7966299813", "email": "new@bb.com", "first_name": "تست", "last_name": "کاربر",
+            "phone_number": "09120000000", "role": "S", "password": "Sodoor-1234", "re_password": "Sodoor-1234",
+        }
+
+        with mock.patch("account.email.enqueue", side_effect=DatabaseError("queue unavailable")):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse("customuser-list"), data)
+
+        self.assertFalse(CustomUser.objects.filter(username="7966299813").exists())
+
+    def test_admin_does_not_show_bodies(self):
+        admin = CustomUser.objects.create_superuser(
+            username="1234567891", email="bb@cc.com", first_name="تست", last_name="ادمین",
+            phone_number="09991113344", password="Sodoor-1234", is_active=True,
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse("customuser-resend-activation"), {"email": "aaaa@bb.com"})
+        email = OutboundEmail.objects.get()
+
+        response = self.client.get(reverse("admin:account_outboundemail_change", args=[email.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "activate")
+
+
+class SendBatchTests(TestCase):
+    def test_one_connection_per_batch(self):
+        queue(5)
+
+        with mock.patch("account.mailqueue.get_connection", wraps=get_connection) as connect:
+            self.assertEqual(mailqueue.send_batch(batch_size=3), (3, 0))
+            self.assertEqual(mailqueue.send_batch(batch_size=3), (2, 0))
+            self.assertEqual(mailqueue.send_batch(batch_size=3), (0, 0))
+
+        self.assertEqual(connect.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.Status.SENT).count(), 5)
+
+    def test_recipients_and_headers_are_kept(self):
+        message = mail.EmailMultiAlternatives(
+            "subject", "text", "noreply@bb.com", ["user@bb.com"], cc=["cc@bb.com"], bcc=["bcc@bb.com"],
+            reply_to=["support@bb.com"], headers={"X-Campaign": "activation"},
+        )
+        mailqueue.enqueue(message)
+
+        mailqueue.send_batch()
+
+        sent = mail.outbox[0]
+        self.assertEqual((sent.cc, sent.bcc, sent.reply_to), (["cc@bb.com"], ["bcc@bb.com"], ["support@bb.com"]))
+        self.assertEqual(sent.recipients(), ["user@bb.com", "cc@bb.com", "bcc@bb.com"])
+        self.assertEqual(sent.message()["X-Campaign"], "activation")
+
+    def test_attachments_are_refused(self):
+        message = mail.EmailMultiAlternatives("subject", "text", "noreply@bb.com", ["user@bb.com"])
+        message.attach("report.csv", "a,b", "text/csv")
+
+        with self.assertRaises(ValueError):
+            mailqueue.enqueue(message)
+
+        message = mail.EmailMultiAlternatives("subject", "text", "noreply@bb.com", ["user@bb.com"])
+        message.attach_alternative("# markdown", "text/markdown")
+
+        with self.assertRaises(ValueError):
+            mailqueue.enqueue(message)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_failures_back_off_and_give_up(self):
+        queue(1)
+        email = OutboundEmail.objects.get()
+        failing = mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=SMTPException("busy")
+        )
+
+        for attempt in range(1, mailqueue.MAX_ATTEMPTS + 1):
+            before = timezone.now()
+            with failing:
+                self.assertEqual(mailqueue.send_batch(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempt)
+            if attempt < mailqueue.MAX_ATTEMPTS:
+                self.assertGreaterEqual(email.next_attempt_at, before + mailqueue.retry_delay(attempt))
+                # Not due yet; make it due for the next round.
+                self.assertEqual(mailqueue.send_batch(), (0, 0))
+                OutboundEmail.objects.update(next_attempt_at=before)
+
+        self.assertEqual(email.status, OutboundEmail.Status.FAILED)
+        self.assertIn("busy", email.last_error)
+        self.assertEqual(mailqueue.retry_delay(1), datetime.timedelta(seconds=mailqueue.RETRY_BASE))
+        self.assertEqual(mailqueue.retry_delay(20), datetime.timedelta(seconds=mailqueue.RETRY_MAX))
+
+    def test_connection_failure_retries_the_whole_batch(self):
+        queue(2)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=OSError("refused")):
+            self.assertEqual(mailqueue.send_batch(), (0, 2))
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(list(OutboundEmail.objects.values_list("attempts", flat=True)), [1, 1])
+
+    def test_old_sent_emails_are_purged(self):
+        queue(3)
+        mailqueue.send_batch(batch_size=2)
+        OutboundEmail.objects.filter(status=OutboundEmail.Status.SENT).update(
+            sent_at=timezone.now() - mailqueue.SENT_RETENTION - datetime.timedelta(minutes=1)
+        )
+        mailqueue.send_batch()
+
+        self.assertEqual(mailqueue.purge_sent(), 2)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+    def test_queue_depth(self):
+        queue(3)
+        OutboundEmail.objects.filter(pk=OutboundEmail.objects.first().pk).update(status=OutboundEmail.Status.FAILED)
+        OutboundEmail.objects.filter(status=OutboundEmail.Status.PENDING).update(
+            created_at=timezone.now() - datetime.timedelta(minutes=5)
+        )
+
+        depth = mailqueue.queue_depth()
+
+        self.assertEqual((depth["pending"], depth["due"], depth["failed"]), (2, 2, 1))
+        self.assertGreaterEqual(depth["oldest_pending_seconds"], 300)
@@ -0,0 +1,102 @@
+import io
+import os
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+from account.tests.test_images import MediaRootMixin
+from sodooronline.media import parse_range
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range("bytes=2-5", 10), (2, 5))
+        self.assertEqual(parse_range("bytes=2-", 10), (2, 9))
+        self.assertEqual(parse_range("bytes=4-100", 10), (4, 9))
+        self.assertEqual(parse_range("bytes=-3", 10), (7, 9))
+
+    def test_whole_file_or_unsatisfiable(self):
+        for header in ("bytes=0-1,4-5", "items=0-1", "bytes=5-2", "bytes=-"):
+            self.assertIsNone(parse_range(header, 10))
+        for header in ("bytes=10-", "bytes=-0"):
+            with self.assertRaises(ValueError):
+                parse_range(header, 10)
+
+
+class ServeMediaTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = default_storage.save("students/0932833810/photo.png", io.BytesIO(b"0123456789"))
+        self.url = default_storage.url(self.name)
+
+    def test_serves_the_file_with_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)  # handed to wsgi.file_wrapper
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+        self.assertEqual(response["Last-Modified"], http_date(os.stat(default_storage.path(self.name)).st_mtime))
+        self.assertTrue(response["ETag"].startswith('"'))
+
+    def test_versioned_derivatives_are_immutable(self):
+        name = default_storage.save(f"derivatives/{self.name}/64.webp", io.BytesIO(b"webp"))
+
+        response = self.client.get(default_storage.url(name), {"v": "20261018100000000000"})
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+        # Regenerating rewrites them under the same name; only the version tells them apart.
+        response = self.client.get(default_storage.url(name))
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+        response = self.client.get(self.url, {"v": "20261018100000000000"})
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+    def test_conditional_requests(self):
+        first = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(response["Content-Length"], "4")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+        self.assertNotIn("Cache-Control", response)
+        self.assertNotIn("ETag", response)
+
+        # The file changed since the client's copy: send all of it.
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_hands_off_to_the_web_server(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT="/protected-media/"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/students/0932833810/photo.png")
+        self.assertEqual(response.content, b"")
+        self.assertIn("ETag", response)
+
+        with override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile"):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], default_storage.path(self.name))
+
+    def test_blobs_directories_and_traversal_are_not_served(self):
+        digest = default_storage.content_digest(self.name)
+
+        self.assertEqual(self.client.get(f"/media/{default_storage.blob_name(digest)}").status_code, 404)
+        self.assertEqual(self.client.get("/media/students/").status_code, 404)
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 400)
@@ -4,7 +4,7 @@ from django.test import TestCase, override_settings
 from account.models import CustomUser, Institute, Student
 from django.db.utils import IntegrityError
 from django.db import transaction
-from account.utils import default_file_path
+from account.utils import default_file_path, image_directory
 from django.core.files.uploadedfile import SimpleUploadedFile
 import tempfile
 import shutil
@@ -180,7 +180,7 @@ class InstituteProfileTest(TestCase):
         self.institute_profile.logo = uploaded_file
         self.institute_profile.save()
 
-        self.assertTrue(self.institute_profile.logo.name.endswith(f"institutes/{self.institute_profile.user.username}/{file_name}"))
+        self.assertTrue(self.institute_profile.logo.name.endswith(f"{image_directory('I', self.institute_profile.user.username)}/{file_name}"))
         self.assertTrue(os.path.exists(self.institute_profile.logo.path))
 
     def test_create_institute_with_wrong_role(self):
@@ -248,7 +248,7 @@ class StudentProfileTest(TestCase):
         self.student_profile.avatar = uploaded_file
         self.student_profile.save()
 
-        self.assertTrue(self.student_profile.avatar.name.endswith(f"students/{self.student_profile.user.username}/{file_name}"))
+        self.assertTrue(self.student_profile.avatar.name.endswith(f"{image_directory('S', self.student_profile.user.username)}/{file_name}"))
         self.assertTrue(os.path.exists(self.student_profile.avatar.path))
 
     def test_student_institute_with_wrong_role(self):
@@ -0,0 +1,129 @@
+import errno
+import hashlib
+import io
+import json
+import os
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from account import routers
+from account.management.commands.collect_orphaned_media import walk_media
+from account.models import CustomUser, Student
+from account.tests.test_images import MediaRootMixin
+
+
+class CollectOrphanedMediaTests(MediaRootMixin, TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        super().setUp()
+        user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            is_active=True,
+        )
+        self.current = self.store("students/0932833810/current.png", b"current")
+        Student.objects.create(user=user, avatar=self.current)
+        self.store(f"derivatives/{self.current}/64.webp", b"current 64")
+        self.replaced = self.store("students/0932833810/replaced.png", b"replaced")
+        self.replaced_variant = self.store(f"derivatives/{self.replaced}/64.webp", b"replaced 64")
+        self.deleted_account = self.store("institutes/10103765178/logo.png", b"logo")
+
+    def store(self, name, data):
+        return default_storage.save(name, io.BytesIO(data))
+
+    def collect(self, *args):
+        stdout = io.StringIO()
+        call_command("collect_orphaned_media", "--grace-hours", "0", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_walk_is_ordered_and_resumes_after_a_name(self):
+        names = [name for name, _ in walk_media(default_storage.location)]
+
+        self.assertEqual(names, sorted(names, key=lambda name: name.split("/")))
+        self.assertEqual(len(names), 10)  # and a blob each
+        resumed = [name for name, _ in walk_media(default_storage.location, tuple(names[1].split("/")))]
+        self.assertEqual(resumed, names[2:])
+
+    def test_dry_run_reports_without_deleting(self):
+        output = self.collect("--dry-run")
+
+        self.assertIn(f"{self.replaced}\t8\n", output)
+        self.assertIn(f"{self.replaced_variant}\t", output)
+        self.assertIn(f"{self.deleted_account}\t", output)
+        self.assertIn("10 scanned, 7 referenced, 0 within the grace period, 3 orphaned", output)
+        self.assertTrue(default_storage.exists(self.replaced))
+
+    def test_deletes_unreferenced_images_and_their_derivatives(self):
+        with self.assertNumQueries(2):  # one batch, one query per image field
+            self.collect()
+
+        self.assertTrue(default_storage.exists(self.current))
+        self.assertTrue(default_storage.exists(f"derivatives/{self.current}/64.webp"))
+        for name in (self.replaced, self.replaced_variant, self.deleted_account):
+            self.assertFalse(default_storage.exists(name))
+
+    def test_references_are_read_from_the_primary(self):
+        routers.unpin()  # pinned by the writes of setUp
+        self.addCleanup(routers.unpin)
+
+        # The replica, a separate database here, has not seen the profile.
+        with self.settings(DATABASE_REPLICAS=["replica"]):
+            self.collect()
+
+        self.assertTrue(default_storage.exists(self.current))
+        self.assertTrue(default_storage.exists(f"derivatives/{self.current}/64.webp"))
+
+    def test_recent_files_are_kept(self):
+        output = self.collect("--grace-hours", "1")
+
+        self.assertIn("3 within the grace period, 0 orphaned", output)
+        self.assertTrue(default_storage.exists(self.replaced))
+
+    def test_interrupted_run_resumes_from_the_checkpoint(self):
+        checkpoint = os.path.join(default_storage.location, "gc.ckpt")
+        real_delete = default_storage.delete
+        deleted = []
+
+        def delete_once(name):
+            if deleted:
+                raise KeyboardInterrupt
+            deleted.append(name)
+            real_delete(name)
+
+        with mock.patch.object(default_storage, "delete", side_effect=delete_once):
+            with self.assertRaises(KeyboardInterrupt):
+                self.collect("--batch-size", "1", "--checkpoint", checkpoint)
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f)["orphaned"], 1)
+
+        output = self.collect("--batch-size", "1", "--checkpoint", checkpoint)
+
+        self.assertIn("Resuming after", output)
+        self.assertIn("3 orphaned", output)
+        self.assertFalse(os.path.exists(checkpoint))
+        for name in (self.replaced, self.replaced_variant, self.deleted_account):
+            self.assertFalse(default_storage.exists(name))
+
+    def test_unlinked_blobs_and_stale_temporary_files_are_swept(self):
+        # A blob its save failed to link or remove, and the remains of a crashed upload.
+        with mock.patch("account.storage.os.link", side_effect=OSError(errno.EXDEV, "cross-device link")), \
+                mock.patch.object(default_storage, "_remove_unlinked_blob"):
+            copy = self.store("students/0932833810/copy.png", b"copy")
+        blob = default_storage.blob_name(hashlib.sha256(b"copy").hexdigest())
+        temp = os.path.join(default_storage.location, "blobs", "tmp", "0123abcd")
+        with open(temp, "wb") as partial:
+            partial.write(b"partial")
+
+        output = self.collect()
+
+        self.assertIn("13 scanned, 7 referenced, 0 within the grace period, 6 orphaned", output)
+        self.assertFalse(default_storage.exists(blob))
+        self.assertFalse(default_storage.exists(copy))
+        self.assertFalse(os.path.exists(temp))
+        self.assertTrue(default_storage.exists(default_storage.blob_name(default_storage.content_digest(self.current))))
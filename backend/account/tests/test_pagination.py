@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from account.models import CustomUser
+
+
+class UserCursorPaginationTests(APITestCase):
+    url = reverse("customuser-list")
+
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(
+            username="1234567891",
+            email="staff@bb.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_staff=True,
+            is_active=True,
+            date_joined=datetime(2020, 1, 1),
+        )
+        self.client.force_authenticate(self.staff)
+        # Several users share a date_joined, so ties must be broken by id.
+        self._create_users(range(25), lambda i: datetime(2024, 1, 1) + timedelta(days=i // 3))
+
+    def _create_users(self, numbers, date_joined):
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f"{i:010d}",
+                email=f"user{i}@bb.com",
+                first_name="تست",
+                last_name="کاربر",
+                phone_number=f"09{i:09d}",
+                role="S",
+                date_joined=date_joined(i),
+            )
+            for i in numbers
+        ])
+
+    def _cursor(self, link):
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    def _walk(self, page_size):
+        usernames, cursor = [], None
+        while True:
+            params = {"page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(self.url, params)
+            usernames += [user["username"] for user in response.data["results"]]
+            if not response.data["next"]:
+                return usernames
+            cursor = self._cursor(response.data["next"])
+
+    def test_pages_follow_date_joined_then_id(self):
+        expected = list(
+            CustomUser.objects.order_by("date_joined", "id").values_list("username", flat=True)
+        )
+        self.assertEqual(self._walk(page_size=4), expected)
+
+    def test_first_page_has_no_previous(self):
+        response = self.client.get(self.url, {"page_size": 10})
+
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNone(response.data["previous"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get(self.url, {"page_size": 5})
+        second = self.client.get(self.url, {"page_size": 5, "cursor": self._cursor(first.data["next"])})
+        back = self.client.get(self.url, {"page_size": 5, "cursor": self._cursor(second.data["previous"])})
+
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_pages_are_stable_while_rows_are_inserted(self):
+        first = self.client.get(self.url, {"page_size": 5})
+        seen = [user["username"] for user in first.data["results"]]
+
+        # New signups land at the end of the ordering and never shift earlier pages.
+        self._create_users(range(100, 110), lambda i: datetime(2025, 1, 1))
+        second = self.client.get(self.url, {"page_size": 5, "cursor": self._cursor(first.data["next"])})
+
+        self.assertEqual(
+            [user["username"] for user in second.data["results"]],
+            list(CustomUser.objects.order_by("date_joined", "id").values_list("username", flat=True)[5:10]),
+        )
+        self.assertFalse(set(seen) & {user["username"] for user in second.data["results"]})
+
+    def test_page_query_count_is_constant(self):
+        first = self.client.get(self.url, {"page_size": 5})
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"page_size": 5, "cursor": self._cursor(first.data["next"])})
+
+    def test_max_page_size(self):
+        self._create_users(range(200, 300), lambda i: datetime(2025, 1, 1))
+        response = self.client.get(self.url, {"page_size": 1000})
+
+        self.assertEqual(len(response.data["results"]), 100)
+
+    def test_default_page_size(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data["results"]), 20)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 404)
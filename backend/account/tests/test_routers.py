@@ -0,0 +1,191 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import OperationalError, connections, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from djoser import utils
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from account import routers
+from account.models import CustomUser, Student
+
+
+def create_user(username, using=None, **fields):
+    fields.setdefault("last_name", "کاربر")
+    return CustomUser.objects.db_manager(using).create_user(
+        username=username,
+        email=f"{username}@bb.com",
+        first_name="تست",
+        phone_number=f"09{username[1:]}",
+        role="S",
+        **fields,
+    )
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TestCase):
+    # Two separate SQLite databases: nothing replicates between them, so where a row
+    # is found tells which database the read went to.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.primary_user = create_user("0932833810")
+        self.replica_user = create_user("7966299813", using="replica")
+        routers.unpin()
+        routers._unavailable.clear()
+
+    def tearDown(self):
+        routers.unpin()
+        routers._unavailable.clear()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(list(CustomUser.objects.values_list("username", flat=True)), ["7966299813"])
+        self.assertEqual(CustomUser.objects.get(username="7966299813")._state.db, "replica")
+
+    def test_writes_go_to_primary(self):
+        user = CustomUser.objects.get(username="7966299813")
+        user.last_name = "اسدی"
+        user.save()
+
+        self.assertTrue(CustomUser.objects.using("default").filter(username="7966299813").exists())
+
+    def test_reads_after_a_write_are_pinned_to_primary(self):
+        create_user("5116168395")
+
+        self.assertTrue(routers.is_pinned())
+        self.assertEqual(
+            set(CustomUser.objects.values_list("username", flat=True)),
+            {"0932833810", "5116168395"},
+        )
+
+    def test_other_models_are_not_routed(self):
+        from django.contrib.sessions.models import Session
+
+        self.assertEqual(Session.objects.all().db, "default")
+
+    def test_profiles_and_tokens_are_routed(self):
+        self.assertEqual(Student.objects.all().db, "replica")
+        self.assertEqual(Token.objects.all().db, "replica")
+
+    def test_relations_across_primary_and_replica_are_allowed(self):
+        student = Student(user=CustomUser.objects.get(username="7966299813"))
+
+        self.assertEqual(student.user.username, "7966299813")
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        with mock.patch.object(connections["replica"], "ensure_connection", side_effect=OperationalError):
+            self.assertEqual(list(CustomUser.objects.values_list("username", flat=True)), ["0932833810"])
+
+        # Not retried until REPLICA_RETRY_AFTER has passed.
+        self.assertEqual(CustomUser.objects.all().db, "default")
+        with mock.patch("account.routers.time.monotonic", return_value=float("inf")):
+            self.assertEqual(CustomUser.objects.all().db, "replica")
+
+    def test_replica_failing_a_query_falls_back_to_primary(self):
+        # As connection_created does for a new replica connection.
+        replica = connections["replica"]
+        routers.watch_replica_connection(sender=None, connection=replica)
+        self.addCleanup(replica.execute_wrappers.remove, routers._note_replica_failure)
+
+        def lost_connection(execute, sql, params, many, context):
+            raise OperationalError("server closed the connection unexpectedly")
+
+        with connections["replica"].execute_wrapper(lost_connection):
+            with self.assertRaises(OperationalError):
+                list(CustomUser.objects.all())
+
+        self.assertEqual(list(CustomUser.objects.values_list("username", flat=True)), ["0932833810"])
+
+    def test_activate_locks_and_writes_on_the_primary(self):
+        # Signed up after the replica's last update: only the primary has the user.
+        pending = create_user("5116168395")
+        routers.unpin()
+        self.assertEqual(CustomUser.objects.filter(username="5116168395").db, "replica")
+
+        with mock.patch("account.models.transaction.atomic", wraps=transaction.atomic) as atomic:
+            activated = CustomUser.objects.filter(username="5116168395").activate()
+
+        self.assertEqual(atomic.call_args_list[0], mock.call(using="default"))
+        self.assertEqual(activated, 1)
+        self.assertTrue(CustomUser.objects.using("default").get(pk=pending.pk).is_active)
+        self.assertTrue(Student.objects.using("default").filter(user_id=pending.pk).exists())
+
+    def test_no_replicas_configured(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(CustomUser.objects.all().db, "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaPinningMiddlewareTests(APITestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = create_user("0932833810", is_active=True)
+        token = Token.objects.create(user=self.user)
+        # A lagging replica: same token, older last name.
+        stale = create_user("0932833810", using="replica", id=self.user.pk, is_active=True, last_name="قدیمی")
+        Token.objects.using("replica").create(key=token.key, user=stale)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def tearDown(self):
+        routers.unpin()
+
+    def test_each_request_starts_unpinned(self):
+        self.client.get(reverse("customuser-me"))  # caches the token, read on the primary
+        routers.pin_to_primary()
+
+        response = self.client.get(reverse("customuser-detail", args=[self.user.pk]))
+
+        self.assertEqual(response.data["last_name"], "قدیمی")
+        self.assertFalse(routers.is_pinned())
+
+    def test_me_is_built_from_the_primary(self):
+        response = self.client.get(reverse("customuser-me"))
+
+        self.assertEqual(response.data["last_name"], "کاربر")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryAuthReadsTests(APITestCase):
+    # The user was created in an earlier request and has not reached the replica.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = create_user("0932833810", password="S3cure-pass")
+        routers.unpin()
+
+    def tearDown(self):
+        routers.unpin()
+
+    def test_activation(self):
+        data = {"uid": utils.encode_uid(self.user.pk), "token": default_token_generator.make_token(self.user)}
+
+        response = self.client.post(reverse("customuser-activation"), data)
+
+        self.assertEqual(response.status_code, 204)
+
+    async def test_async_activation(self):
+        data = {"uid": utils.encode_uid(self.user.pk), "token": default_token_generator.make_token(self.user)}
+
+        response = await self.async_client.post(reverse("async-activation"), data, content_type="application/json")
+
+        self.assertEqual(response.status_code, 204)
+
+    def test_token_login(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=True)
+        routers.unpin()
+
+        response = self.client.post(reverse("login"), {"username": "0932833810", "password": "S3cure-pass"})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_token_authenticates(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=True)
+        token = Token.objects.create(user=self.user)
+        cache.clear()  # not cached yet, as after a login handled by another process
+        routers.unpin()
+
+        response = self.client.get(reverse("customuser-me"), HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        self.assertEqual(response.status_code, 200)
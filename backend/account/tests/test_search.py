@@ -0,0 +1,111 @@
+from unittest import mock
+from django.db import connections
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from account.models import CustomUser
+from account.utils import normalize_persian
+
+
+def create_user(i, first_name, last_name, **fields):
+    return CustomUser.objects.create_user(
+        username=f"{i:010d}",
+        email=f"user{i}@bb.com",
+        first_name=first_name,
+        last_name=last_name,
+        phone_number=f"09{i:09d}",
+        role="S",
+        **fields,
+    )
+
+
+class NormalizePersianTests(TestCase):
+    def test_arabic_letters(self):
+        self.assertEqual(normalize_persian("علي كريمي"), "علی کریمی")
+
+    def test_digits_case_and_spaces(self):
+        self.assertEqual(normalize_persian("  Ali‌Reza ۱۲٣ "), "ali reza 123")
+
+    def test_diacritics_and_tatweel(self):
+        self.assertEqual(normalize_persian("مُحَمّـد"), "محمد")
+
+
+class CustomUserSearchTests(TestCase):
+    def setUp(self):
+        self.ali = create_user(1, "علی", "کریمی")
+        self.reza = create_user(2, "رضا", "علوی")
+        self.sara = create_user(3, "سارا", "یکتا")
+
+    def _search(self, query):
+        return set(CustomUser.objects.search(query).values_list("username", flat=True))
+
+    def test_normalized_columns_are_kept_up_to_date(self):
+        self.sara.first_name = "سارة"
+        self.sara.save(update_fields=["first_name"])
+        self.sara.refresh_from_db()
+
+        self.assertEqual(self.sara.first_name_normalized, "ساره")
+
+    def test_arabic_spelling_matches_persian_names(self):
+        self.assertEqual(self._search("علي"), {"0000000001"})
+        self.assertEqual(self._search("كريمي"), {"0000000001"})
+
+    def test_prefix_of_any_name_or_username(self):
+        self.assertEqual(self._search("یک"), {"0000000003"})
+        self.assertEqual(self._search("000000000۲"), {"0000000002"})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self._search("علی کریمی"), {"0000000001"})
+        self.assertEqual(self._search("علی یکتا"), set())
+
+    def test_search_uses_indexes(self):
+        plan = CustomUser.objects.search("کریمی").explain()
+
+        self.assertIn("user_first_name_norm_idx", plan)
+        self.assertIn("user_last_name_norm_idx", plan)
+        self.assertNotIn("SCAN account_customuser", plan)
+
+    def test_lookups_follow_the_database_the_query_runs_on(self):
+        with mock.patch.object(connections["replica"], "vendor", "mysql"):
+            replica = str(CustomUser.objects.using("replica").search("کریمی").query)
+            default = str(CustomUser.objects.search("کریمی").query)
+
+        self.assertIn("LIKE", replica)
+        self.assertNotIn("LIKE", default)
+
+
+class CustomUserSearchEndpointsTests(APITestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_superuser(
+            username="1234567891",
+            email="staff@bb.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_active=True,
+        )
+        create_user(1, "علی", "کریمی")
+        create_user(2, "رضا", "علوی")
+
+    def test_admin_search(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("admin:account_customuser_changelist"), {"q": "كريمي"})
+
+        self.assertEqual([user.username for user in response.context["cl"].result_list], ["0000000001"])
+
+    def test_staff_search_api(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse("customuser-search"), {"q": "عل"})
+
+        self.assertEqual(
+            {user["username"] for user in response.data["results"]},
+            {"0000000001", "0000000002"},
+        )
+
+    def test_search_api_is_staff_only(self):
+        user = CustomUser.objects.get(username="0000000001")
+        self.client.force_authenticate(user)
+
+        response = self.client.get(reverse("customuser-search"), {"q": "علی"})
+
+        self.assertEqual(response.status_code, 403)
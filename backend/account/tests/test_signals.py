@@ -0,0 +1,94 @@
+from django.test import TestCase
+from account.models import CustomUser, Institute, Student
+
+
+class CreateProfileSignalTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S"
+        )
+
+    def _activate(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.is_active = True
+            user.save()
+
+    def test_profile_created_on_activation(self):
+        self._activate(self.user)
+
+        self.assertTrue(Student.objects.filter(user=self.user).exists())
+        self.assertFalse(Institute.objects.filter(user=self.user).exists())
+
+    def test_institute_profile_created_on_activation(self):
+        institute_user = CustomUser.objects.create_user(
+            username="10103765178",
+            email="a@bb.com",
+            first_name="تست",
+            last_name="موسسه",
+            phone_number="02145665544",
+            role="I"
+        )
+        self._activate(CustomUser.objects.get(pk=institute_user.pk))
+
+        self.assertTrue(Institute.objects.filter(user=institute_user).exists())
+
+    def test_profile_is_deferred_until_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_active = True
+            self.user.save()
+            self.assertFalse(Student.objects.filter(user=self.user).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(Student.objects.filter(user=self.user).exists())
+
+    def test_no_profile_on_creation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = CustomUser.objects.create_user(
+                username="10103765178",
+                email="a@bb.com",
+                first_name="تست",
+                last_name="موسسه",
+                phone_number="02145665544",
+                role="I",
+                is_active=True,
+            )
+
+        self.assertFalse(Institute.objects.filter(user=user).exists())
+
+    def test_ordinary_save_costs_no_extra_queries(self):
+        self._activate(self.user)
+        user = CustomUser.objects.get(pk=self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                user.last_name = "اسدی"
+                user.save()
+            with self.assertNumQueries(1):
+                user.save(update_fields=["last_login"])
+
+        self.assertEqual(Student.objects.filter(user=user).count(), 1)
+
+    def test_save_of_inactive_user_costs_no_extra_queries(self):
+        with self.assertNumQueries(1):
+            self.user.save()
+
+    def test_update_fields_without_is_active_is_not_an_activation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = True
+            self.user.save(update_fields=["last_name"])
+
+        self.assertFalse(Student.objects.filter(user=self.user).exists())
+
+    def test_reactivation_reuses_existing_profile(self):
+        self._activate(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self._activate(self.user)
+
+        self.assertEqual(Student.objects.filter(user=self.user).count(), 1)
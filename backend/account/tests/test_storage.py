@@ -0,0 +1,79 @@
+import errno
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from account.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedStorage(location=self.location, base_url="/media/")
+
+    def blobs(self):
+        return [name for _, _, names in os.walk(os.path.join(self.location, "blobs")) for name in names]
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save("students/1/logo.png", ContentFile(b"same bytes"))
+        second = self.storage.save("students/2/logo.png", ContentFile(b"same bytes"))
+        other = self.storage.save("students/3/logo.png", ContentFile(b"other bytes"))
+
+        self.assertEqual(len(self.blobs()), 2)
+        self.assertEqual(os.stat(self.storage.path(first)).st_ino, os.stat(self.storage.path(second)).st_ino)
+        self.assertEqual(self.storage.reference_count(first), 2)
+        self.assertEqual(self.storage.reference_count(other), 1)
+        with self.storage.open(second) as stored:
+            self.assertEqual(stored.read(), b"same bytes")
+        self.assertEqual(self.storage.url(second), "/media/students/2/logo.png")
+
+    def test_names_stay_unique(self):
+        first = self.storage.save("students/1/logo.png", ContentFile(b"same bytes"))
+        second = self.storage.save("students/1/logo.png", ContentFile(b"same bytes"))
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.storage.reference_count(first), 2)
+
+    def test_blob_is_removed_with_its_last_name(self):
+        first = self.storage.save("students/1/logo.png", ContentFile(b"same bytes"))
+        second = self.storage.save("students/2/logo.png", ContentFile(b"same bytes"))
+
+        self.storage.delete(first)
+        self.assertEqual(len(self.blobs()), 1)
+        self.assertEqual(self.storage.reference_count(second), 1)
+
+        self.storage.delete(second)
+        self.assertEqual(self.blobs(), [])
+        self.assertFalse(self.storage.exists(second))
+
+    def test_plain_files_are_deleted_as_before(self):
+        path = os.path.join(self.location, "default", "profile.png")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as legacy:
+            legacy.write(b"legacy")
+
+        self.storage.delete("default/profile.png")
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_blob_permissions_follow_the_umask(self):
+        name = self.storage.save("students/1/logo.png", ContentFile(b"same bytes"))
+        umask = os.umask(0)
+        os.umask(umask)
+
+        self.assertEqual(os.stat(self.storage.path(name)).st_mode & 0o777, 0o666 & ~umask)
+
+    def test_plain_copy_leaves_no_blob_behind(self):
+        shared = self.storage.save("students/1/logo.png", ContentFile(b"same bytes"))
+
+        with mock.patch("account.storage.os.link", side_effect=OSError(errno.EXDEV, "cross-device link")):
+            copy = self.storage.save("students/2/logo.png", ContentFile(b"other bytes"))
+            second = self.storage.save("students/3/logo.png", ContentFile(b"same bytes"))
+
+        self.assertEqual(len(self.blobs()), 1)  # the one still linked to `shared`
+        with self.storage.open(copy) as stored:
+            self.assertEqual(stored.read(), b"other bytes")
+        self.assertEqual(self.storage.reference_count(second), 1)
@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+from account.throttling import IPThrottle
+
+
+RATES = {
+    'signup_ip': '1/min',
+    'signup_identifier': '5/min',
+    'resend_activation_ip': '5/min',
+    'resend_activation_identifier': '1/min',
+    'availability_ip': '2/min',
+    'login_ip': '5/min',
+    'login_identifier': '2/min',
+}
+
+
+class FakeClockThrottle(IPThrottle):
+    rate = '3/min'
+    scope = 'test'
+    now = 1_200_020.0  # 20 seconds into a window
+
+    def timer(self):
+        return FakeClockThrottle.now
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        FakeClockThrottle.now = 1_200_020.0
+        self.request = APIRequestFactory().get("/")
+
+    def attempt(self):
+        throttle = FakeClockThrottle()
+        return throttle.allow_request(self.request, None), throttle
+
+    def test_limit_within_a_window(self):
+        self.assertEqual([self.attempt()[0] for _ in range(4)], [True, True, True, False])
+
+        _, throttle = self.attempt()
+        # Full window: wait for the next one plus nothing more, 40 seconds.
+        self.assertAlmostEqual(throttle.wait(), 40)
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.attempt()
+
+        FakeClockThrottle.now += 50  # 10 seconds into the next window: 5/6 overlap
+        allowed, throttle = self.attempt()
+        self.assertTrue(allowed)  # 3 * 5/6 = 2.5 < 3
+
+        allowed, throttle = self.attempt()
+        self.assertFalse(allowed)  # 2.5 + 1 >= 3
+        # 3 * (1 - (10 + t) / 60) + 1 < 3 once t > 10.
+        self.assertAlmostEqual(throttle.wait(), 10)
+
+        FakeClockThrottle.now += 11
+        self.assertTrue(self.attempt()[0])
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES})
+class EndpointThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_signup_is_limited_by_ip(self):
+        url = reverse("customuser-list")
+        self.assertNotEqual(self.client.post(url, {}).status_code, 429)
+
+        response = self.client.post(url, {})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_login_is_limited_by_username_across_ips(self):
+        url = reverse("login")
+        for address in ("10.0.0.1", "10.0.0.2"):
+            response = self.client.post(url, {"username": "0932833810", "password": "x"}, REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, {"username": "0932833810", "password": "x"}, REMOTE_ADDR="10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["Retry-After"]), 0)
+
+        response = self.client.post(url, {"username": "7966299813", "password": "x"}, REMOTE_ADDR="10.0.0.3")
+        self.assertEqual(response.status_code, 400)
+
+    def test_signup_is_limited_by_each_identifier(self):
+        url = reverse("customuser-list")
+        # A new username and address every time, the same email.
+        for number in range(5):
+            response = self.client.post(
+                url, {"username": f"{number:010d}", "email": "a@bb.com"}, REMOTE_ADDR=f"10.0.1.{number}"
+            )
+            self.assertNotEqual(response.status_code, 429)
+
+        response = self.client.post(url, {"username": "0000000009", "email": "a@bb.com"}, REMOTE_ADDR="10.0.1.9")
+        self.assertEqual(response.status_code, 429)
+
+    def test_resend_activation_is_limited_by_email(self):
+        url = reverse("customuser-resend-activation")
+        self.assertNotEqual(self.client.post(url, {"email": "a@bb.com"}).status_code, 429)
+
+        self.assertEqual(self.client.post(url, {"email": "A@bb.com "}).status_code, 429)
+        self.assertNotEqual(self.client.post(url, {"email": "b@bb.com"}).status_code, 429)
+
+    def test_availability_is_limited_by_ip(self):
+        url = reverse("customuser-availability")
+        for username in ("0932833810", "7966299813"):
+            self.assertEqual(self.client.get(url, {"username": username}).status_code, 200)
+
+        self.assertEqual(self.client.get(url, {"username": "5116168395"}).status_code, 429)
+        response = self.client.get(url, {"username": "5116168395"}, REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,83 @@
+import io
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APITestCase
+from account.models import CustomUser, Student
+from account.uploads import jpeg_dimensions, png_dimensions, upload_stats
+
+
+def image_file(name, size, image_format, **options):
+    output = io.BytesIO()
+    Image.new("1" if image_format == "PNG" else "RGB", size).save(output, image_format, **options)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+class HeaderParsingTests(SimpleTestCase):
+    def test_png(self):
+        header = image_file("a.png", (300, 200), "PNG").read()[:24]
+        self.assertEqual(png_dimensions(header), (300, 200))
+        self.assertIsNone(png_dimensions(header[:20]))
+
+    def test_jpeg_skips_metadata_segments(self):
+        exif = Image.Exif()
+        exif[0x010E] = "x" * 5000  # ImageDescription, a large APP1 segment before the frame
+        data = image_file("a.jpg", (300, 200), "JPEG", exif=exif.tobytes()).read()
+
+        self.assertEqual(jpeg_dimensions(data), (300, 200))
+        self.assertIsNone(jpeg_dimensions(data[:4000]))
+
+    def test_jpeg_garbage(self):
+        with self.assertRaises(ValueError):
+            jpeg_dimensions(b"\xff\xd8\xff\xe0\x00\x04ab" + b"junk")
+
+
+@override_settings(IMAGE_UPLOAD_MAX_SIZE=100_000, IMAGE_UPLOAD_MAX_PIXELS=1_000_000)
+class ImageUploadHandlerTests(APITestCase):
+    url = reverse("customuser-me")
+
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            is_active=True,
+        )
+        Student.objects.create(user=user)
+        self.client.force_authenticate(user)
+
+    def upload(self, upload, field="avatar"):
+        return self.client.patch(self.url, {"first_name": "تست", field: upload}, format="multipart")
+
+    def test_oversized_upload_is_stopped(self):
+        data = image_file("big.png", (300, 200), "PNG").read() + b"\0" * 300_000
+        response = self.upload(SimpleUploadedFile("big.png", data))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("avatar", response.data["detail"])
+        self.assertEqual(upload_stats()["too_large"], 1)
+
+    def test_format_comes_from_the_content(self):
+        response = self.upload(SimpleUploadedFile("photo.png", b"GIF89a" + b"\0" * 100))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(upload_stats()["bad_format"], 1)
+
+    def test_dimensions_are_read_from_the_header(self):
+        # Tiny on disk (1 bit, compressed), but 4 megapixels.
+        response = self.upload(image_file("wide.png", (2000, 2000), "PNG"), field="student-0-avatar")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(upload_stats()["too_many_pixels"], 1)
+
+    def test_valid_images_and_other_files_pass(self):
+        self.assertEqual(self.upload(image_file("a.jpg", (300, 200), "JPEG")).status_code, 200)
+        self.assertEqual(self.upload(SimpleUploadedFile("notes.txt", b"x" * 200_000), field="document").status_code, 200)
+
+        self.assertEqual(upload_stats()["accepted"], 1)
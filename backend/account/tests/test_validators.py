@@ -1,3 +1,4 @@
+import random
 from django.test import TestCase
 from account.validators import (PhoneNumberValidator,
                                 NationalCodeValidator,
@@ -177,4 +178,41 @@ class ImageExtensionTest(TestCase):
 
 
     def _create_temp_img(self, ext: str):
-        return SimpleUploadedFile(name=f"test{ext}", content=b"", content_type=f"image/{ext[1:]}")
\ No newline at end of file
+        return SimpleUploadedFile(name=f"test{ext}", content=b"", content_type=f"image/{ext[1:]}")
+
+class UsernameValidatorBatchTest(TestCase):
+    def setUp(self):
+        self.validator = UsernameValidator()
+
+    def test_validate_many_codes(self):
+        """Test the per-row result codes of the batch validator."""
+        values = ["0932833810", "10103765178", "1234567890", "12563254306", "123456", "abcdefghij", "0932833۸۱0"]
+        expected = [
+            UsernameValidator.VALID,
+            UsernameValidator.VALID,
+            UsernameValidator.INVALID_CHECKSUM,
+            UsernameValidator.INVALID_CHECKSUM,
+            UsernameValidator.INVALID_LENGTH,
+            UsernameValidator.NOT_NUMERIC,
+            UsernameValidator.VALID,
+        ]
+        self.assertEqual(self.validator.validate_many(values).tolist(), expected)
+
+    def test_validate_many_matches_scalar(self):
+        """Test that the batch validator gives the same verdicts as the scalar one."""
+        rng = random.Random(1404)
+        values = ["".join(rng.choices("0123456789", k=rng.choice((9, 10, 11, 12)))) for _ in range(5000)]
+        values += ["12345a7890", "1234 678901", ""]
+
+        codes = self.validator.validate_many(values)
+        for value, code in zip(values, codes):
+            try:
+                self.validator(value)
+                is_valid = True
+            except ValidationError:
+                is_valid = False
+
+            self.assertEqual(is_valid, code == UsernameValidator.VALID, value)
+
+    def test_validate_many_empty(self):
+        self.assertEqual(len(self.validator.validate_many([])), 0)
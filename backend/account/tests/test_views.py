@@ -0,0 +1,173 @@
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from account.cache import USER_VERSION_TIMEOUT, version_key
+from account.models import CustomUser, Institute, Student
+
+
+class CustomUserViewSetTests(APITestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(
+            username="1234567891",
+            email="staff@bb.com",
+            first_name="تست",
+            last_name="ادمین",
+            phone_number="09991113344",
+            is_staff=True,
+            is_active=True,
+        )
+        self.client.force_authenticate(self.staff)
+
+    def _create_users(self, count, start=0):
+        for i in range(start, start + count):
+            role = "S" if i % 2 else "I"
+            user = CustomUser.objects.create_user(
+                username=f"{i:010d}",
+                email=f"user{i}@bb.com",
+                first_name="تست",
+                last_name="کاربر",
+                phone_number=f"09{i:09d}",
+                role=role,
+            )
+            if role == "S":
+                Student.objects.create(user=user, bio=f"bio {i}")
+            else:
+                Institute.objects.create(user=user, institute_name=f"موسسه {i}")
+
+    def test_list_query_count_is_constant(self):
+        """The user list costs the same number of queries regardless of its size."""
+        url = reverse("customuser-list")
+        self._create_users(3)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        self._create_users(20, start=3)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data["results"]), 20)
+
+    def test_retrieve_query_count(self):
+        self._create_users(2)
+        student = CustomUser.objects.get(username="0000000001")
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("customuser-detail", args=[student.pk]))
+
+        self.assertEqual(response.data["student"]["bio"], "bio 1")
+
+    def test_only_matching_profile_is_serialized(self):
+        self._create_users(2)
+        response = self.client.get(reverse("customuser-list"))
+        users = {user["username"]: user for user in response.data["results"]}
+
+        self.assertIn("institute", users["0000000000"])
+        self.assertNotIn("student", users["0000000000"])
+        self.assertIn("student", users["0000000001"])
+        self.assertNotIn("institute", users["0000000001"])
+        # Staff without a role keep both keys, as before.
+        self.assertIsNone(users["1234567891"]["student"])
+        self.assertIsNone(users["1234567891"]["institute"])
+
+
+class CurrentUserCacheTests(APITestCase):
+    url = reverse("customuser-me")
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username="0932833810",
+            email="aaaa@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551212",
+            role="S",
+            is_active=True,
+        )
+        self.student = Student.objects.create(user=self.user, bio="bio")
+        self.client.force_authenticate(self.user)
+
+    def test_warm_response_costs_no_queries(self):
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.data["student"]["bio"], "bio")
+
+    def test_serializer_update_invalidates(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {"first_name": "سارا", "student": {"bio": "new"}}, format="json")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["first_name"], "سارا")
+        self.assertEqual(response.data["student"]["bio"], "new")
+
+    def test_profile_save_invalidates(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.bio = "admin edit"
+            self.student.save()
+
+        self.assertEqual(self.client.get(self.url).data["student"]["bio"], "admin edit")
+
+    def test_save_before_commit_is_not_cached_as_current(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.last_name = "اسدی"
+            self.user.save()
+        # Rebuilt and cached before the version moved on ...
+        self.client.get(self.url)
+        for callback in callbacks:
+            callback()
+
+        # ... so it is not served once the change is committed.
+        self.assertEqual(self.client.get(self.url).data["last_name"], "اسدی")
+
+    def test_built_from_the_database_not_request_user(self):
+        # request.user as a token cache filled between a save and its commit holds it.
+        stale = CustomUser.objects.get(pk=self.user.pk)
+        CustomUser.objects.filter(pk=self.user.pk).update(last_name="اسدی")
+        self.client.force_authenticate(stale)
+
+        self.assertEqual(self.client.get(self.url).data["last_name"], "اسدی")
+
+    def test_user_versions_expire(self):
+        key = version_key(f"user:{self.user.pk}")
+        later = time.time() + USER_VERSION_TIMEOUT + 1
+
+        self.client.get(self.url)  # seeds the version
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertIsNone(cache.get(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.bio = "edit"
+            self.student.save()  # bumps it
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertIsNone(cache.get(key))
+            # An expired version only means a rebuild.
+            self.assertEqual(self.client.get(self.url).data["student"]["bio"], "edit")
+
+    def test_bulk_activation_invalidates(self):
+        inactive = CustomUser.objects.create_user(
+            username="7966299813",
+            email="bbbb@bb.com",
+            first_name="تست",
+            last_name="کاربر",
+            phone_number="09395551213",
+            role="S",
+        )
+        self.client.force_authenticate(inactive)
+        self.assertIsNone(self.client.get(self.url).data["student"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(pk=inactive.pk).activate()
+
+        self.client.force_authenticate(CustomUser.objects.get(pk=inactive.pk))
+        self.assertIsNotNone(self.client.get(self.url).data["student"])
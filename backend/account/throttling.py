@@ -0,0 +1,125 @@
+"""
+Sliding window rate limits for the expensive anonymous endpoints: signup (users/),
+resend_activation and token/login, and for users/availability, which would otherwise
+let anyone enumerate registered national codes, emails and phone numbers.
+
+Each of the first three is limited twice, by client IP and by the account identifier in the
+request body, so neither one address nor many addresses can hammer one account.
+Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], keyed by each class's scope.
+Throttled responses carry a Retry-After header (set by DRF from wait()).
+"""
+import hashlib
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter: one counter per fixed window in the shared cache, with
+    the previous window's count weighted by how much of it still overlaps the last
+    `duration` seconds. Two keys per check and an atomic incr per allowed request,
+    instead of SimpleRateThrottle's read-modify-write of a timestamp list.
+    """
+    def get_rate(self):
+        # Read at request time rather than import time, so setting changes apply.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_cache_keys(self, request, view):
+        """The counters a request is checked against and, if allowed, counted in."""
+        key = self.get_cache_key(request, view)
+        return [] if key is None else [key]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        keys = self.get_cache_keys(request, view)
+        if not keys:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        windows = [(f"{key}:{int(window) - 1}", f"{key}:{int(window)}") for key in keys]
+
+        counts = self.cache.get_many([window_key for pair in windows for window_key in pair])
+        for previous_key, current_key in windows:
+            self.previous = counts.get(previous_key, 0)
+            self.current = counts.get(current_key, 0)
+            if self.previous * (1 - self.elapsed / self.duration) + self.current >= self.num_requests:
+                return self.throttle_failure()
+
+        for _, current_key in windows:
+            self.cache.add(current_key, 0, 2 * self.duration)
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, 2 * self.duration)
+        return True
+
+    def wait(self):
+        remaining = self.duration - self.elapsed
+        if self.current >= self.num_requests:
+            # Over the limit within this window alone: wait for the next window, then
+            # until this window's weight has dropped far enough.
+            return remaining + self.duration * (1 - self.num_requests / self.current)
+        if not self.previous:
+            return remaining
+        # The previous window's weight has to drop until the estimate is under the rate.
+        wait = self.duration * (1 - (self.num_requests - self.current) / self.previous) - self.elapsed
+        return max(0, min(wait, remaining))
+
+
+class IPThrottle(SlidingWindowThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class IdentifierThrottle(SlidingWindowThrottle):
+    """
+    Limits by every one of `identifier_fields` present in the request body, with one
+    counter per field, so varying one field does not reset the limit of the others.
+    """
+    identifier_fields = ()
+
+    def get_cache_keys(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        keys = []
+        for field in self.identifier_fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                ident = hashlib.md5(f"{field}:{value.strip().lower()}".encode()).hexdigest()
+                keys.append(self.cache_format % {'scope': self.scope, 'ident': ident})
+        return keys
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignupIdentifierThrottle(IdentifierThrottle):
+    scope = 'signup_identifier'
+    identifier_fields = ('username', 'email', 'phone_number')
+
+
+class ResendActivationIPThrottle(IPThrottle):
+    scope = 'resend_activation_ip'
+
+
+class ResendActivationIdentifierThrottle(IdentifierThrottle):
+    scope = 'resend_activation_identifier'
+    identifier_fields = ('email',)
+
+
+class AvailabilityIPThrottle(IPThrottle):
+    scope = 'availability_ip'
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class LoginIdentifierThrottle(IdentifierThrottle):
+    scope = 'login_identifier'
+    identifier_fields = ('username',)
@@ -0,0 +1,182 @@
+"""
+Streaming checks for profile image uploads (avatar and logo fields), run while the
+multipart body is read instead of after the whole file has been stored.
+
+ImageUploadHandler sits first in FILE_UPLOAD_HANDLERS and passes every chunk on to the
+storing handlers, watching the image fields only:
+- the upload is stopped as soon as it passes IMAGE_UPLOAD_MAX_SIZE bytes, without
+  reading the rest of the body;
+- the format is taken from the magic bytes of the first chunk (PNG or JPEG, whatever
+  the file name says);
+- the dimensions are read from the PNG IHDR chunk or the JPEG SOF segment, so an image
+  over IMAGE_UPLOAD_MAX_PIXELS is refused without being decoded.
+
+A refused upload ends the parse with UploadRejected, which DRF reports as a 400 parse
+error. Outcomes are counted in the shared cache; see upload_stats().
+"""
+import re
+import struct
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+
+# Outcomes counted by upload_stats().
+ACCEPTED = 'accepted'
+TOO_LARGE = 'too_large'
+BAD_FORMAT = 'bad_format'
+TOO_MANY_PIXELS = 'too_many_pixels'
+UNREADABLE = 'unreadable'
+OUTCOMES = (ACCEPTED, TOO_LARGE, BAD_FORMAT, TOO_MANY_PIXELS, UNREADABLE)
+
+# Give up looking for the dimensions after this many bytes (EXIF and ICC segments come
+# first in a JPEG and can be large).
+HEADER_LIMIT = 256 * 1024
+
+# The avatar/logo field, also inside admin inline prefixes ("student-0-avatar") and
+# nested names ("student.avatar", "student[avatar]").
+IMAGE_FIELD_NAME = re.compile(r'(?:^|[-_.\[])(?:avatar|logo)\]?$')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+# Start of frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range but are not frames.
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field.
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+class UploadRejected(MultiPartParserError):
+    def __init__(self, field_name, outcome, message):
+        super().__init__(f"{field_name}: {message}")
+        self.field_name = field_name
+        self.outcome = outcome
+
+
+def _stat_key(outcome):
+    return f"account:uploads:{outcome}"
+
+
+def record_outcome(outcome):
+    key = _stat_key(outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def upload_stats():
+    """Counts of accepted and refused image uploads, per outcome, across processes."""
+    found = cache.get_many([_stat_key(outcome) for outcome in OUTCOMES])
+    return {outcome: found.get(_stat_key(outcome), 0) for outcome in OUTCOMES}
+
+
+def sniff_format(header):
+    if header.startswith(PNG_SIGNATURE):
+        return 'png'
+    if header.startswith(JPEG_SIGNATURE):
+        return 'jpeg'
+    return None
+
+
+def png_dimensions(header):
+    # Signature, then the IHDR chunk: length, type, width, height.
+    if len(header) < 24:
+        return None
+    if header[12:16] != b'IHDR':
+        raise ValueError("PNG without an IHDR chunk")
+    return struct.unpack('>II', header[16:24])
+
+
+def jpeg_dimensions(header):
+    """Walk the JPEG segments up to the first start of frame; None if more bytes are needed."""
+    position = 2
+    while True:
+        # Markers may be preceded by any number of 0xFF fill bytes.
+        start = position
+        while position < len(header) and header[position] == 0xFF:
+            position += 1
+        if position >= len(header):
+            return None
+        if position == start:
+            raise ValueError("JPEG marker expected")
+
+        marker = header[position]
+        position += 1
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == 0xDA:
+            raise ValueError("JPEG scan data before a frame header")
+        if position + 2 > len(header):
+            return None
+        (length,) = struct.unpack('>H', header[position:position + 2])
+        if marker in JPEG_SOF_MARKERS:
+            if position + 7 > len(header):
+                return None
+            height, width = struct.unpack('>HH', header[position + 3:position + 7])
+            return width, height
+        position += length
+
+
+DIMENSION_READERS = {'png': png_dimensions, 'jpeg': jpeg_dimensions}
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Pass-through handler enforcing the size, format and dimension limits above."""
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.checking = bool(IMAGE_FIELD_NAME.search(field_name))
+        self.header = b''
+        self.format = None
+        self.dimensions = None
+
+    def reject(self, outcome, message):
+        record_outcome(outcome)
+        raise UploadRejected(self.field_name, outcome, message)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.checking:
+            return raw_data
+
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(TOO_LARGE, f"Image files may be at most {settings.IMAGE_UPLOAD_MAX_SIZE} bytes.")
+
+        if self.dimensions is None:
+            self.header += raw_data
+            self.inspect_header(complete=False)
+        return raw_data
+
+    def inspect_header(self, complete):
+        if self.format is None:
+            if len(self.header) < len(PNG_SIGNATURE) and not complete:
+                return
+            self.format = sniff_format(self.header)
+            if self.format is None:
+                self.reject(BAD_FORMAT, "Upload a PNG or JPEG image.")
+
+        try:
+            self.dimensions = DIMENSION_READERS[self.format](self.header)
+        except (ValueError, struct.error):
+            self.reject(UNREADABLE, "The image header could not be read.")
+
+        if self.dimensions is None:
+            if complete or len(self.header) > HEADER_LIMIT:
+                self.reject(UNREADABLE, "The image header could not be read.")
+            return
+
+        self.header = b''
+        width, height = self.dimensions
+        if not width or not height:
+            self.reject(UNREADABLE, "The image has no size.")
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            self.reject(TOO_MANY_PIXELS, f"Images may have at most {settings.IMAGE_UPLOAD_MAX_PIXELS} pixels.")
+
+    def file_complete(self, file_size):
+        if self.checking:
+            if self.dimensions is None:
+                self.inspect_header(complete=True)
+            record_outcome(ACCEPTED)
+        # The storing handlers after this one build the UploadedFile.
+        return None
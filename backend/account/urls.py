@@ -0,0 +1,18 @@
+from django.urls import re_path
+from djoser.views import TokenDestroyView
+from rest_framework.routers import DefaultRouter
+from . import async_views
+from .views import CustomUserViewSet, ThrottledTokenCreateView
+
+
+router = DefaultRouter()
+router.register('users', CustomUserViewSet)
+
+urlpatterns = router.urls + [
+    re_path(r"^token/login/?$", ThrottledTokenCreateView.as_view(), name="login"),
+    re_path(r"^token/logout/?$", TokenDestroyView.as_view(), name="logout"),
+    # Async versions of the hot endpoints, for ASGI deployments (see account.async_views).
+    re_path(r"^async/token/login/?$", async_views.token_login, name="async-login"),
+    re_path(r"^async/users/me/?$", async_views.me, name="async-me"),
+    re_path(r"^async/users/activation/?$", async_views.activation, name="async-activation"),
+]
@@ -1,11 +1,42 @@
+import hashlib
+import posixpath
+
+
+# Role -> top directory of the users' uploaded images.
+IMAGE_DIRECTORIES = {'S': 'students', 'I': 'institutes'}
+
+
 def default_file_path():
     return "default/profile_256x256.png"
 
+def image_directory(role, username):
+    """
+    Directory of a user's uploaded images, fanned out by a hash of the username
+    (students/ab/cd/<username>) so no directory holds more than 256 others.
+    """
+    digest = hashlib.sha256(username.encode()).hexdigest()
+    return posixpath.join(IMAGE_DIRECTORIES.get(role, ''), digest[:2], digest[2:4], username)
+
 def get_image_file_path(self, filename):
-    base_path = ''
-    if self.user.role == 'S':
-        base_path += "students/"
-    elif self.user.role == 'I':
-        base_path += "institutes/"
+    return f"{image_directory(self.user.role, self.user.username)}/{filename}"
+
+# Arabic code points that have a different Persian counterpart.
+PERSIAN_TRANSLATION = str.maketrans({
+    "ي": "ی",  # Arabic yeh -> Persian yeh
+    "ى": "ی",  # Alef maksura -> Persian yeh
+    "ك": "ک",  # Arabic kaf -> Keheh
+    "ة": "ه",  # Teh marbuta -> Heh
+    "ـ": None,      # Tatweel
+    "‌": " ",       # Zero-width non-joiner
+    **{chr(code): None for code in range(0x064b, 0x0653)},  # Harakat
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+})
+
 
-    return f"{base_path}/{self.user.username}/{filename}"
\ No newline at end of file
+def normalize_persian(text):
+    """
+    Canonical form of a name for searching: Persian letters and ASCII digits,
+    lowercase, single spaces.
+    """
+    return " ".join(text.translate(PERSIAN_TRANSLATION).lower().split())
@@ -43,6 +43,18 @@ class NationalCodeValidator:
             if 11 - reminder != control_digit:
                 raise ValidationError(self.message_invalid, params={'value': value})
 
+    @staticmethod
+    def check_many(digits):
+        """
+            Vectorized checksum over an (n, 10) matrix of digits.
+            Returns a boolean mask of the rows that pass the National Code algorithm.
+        """
+        import numpy as np
+
+        control_digit = digits[:, -1]
+        reminder = digits[:, :9] @ np.arange(10, 1, -1) % 11
+        return np.where(reminder < 2, reminder == control_digit, 11 - reminder == control_digit)
+
 
 class NationalIdValidator:
     """
@@ -76,6 +88,22 @@ class NationalIdValidator:
         if reminder != control_digit:
             raise ValidationError(self.message_invalid, params={'value': value})
 
+    @staticmethod
+    def check_many(digits):
+        """
+            Vectorized checksum over an (n, 11) matrix of digits.
+            Returns a boolean mask of the rows that pass the National ID algorithm.
+        """
+        import numpy as np
+
+        control_digit = digits[:, -1]
+        d = digits[:, -2:-1] + 2
+        total = (digits[:, :10] + d) @ np.tile((29, 27, 23, 19, 17), 2)
+
+        reminder = total % 11
+        reminder[reminder == 10] = 0
+        return reminder == control_digit
+
 
 @deconstructible
 class UsernameValidator:
@@ -84,6 +112,13 @@ class UsernameValidator:
         based on the input length (National Code vs. National ID).
     """
     message_invalid = _("%(value)s must be either 10 digit long (national Code) or 11 digit long (national ID).")
+
+    # Per-row result codes returned by validate_many().
+    VALID = 0
+    INVALID_LENGTH = 1
+    NOT_NUMERIC = 2
+    INVALID_CHECKSUM = 3
+
     def __init__(self):
         self.code_validator = NationalCodeValidator()
         self.id_validator = NationalIdValidator()
@@ -99,6 +134,49 @@ class UsernameValidator:
         else:
             raise ValidationError(self.message_invalid, params={'value': value})
 
+    def validate_many(self, values):
+        """
+            Batch counterpart of __call__ for re-audits and enrollment files.
+
+            Returns an int8 array with one result code per value (VALID, INVALID_LENGTH,
+            NOT_NUMERIC or INVALID_CHECKSUM), giving the same verdicts as calling the
+            validator on each value. ASCII rows are checked as fixed-width digit matrices;
+            the rare non-ASCII rows (e.g. Persian digits) go through the scalar validators.
+        """
+        # Imported here: models import this module, and only the batch mode needs numpy.
+        import numpy as np
+
+        values = list(values)
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        ascii_rows = np.fromiter((value.isascii() for value in values), dtype=bool, count=len(values))
+        codes = np.full(len(values), self.INVALID_LENGTH, dtype=np.int8)
+
+        for width, validator in ((10, self.code_validator), (11, self.id_validator)):
+            rows = np.flatnonzero((lengths == width) & ascii_rows)
+            if rows.size:
+                buffer = "".join([values[i] for i in rows]).encode("ascii")
+                # Anything outside '0'-'9' wraps around to a value above 9.
+                digits = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, width) - ord("0")
+                numeric = (digits <= 9).all(axis=1)
+
+                codes[rows] = self.NOT_NUMERIC
+                valid = validator.check_many(digits[numeric].astype(np.int64))
+                codes[rows[numeric]] = np.where(valid, self.VALID, self.INVALID_CHECKSUM)
+
+            for i in np.flatnonzero((lengths == width) & ~ascii_rows):
+                codes[i] = self._scalar_code(validator, values[i])
+
+        return codes
+
+    def _scalar_code(self, validator, value):
+        try:
+            validator(value)
+        except ValidationError as e:
+            if e.message is validator.message_numeric:
+                return self.NOT_NUMERIC
+            return self.INVALID_CHECKSUM
+        return self.VALID
+
 phone_number_validator = PhoneNumberValidator()
 username_validator = UsernameValidator()
 image_file_extension_validator = validators.FileExtensionValidator(allowed_extensions=["jpg", "jpeg", "png"])
\ No newline at end of file
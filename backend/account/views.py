@@ -1,3 +1,143 @@
-from django.shortcuts import render
+from django.db import router, transaction
+from djoser.views import TokenCreateView, UserViewSet
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from .availability import AVAILABILITY_FIELDS, index as availability_index
+from .cache import get_user_representation
+from .models import CustomUser
+from .pagination import UserCursorPagination
+from .routers import pin_to_primary
+from .serializers import UserBulkActivationSerializer
+from .throttling import (
+    AvailabilityIPThrottle, LoginIdentifierThrottle, LoginIPThrottle,
+    ResendActivationIdentifierThrottle, ResendActivationIPThrottle, SignupIdentifierThrottle,
+    SignupIPThrottle,
+)
 
-# Create your views here.
+
+class CustomUserViewSet(UserViewSet):
+    """
+    djoser's UserViewSet with the role profiles joined into the user query and
+    keyset pagination on the list, so every page costs a fixed number of queries.
+    """
+    queryset = CustomUser.objects.select_related('institute', 'student')
+    pagination_class = UserCursorPagination
+    # Actions that look up a user created moments before, in an earlier request (the
+    # activation link right after signup); a lagging replica would answer "Invalid uid".
+    primary_read_actions = {"activation", "resend_activation", "reset_password", "reset_password_confirm"}
+    throttle_classes_by_action = {
+        "create": [SignupIPThrottle, SignupIdentifierThrottle],
+        "resend_activation": [ResendActivationIPThrottle, ResendActivationIdentifierThrottle],
+        "availability": [AvailabilityIPThrottle],
+    }
+    # Actions that change a user and queue an email about it (account.mailqueue): both
+    # are committed, or neither.
+    atomic_actions = {
+        "create", "activation", "set_password", "reset_password_confirm",
+        "set_username", "reset_username_confirm",
+    }
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.action_map.get(request.method.lower()) not in self.atomic_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if self.action in self.atomic_actions:
+            # The error became a response inside the atomic block; undo its writes.
+            transaction.set_rollback(True)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        if self.action in self.primary_read_actions:
+            pin_to_primary()
+        super().initial(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "search":
+            queryset = queryset.search(self.request.query_params.get("q", ""))
+
+        return queryset
+
+    def get_throttles(self):
+        throttle_classes = self.throttle_classes_by_action.get(self.action, self.throttle_classes)
+        return [throttle() for throttle in throttle_classes]
+
+    def get_serializer_class(self):
+        if self.action == "bulk_activation":
+            return UserBulkActivationSerializer
+
+        return super().get_serializer_class()
+
+    @action(["get", "put", "patch", "delete"], detail=False)
+    def me(self, request, *args, **kwargs):
+        """
+        Override: GET is answered from the per-user representation cache
+        (account.cache.get_user_representation); writes go through djoser.
+        """
+        if request.method != "GET":
+            return super().me(request, *args, **kwargs)
+
+        def build():
+            # Not request.user: it may come from the token cache or a replica, and an
+            # entry built from a stale copy would be served under the current version.
+            user = self.get_queryset().using(router.db_for_write(CustomUser)).get(pk=request.user.pk)
+            return self.get_serializer(user).data
+
+        data = get_user_representation(request.user.pk, request.build_absolute_uri("/"), build)
+        return Response(data)
+
+    @action(["post"], detail=False, permission_classes=[IsAdminUser])
+    def bulk_activation(self, request, *args, **kwargs):
+        """
+        Staff only: activate the given user ids in one transaction and report how many changed.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        activated = CustomUser.objects.filter(pk__in=serializer.validated_data["ids"]).activate()
+
+        return Response({"activated": activated})
+
+    @action(["get"], detail=False, permission_classes=[IsAdminUser])
+    def search(self, request, *args, **kwargs):
+        """
+        Staff only: paginated user list filtered by ?q= (see CustomUserQuerySet.search).
+        """
+        return self.list(request, *args, **kwargs)
+
+    @action(["get"], detail=False, permission_classes=[AllowAny])
+    def availability(self, request, *args, **kwargs):
+        """
+        Whether the given ?username=, ?email= and/or ?phone_number= are still free, e.g.
+        {"email": true}. Most free values are answered by the in-process filter
+        (account.availability) without a query. Limited per client IP, as it tells
+        whether an account exists.
+        """
+        values = {
+            field: request.query_params[field].strip()
+            for field in AVAILABILITY_FIELDS
+            if request.query_params.get(field, "").strip()
+        }
+        if not values:
+            raise ValidationError({"detail": f"Pass at least one of: {', '.join(AVAILABILITY_FIELDS)}."})
+
+        taken = availability_index.taken(values)
+        return Response({field: not taken[field] for field in values})
+
+
+class ThrottledTokenCreateView(TokenCreateView):
+    """
+    djoser's token/login, rate limited by client IP and by username.
+    """
+    throttle_classes = [LoginIPThrottle, LoginIdentifierThrottle]
+
+    def initial(self, request, *args, **kwargs):
+        # The account may have been activated moments ago; check the password on the primary.
+        pin_to_primary()
+        super().initial(request, *args, **kwargs)
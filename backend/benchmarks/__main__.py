@@ -0,0 +1,58 @@
+"""
+Run the benchmark suite against an in-memory SQLite database.
+
+Usage (from the backend directory):
+    python -m benchmarks                              # report only
+    python -m benchmarks --save baseline.json         # store a baseline
+    python -m benchmarks --compare baseline.json      # exit 1 on regressions
+    python -m benchmarks -k serializer                # only matching cases
+"""
+import argparse
+import os
+import sys
+
+import django
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Account hot path benchmarks.")
+    parser.add_argument('-k', dest='keyword', help="Only run cases whose name contains this string.")
+    parser.add_argument('--save', metavar='PATH', help="Write the results as a baseline file.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare the results against a baseline file.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown (default: 0.2).")
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sodooronline.settings_sqlite')
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from . import account_paths, asgi, availability, connections, pagination, search  # noqa: F401  (registers the cases)
+    from .runner import REGISTRY, compare, measure, report, save_baseline
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        cases = [case for case in REGISTRY if not args.keyword or args.keyword in case.name]
+        results = [measure(case) for case in cases]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    report(results)
+
+    if args.save:
+        save_baseline(results, args.save)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\nRegressions against", args.compare)
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark cases for the account hot paths.
+"""
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save
+
+from account.models import CustomUser, Student
+from account.serializers import CustomUserSerializer
+from account.validators import phone_number_validator, username_validator
+
+from .fixtures import make_rows, make_user
+from .runner import benchmark
+
+
+@benchmark('username_validator', number=20_000)
+def username_validator_case():
+    return lambda: username_validator("0932833810")
+
+
+@benchmark('username_validator[10k]', number=2)
+def username_validator_rows_case():
+    rows = make_rows(10_000)
+
+    def op():
+        # Scalar counterpart of validate_many over the same rows.
+        for value in rows:
+            try:
+                username_validator(value)
+            except ValidationError:
+                pass
+    return op
+
+
+@benchmark('username_validator.validate_many[10k]', number=20)
+def validate_many_case():
+    rows = make_rows(10_000)
+    return lambda: username_validator.validate_many(rows)
+
+
+@benchmark('phone_number_validator', number=20_000)
+def phone_number_validator_case():
+    return lambda: phone_number_validator("09112322233")
+
+
+@benchmark('CustomUserManager.create_user', number=5)
+def create_user_case():
+    return lambda: make_user(password='S3cure-pass')
+
+
+@benchmark('CustomUserManager.create_user[unusable password]', number=500)
+def create_user_unusable_password_case():
+    return lambda: make_user()
+
+
+@benchmark('create_profile.activation', number=500)
+def create_profile_activation_case():
+    def op():
+        user = make_user()
+        user.is_active = True
+        user.save()
+    return op
+
+
+@benchmark('create_profile.ordinary_save', number=1_000)
+def create_profile_ordinary_save_case():
+    user = make_user(is_active=True)
+    Student.objects.get_or_create(user=user)
+
+    def op():
+        user.last_name = 'کاربر'
+        user.save()
+    return op
+
+
+@benchmark('create_profile.signal', number=1_000)
+def create_profile_signal_case():
+    user = make_user(is_active=True)
+    Student.objects.get_or_create(user=user)
+    return lambda: post_save.send(sender=CustomUser, instance=user, created=False, using='default')
+
+
+@benchmark('CustomUserSerializer.to_representation', number=1_000)
+def to_representation_case():
+    user = make_user(is_active=True)
+    Student.objects.get_or_create(user=user)
+    return lambda: CustomUserSerializer(CustomUser.objects.get(pk=user.pk)).data
+
+
+@benchmark('CustomUserSerializer.update', number=500)
+def update_case():
+    user = make_user(is_active=True)
+    Student.objects.get_or_create(user=user)
+    data = {'first_name': 'نریمان', 'student': {'bio': 'bio'}}
+
+    def op():
+        serializer = CustomUserSerializer(CustomUser.objects.get(pk=user.pk), data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    return op
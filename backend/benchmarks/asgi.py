@@ -0,0 +1,131 @@
+"""
+Load comparison of the WSGI and ASGI paths for the hot auth endpoints: a burst of
+CONCURRENCY simultaneous requests, served by the sync DRF views through the WSGI
+handler on a WSGI_THREADS thread pool (a threaded WSGI server), and by the async views
+(account.async_views) through the ASGI handler on one event loop.
+
+Both run in this process against the in-memory database, so the numbers compare the
+two request paths and their scheduling, not a deployment. Logins use a cheap PBKDF2
+hasher and throttling is switched off so the bursts measure the views themselves. The
+last_login update is switched off as well: the in-memory SQLite database refuses
+concurrent writers instead of queueing them as MySQL would.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .fixtures import make_user
+from .runner import benchmark
+
+
+CONCURRENCY = 32
+WSGI_THREADS = 8
+PASSWORD = 'Sodoor-1234'
+
+
+class BenchmarkHasher(PBKDF2PasswordHasher):
+    iterations = 10_000
+
+
+load_settings = override_settings(
+    PASSWORD_HASHERS=[f'{__name__}.BenchmarkHasher'],
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'login_ip': None, 'login_identifier': None},
+    },
+)
+
+
+@contextmanager
+def load_conditions():
+    user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+    try:
+        with load_settings:
+            yield
+    finally:
+        user_logged_in.connect(update_last_login, dispatch_uid='update_last_login')
+
+
+def make_users():
+    with load_settings:
+        users = [make_user(password=PASSWORD, is_active=True) for _ in range(CONCURRENCY)]
+    return users, [Token.objects.get_or_create(user=user)[0] for user in users]
+
+
+def wsgi_burst(requests):
+    """requests: (method, path, kwargs) tuples, sent concurrently through the WSGI handler."""
+    pool = ThreadPoolExecutor(WSGI_THREADS)
+    # One client (and handler, with its loaded middleware) per request slot, made once.
+    requests = [(Client(), *request) for request in requests]
+
+    def send(request):
+        client, method, path, kwargs = request
+        response = getattr(client, method)(path, **kwargs)
+        assert response.status_code == 200, response.content
+
+    def op():
+        with load_conditions():
+            list(pool.map(send, requests))
+
+    return op
+
+
+def asgi_burst(requests):
+    """The same, sent concurrently through the ASGI handler on one event loop."""
+    loop = asyncio.new_event_loop()
+    requests = [(AsyncClient(), *request) for request in requests]
+
+    async def send(request):
+        client, method, path, kwargs = request
+        response = await getattr(client, method)(path, **kwargs)
+        assert response.status_code == 200, response.content
+
+    async def burst():
+        await asyncio.gather(*(send(request) for request in requests))
+
+    def op():
+        with load_conditions():
+            loop.run_until_complete(burst())
+
+    return op
+
+
+def me_requests(path):
+    _, tokens = make_users()
+    return [('get', path, {'headers': {'Authorization': f'Token {token.key}'}}) for token in tokens]
+
+
+def login_requests(path):
+    users, _ = make_users()
+    return [
+        ('post', path, {'data': {'username': user.username, 'password': PASSWORD}, 'content_type': 'application/json'})
+        for user in users
+    ]
+
+
+@benchmark(f'load: users/me GET x{CONCURRENCY}, WSGI ({WSGI_THREADS} threads)', number=20)
+def me_wsgi():
+    return wsgi_burst(me_requests(reverse('customuser-me')))
+
+
+@benchmark(f'load: users/me GET x{CONCURRENCY}, ASGI async view', number=20)
+def me_asgi():
+    return asgi_burst(me_requests(reverse('async-me')))
+
+
+@benchmark(f'load: token/login x{CONCURRENCY}, WSGI ({WSGI_THREADS} threads)', number=5)
+def login_wsgi():
+    return wsgi_burst(login_requests(reverse('login')))
+
+
+@benchmark(f'load: token/login x{CONCURRENCY}, ASGI async view', number=5)
+def login_asgi():
+    return asgi_burst(login_requests(reverse('async-login')))
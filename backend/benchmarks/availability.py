@@ -0,0 +1,40 @@
+"""
+Benchmark cases for the availability filter: a full rebuild over the search fixture's
+users (paid at startup and after a lost change log), and a check for a free value
+against the three unique-index lookups it replaces.
+"""
+from account.availability import AvailabilityIndex
+from account.models import CustomUser
+
+from .runner import benchmark
+from .search import ROWS, populate
+
+
+@benchmark(f'availability filter rebuild [{ROWS // 1000}k rows]', number=2)
+def rebuild_case():
+    populate()
+    return AvailabilityIndex().rebuild
+
+
+@benchmark('availability check, free values', number=2_000)
+def filter_case():
+    populate()
+    index = AvailabilityIndex()
+    index.rebuild()
+
+    def op():
+        index.taken({'username': '7966299813', 'email': 'free@example.com', 'phone_number': '09120000000'})
+
+    return op
+
+
+@benchmark('availability check, unique index lookups (reference)', number=2_000)
+def lookup_case():
+    populate()
+
+    def op():
+        CustomUser.objects.filter(username='7966299813').exists()
+        CustomUser.objects.filter(email__iexact='free@example.com').exists()
+        CustomUser.objects.filter(phone_number='09120000000').exists()
+
+    return op
@@ -0,0 +1,64 @@
+"""
+Benchmark cases for per-request connection handling: a new connection per request
+(the stock backend with CONN_MAX_AGE = 0) against a checkout from the pool.
+
+No MySQL server runs here, so a file backed SQLite database stands in for it, with
+HANDSHAKE seconds of sleep added to every new connection to play the TCP connect,
+TLS and authentication round trips. The difference between the two cases is what
+the pool saves per request; the absolute numbers say nothing about MySQL itself.
+"""
+import atexit
+import os
+import tempfile
+import time
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from sodooronline.db.pool import PooledDatabaseWrapperMixin
+
+from .runner import benchmark
+
+
+# A handshake with a MySQL server on the local network, roughly.
+HANDSHAKE = 0.002
+
+
+class StandInWrapper(SQLiteDatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        time.sleep(HANDSHAKE)
+        return super().get_new_connection(conn_params)
+
+
+class PooledStandInWrapper(PooledDatabaseWrapperMixin, StandInWrapper):
+    pass
+
+
+def database_file():
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    atexit.register(os.remove, path)
+    return path
+
+
+def request_cycle(wrapper_class):
+    settings_dict = {**connection.settings_dict, 'NAME': database_file(), 'POOL': {'MIN_SIZE': 1}}
+    wrapper = wrapper_class(settings_dict, alias=wrapper_class.__name__)
+
+    def op():
+        # What one request does: connect, run a query, close when the request finishes.
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        wrapper.close()
+
+    return op
+
+
+@benchmark('request: new connection per request', number=200)
+def unpooled():
+    return request_cycle(StandInWrapper)
+
+
+@benchmark('request: pooled connection', number=200)
+def pooled():
+    return request_cycle(PooledStandInWrapper)
@@ -0,0 +1,41 @@
+"""
+Generators for unique, valid account data used by the benchmark cases.
+"""
+import itertools
+import random
+
+from account.models import CustomUser
+
+
+_sequence = itertools.count(100_000_000)
+
+
+def national_code(serial):
+    """Build a valid 10 digit Code-e Melli from a 9 digit serial."""
+    digits = f"{serial:09d}"
+    reminder = sum(int(d) * w for d, w in zip(digits, range(10, 1, -1))) % 11
+    return digits + str(reminder if reminder < 2 else 11 - reminder)
+
+
+def user_data(role=CustomUser.Roles.STUDENT):
+    serial = next(_sequence)
+    return {
+        'username': national_code(serial),
+        'first_name': 'تست',
+        'last_name': 'کاربر',
+        'email': f"user{serial}@example.com",
+        'phone_number': f"09{serial:09d}",
+        'role': role,
+    }
+
+
+def make_user(password=None, **extra_fields):
+    data = user_data()
+    data.update(extra_fields)
+    return CustomUser.objects.create_user(password=password, **data)
+
+
+def make_rows(count, seed=1404):
+    """Random 10/11 digit usernames, roughly what a ministry enrollment file looks like."""
+    rng = random.Random(seed)
+    return ["".join(rng.choices("0123456789", k=rng.choice((10, 11)))) for _ in range(count)]
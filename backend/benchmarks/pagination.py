@@ -0,0 +1,80 @@
+"""
+Benchmark cases for the paginated user list: keyset cursor at page 1 and page 10,000,
+against the OFFSET query the same deep page would need.
+"""
+from datetime import datetime, timedelta
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from account.models import CustomUser
+from account.pagination import UserCursorPagination
+from account.views import CustomUserViewSet
+
+from .fixtures import make_user
+from .runner import benchmark
+
+
+PAGE_SIZE = 20
+DEEP_PAGE = 10_000
+_state = {}
+
+
+def populate():
+    """Insert enough users for DEEP_PAGE pages once, shared by all pagination cases."""
+    if not _state:
+        rows = PAGE_SIZE * DEEP_PAGE + PAGE_SIZE
+        start = datetime(2020, 1, 1)
+        for offset in range(0, rows, 10_000):
+            CustomUser.objects.bulk_create([
+                CustomUser(
+                    username=f"{i:011d}",
+                    email=f"page{i}@example.com",
+                    first_name='تست',
+                    last_name='کاربر',
+                    phone_number=f"08{i:09d}",
+                    role=CustomUser.Roles.STUDENT,
+                    date_joined=start + timedelta(seconds=i // 2),
+                )
+                for i in range(offset, min(offset + 10_000, rows))
+            ])
+        _state['staff'] = make_user(is_staff=True, is_active=True, date_joined=start - timedelta(days=1))
+    return _state['staff']
+
+
+def list_view(params):
+    staff = populate()
+    view = CustomUserViewSet.as_view({'get': 'list'})
+    factory = APIRequestFactory()
+
+    def op():
+        request = factory.get('/api/v1/auth/users/', params)
+        force_authenticate(request, user=staff)
+        response = view(request)
+        assert len(response.data['results']) == PAGE_SIZE, response.data
+        return response
+    return op
+
+
+def deep_cursor():
+    """The cursor a client holds after walking to page DEEP_PAGE."""
+    user = CustomUser.objects.order_by('date_joined', 'pk')[PAGE_SIZE * (DEEP_PAGE - 1) - 1]
+    return UserCursorPagination().get_cursor_token(user)
+
+
+@benchmark('users.list keyset page 1', number=100)
+def keyset_first_page_case():
+    return list_view({'page_size': PAGE_SIZE})
+
+
+@benchmark(f'users.list keyset page {DEEP_PAGE:,}', number=100)
+def keyset_deep_page_case():
+    populate()
+    return list_view({'page_size': PAGE_SIZE, 'cursor': deep_cursor()})
+
+
+@benchmark(f'users offset page {DEEP_PAGE:,} (reference)', number=100)
+def offset_deep_page_case():
+    populate()
+    offset = PAGE_SIZE * (DEEP_PAGE - 1)
+    queryset = CustomUser.objects.select_related('institute', 'student').order_by('date_joined', 'pk')
+    return lambda: list(queryset[offset:offset + PAGE_SIZE])
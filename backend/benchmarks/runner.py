@@ -0,0 +1,109 @@
+"""
+Tiny benchmark harness: timing, allocations and query counts per operation,
+plus comparison against a stored JSON baseline.
+"""
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+REGISTRY = []
+
+
+@dataclass
+class Case:
+    name: str
+    setup: object
+    number: int
+
+
+@dataclass
+class Result:
+    name: str
+    ops_per_sec: float
+    alloc_kib: float
+    queries: int
+
+
+def benchmark(name, number=200):
+    """
+    Register a benchmark case. The decorated function prepares its fixtures
+    and returns the zero-argument callable that is measured.
+    """
+    def decorator(setup):
+        REGISTRY.append(Case(name, setup, number))
+        return setup
+    return decorator
+
+
+def measure(case, repeat=3):
+    op = case.setup()
+
+    # Warm up caches, lazy imports and prepared statements.
+    op()
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(case.number):
+            op()
+        best = min(best, time.perf_counter() - start)
+
+    # The query log is a bounded deque; clear it so the capture is not
+    # measuring a full buffer.
+    connection.queries_log.clear()
+    with CaptureQueriesContext(connection) as queries:
+        op()
+
+    tracemalloc.start()
+    try:
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=case.name,
+        ops_per_sec=case.number / best,
+        alloc_kib=peak / 1024,
+        queries=len(queries),
+    )
+
+
+def save_baseline(results, path):
+    with open(path, 'w') as f:
+        json.dump({r.name: asdict(r) for r in results}, f, indent=2, sort_keys=True)
+
+
+def compare(results, path, tolerance):
+    """
+    Compare results against a baseline file and return the list of regressions.
+    Throughput and allocations may drift by `tolerance`; query counts must not grow.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+
+        if result.ops_per_sec < previous['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f"{result.name}: {result.ops_per_sec:,.1f} ops/s, baseline {previous['ops_per_sec']:,.1f}")
+        if result.alloc_kib > previous['alloc_kib'] * (1 + tolerance):
+            regressions.append(f"{result.name}: {result.alloc_kib:,.1f} KiB allocated, baseline {previous['alloc_kib']:,.1f}")
+        if result.queries > previous['queries']:
+            regressions.append(f"{result.name}: {result.queries} queries, baseline {previous['queries']}")
+
+    return regressions
+
+
+def report(results):
+    print(f"{'benchmark':<45} {'ops/sec':>14} {'alloc KiB':>10} {'queries':>8}")
+    for r in results:
+        print(f"{r.name:<45} {r.ops_per_sec:>14,.1f} {r.alloc_kib:>10,.1f} {r.queries:>8}")
@@ -0,0 +1,57 @@
+"""
+Benchmark cases for user search: the admin's default LIKE '%term%' OR over
+search_fields against CustomUser.objects.search() on the normalized columns.
+"""
+import random
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from account.models import CustomUser
+
+from .runner import benchmark
+
+
+ROWS = 100_000
+FIRST_NAMES = ['علی', 'رضا', 'محمد', 'سارا', 'مریم', 'زهرا', 'حسین', 'نرگس', 'امیر', 'کیان']
+LAST_NAMES = ['کریمی', 'علوی', 'یکتا', 'اسدی', 'رضایی', 'محمدی', 'حسینی', 'کاظمی', 'نوری', 'صادقی']
+_state = {}
+
+
+def populate():
+    if not _state:
+        rng = random.Random(1404)
+        for offset in range(0, ROWS, 10_000):
+            users = []
+            for i in range(offset, offset + 10_000):
+                user = CustomUser(
+                    username=f"{i:09d}99",
+                    email=f"search{i}@example.com",
+                    first_name=rng.choice(FIRST_NAMES) + str(i % 997),
+                    last_name=rng.choice(LAST_NAMES) + str(i % 1009),
+                    phone_number=f"07{i:09d}",
+                    role=CustomUser.Roles.STUDENT,
+                )
+                user.normalize_search_fields()
+                users.append(user)
+            CustomUser.objects.bulk_create(users)
+        _state['ready'] = True
+
+
+def like_scan(term):
+    fields = ('username', 'first_name', 'last_name')
+    return CustomUser.objects.filter(reduce(or_, (Q(**{f"{field}__icontains": term}) for field in fields)))
+
+
+@benchmark(f'user search LIKE scan [{ROWS // 1000}k rows]', number=20)
+def like_scan_case():
+    populate()
+    return lambda: list(like_scan('کریمی12')[:20])
+
+
+@benchmark(f'user search normalized prefix [{ROWS // 1000}k rows]', number=200)
+def normalized_search_case():
+    populate()
+    # Arabic spelling of the same term; still served by the index.
+    return lambda: list(CustomUser.objects.search('كريمي12')[:20])
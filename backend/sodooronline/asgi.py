@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sodooronline.settings')
 
 application = get_asgi_application()
+
+# Build the availability filter now rather than in the first signup check.
+from account.availability import warm_up  # noqa: E402
+
+warm_up()
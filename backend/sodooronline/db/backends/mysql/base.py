@@ -0,0 +1,11 @@
+"""
+django.db.backends.mysql with pooled connections, see sodooronline.db.pool.
+"""
+from django.db.backends.mysql import base
+
+from ...pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def check_pooled_connection(self, conn):
+        conn.ping()
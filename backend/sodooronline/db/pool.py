@@ -0,0 +1,293 @@
+"""
+A small, driver independent database connection pool and the DatabaseWrapper mixin
+that plugs it into a Django backend (see sodooronline.db.backends.mysql).
+
+Django opens a connection per request and, with CONN_MAX_AGE = 0, closes it when the
+request finishes. With the mixin, "open" checks a connection out of a process wide
+pool and "close" returns it, so a request pays for a health check instead of a TCP
+and authentication handshake.
+
+Pool settings come from the "POOL" key of the DATABASES entry:
+
+    'POOL': {
+        'MIN_SIZE': 2,          # connections opened when the pool is created
+        'MAX_SIZE': 10,         # checkouts beyond this wait for a connection ...
+        'TIMEOUT': 10,          # ... this many seconds, then raise PoolTimeout
+        'MAX_LIFETIME': 1800,   # seconds before a connection is closed and replaced
+    }
+"""
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of raw DB-API connections.
+
+    `connect` opens a new connection; `check` raises (or returns False) for a connection
+    that is no longer usable and runs on every checkout of an idle connection.
+    """
+    def __init__(self, connect, check=None, min_size=0, max_size=10, timeout=10, max_lifetime=1800):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool sizes must satisfy 0 <= MIN_SIZE <= MAX_SIZE and MAX_SIZE >= 1.")
+
+        self.connect = connect
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+
+        self._lock = threading.Condition()
+        self._idle = deque()      # (connection, created_at), most recently released last
+        self._created_at = {}     # id(connection) -> created_at, for every open connection
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+
+    @property
+    def size(self):
+        return len(self._created_at)
+
+    def warm(self):
+        """Open connections until MIN_SIZE are available."""
+        while True:
+            with self._lock:
+                if self.size >= self.min_size:
+                    return
+                self._reserve()
+            self._add_idle(self._open())
+
+    def acquire(self):
+        """Return (connection, fresh): fresh is True for a newly opened connection."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        while True:
+            with self._lock:
+                while not self._idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available within {self.timeout}s "
+                            f"({self.max_size} in use)."
+                        )
+                    waited = True
+                    self._lock.wait(remaining)
+
+                if self._idle:
+                    conn, created_at = self._idle.pop()
+                    self._in_use += 1
+                else:
+                    conn = None
+                    self._reserve()
+
+            if conn is None:
+                conn = self._open()
+                fresh = True
+            elif self._usable(conn, created_at):
+                fresh = False
+            else:
+                self._discard(conn)
+                with self._lock:
+                    self._in_use -= 1
+                    self._lock.notify()
+                continue
+
+            with self._lock:
+                wait = time.monotonic() - start
+                self._checkouts += 1
+                if waited:
+                    self._waits += 1
+                    self._wait_time += wait
+                    self._max_wait = max(self._max_wait, wait)
+            return conn, fresh
+
+    def release(self, conn):
+        """Return a checked out connection, ending any transaction it left open."""
+        created_at = self._created_at.get(id(conn))
+        try:
+            conn.rollback()
+        except Exception:
+            reusable = False
+        else:
+            reusable = created_at is not None and not self._expired(created_at)
+
+        if not reusable:
+            self._discard(conn)
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((conn, created_at))
+            self._lock.notify()
+
+    def discard(self, conn):
+        """Close a checked out connection instead of returning it."""
+        self._discard(conn)
+        with self._lock:
+            self._in_use -= 1
+            self._lock.notify()
+
+    def close(self):
+        """Close every idle connection; checked out ones are closed on release."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'utilization': self._in_use / self.max_size,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': self._wait_time,
+                'wait_time_avg': self._wait_time / self._waits if self._waits else 0.0,
+                'wait_time_max': self._max_wait,
+                'timeouts': self._timeouts,
+                'opened': self._opened,
+                'discarded': self._discarded,
+            }
+
+    def _reserve(self):
+        # Hold a slot for a connection being opened outside the lock.
+        self._created_at[object()] = None
+        self._in_use += 1
+
+    def _open(self):
+        try:
+            conn = self.connect()
+        except BaseException:
+            with self._lock:
+                self._release_reservation()
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._release_reservation()
+            self._created_at[id(conn)] = time.monotonic()
+            self._opened += 1
+        return conn
+
+    def _release_reservation(self):
+        for key, created_at in self._created_at.items():
+            if created_at is None:
+                del self._created_at[key]
+                return
+
+    def _add_idle(self, conn):
+        with self._lock:
+            self._in_use -= 1
+            self._idle.append((conn, self._created_at[id(conn)]))
+            self._lock.notify()
+
+    def _expired(self, created_at):
+        return self.max_lifetime is not None and time.monotonic() - created_at >= self.max_lifetime
+
+    def _usable(self, conn, created_at):
+        if self._expired(created_at):
+            return False
+        if self.check is None:
+            return True
+        try:
+            return self.check(conn) is not False
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            if self._created_at.pop(id(conn), None) is not None:
+                self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_stats():
+    """{alias: ConnectionPool.stats()} for every pool of this process."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {alias: pool.stats() for (alias, _), pool in pools}
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixin for a Django DatabaseWrapper (put it first in the bases): connections come
+    from, and go back to, one ConnectionPool per alias and database.
+    """
+    def get_pool(self):
+        pool_settings = self.settings_dict.get('POOL', {})
+        # The test runner renames NAME; the test database gets a pool of its own.
+        key = (self.alias, self.settings_dict['NAME'])
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                conn_params = self.get_connection_params()
+                pool = _pools[key] = ConnectionPool(
+                    lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+                    check=self.check_pooled_connection,
+                    min_size=pool_settings.get('MIN_SIZE', 0),
+                    max_size=pool_settings.get('MAX_SIZE', 10),
+                    timeout=pool_settings.get('TIMEOUT', 10),
+                    max_lifetime=pool_settings.get('MAX_LIFETIME', 1800),
+                )
+                created = True
+            else:
+                created = False
+        if created:
+            pool.warm()
+        return pool
+
+    def check_pooled_connection(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        conn, self._pooled_fresh = self.get_pool().acquire()
+        return conn
+
+    def init_connection_state(self):
+        # Session settings survive in the pool; only new connections need them.
+        if self._pooled_fresh:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self.get_pool()
+        if self.in_atomic_block:
+            # Django keeps using this wrapper's connection until the atomic block
+            # exits, so it must not be handed to another thread.
+            pool.discard(self.connection)
+        else:
+            pool.release(self.connection)
@@ -0,0 +1,191 @@
+"""
+Serving of uploaded media (MEDIA_URL), replacing django.conf.urls.static.static().
+
+Every response carries validators and caching headers: a strong ETag built from the
+file's inode, modification time and size, Last-Modified, and a Cache-Control max-age
+of MEDIA_CACHE_MAX_AGE seconds. Derivatives (account.images) requested with the version
+their URLs carry (?v=) are cached for a year and marked immutable: a rewrite changes the
+version, and so the URL. If-None-Match and If-Modified-Since are answered with a 304
+without opening the file. Error responses carry no caching headers.
+
+How the bytes are sent:
+- MEDIA_ACCEL_REDIRECT set (an `internal` nginx location aliased to MEDIA_ROOT, e.g.
+  /protected-media/): the response is an X-Accel-Redirect to that location and nginx
+  sends the file, byte ranges included.
+- MEDIA_SENDFILE_HEADER set (X-Sendfile for Apache mod_xsendfile,
+  X-LIGHTTPD-send-file for lighttpd): the same, with the absolute path of the file.
+- Neither: Django answers itself with a FileResponse, which WSGI servers hand to
+  wsgi.file_wrapper (gunicorn sends it with os.sendfile()). A single byte range gets a
+  206, streamed from the requested offset; other Range headers get the whole file.
+
+Blobs (account.storage) are only reached through the names linked to them and are not
+served.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_http_methods
+
+from account.images import DERIVATIVES_DIR
+from account.storage import BLOB_DIR
+
+
+# Paths whose content never changes under the same name and version query.
+VERSIONED_PREFIXES = (f'{DERIVATIVES_DIR}/',)
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+HIDDEN_PREFIXES = (f'{BLOB_DIR}/',)
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 2**10
+
+
+def etag(file_stat):
+    # Names of deduplicated content share the blob's inode, and so its ETag.
+    return f'"{file_stat.st_ino:x}-{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single `bytes=` range, end inclusive, or None to send the whole
+    file (several ranges, other units, an invalid range). Raises ValueError if the
+    range starts past the end of the file.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # The last `last` bytes.
+        if not int(last) or not size:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class RangeFile:
+    """Read access to `length` bytes of `file` from `start`."""
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _if_range_passes(request, tag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == tag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _headers(response, file_stat, content_type, immutable=False):
+    response['Content-Type'] = content_type
+    response['ETag'] = etag(file_stat)
+    response['Last-Modified'] = http_date(file_stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if immutable:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def _stat(path):
+    try:
+        file_stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Media file not found.")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("Media file not found.")
+    return file_stat
+
+
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    if name.startswith(HIDDEN_PREFIXES):
+        raise Http404("Media file not found.")
+    fullpath = safe_join(settings.MEDIA_ROOT, name)
+    file_stat = _stat(fullpath)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    immutable = name.startswith(VERSIONED_PREFIXES) and 'v' in request.GET
+    response = _headers(HttpResponse(), file_stat, content_type, immutable)
+    conditional = get_conditional_response(
+        request, etag=response['ETag'], last_modified=int(file_stat.st_mtime), response=response
+    )
+    if conditional is not response:
+        return conditional
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # nginx and mod_xsendfile both percent-decode the value.
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + quote(name)
+        return response
+    if settings.MEDIA_SENDFILE_HEADER:
+        response[settings.MEDIA_SENDFILE_HEADER] = quote(os.path.abspath(fullpath))
+        return response
+
+    size = file_stat.st_size
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and _if_range_passes(request, response['ETag'], int(file_stat.st_mtime)):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            unsatisfiable = HttpResponse(status=416)
+            unsatisfiable['Content-Range'] = f'bytes */{size}'
+            return unsatisfiable
+
+    if request.method == 'HEAD':
+        response['Content-Length'] = size
+        return response
+
+    try:
+        file = open(fullpath, 'rb')
+    except (FileNotFoundError, IsADirectoryError):
+        raise Http404("Media file not found.")
+    if byte_range is None:
+        served = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        served = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type)
+        served.block_size = STREAM_BLOCK_SIZE
+        served['Content-Length'] = end - start + 1
+        served['Content-Range'] = f'bytes {start}-{end}/{size}'
+    for header in ('ETag', 'Last-Modified', 'Accept-Ranges', 'Cache-Control'):
+        served[header] = response[header]
+    return served
+
+
+def media_urlpatterns():
+    """URL patterns serving MEDIA_URL; none when media lives on another host."""
+    if not settings.MEDIA_URL or urlsplit(settings.MEDIA_URL).netloc:
+        return []
+    prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    return [re_path(rf'^{prefix}(?P<path>.*)$', serve_media, name='media')]
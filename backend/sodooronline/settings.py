@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'account.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,18 +84,68 @@ WSGI_APPLICATION = 'sodooronline.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'sodooronline.db.backends.mysql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
         'CHARSET': 'utf8mb4',
-        'COLLATION': 'utf8mb4_unicode_ci'
+        'COLLATION': 'utf8mb4_unicode_ci',
+        # Pooled connections, see sodooronline/db/pool.py. Keep CONN_MAX_AGE at 0:
+        # closing a connection at the end of a request returns it to the pool.
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        },
+    }
+}
+
+# Read replicas of the primary, e.g. DB_REPLICA_HOSTS=10.0.0.2,10.0.0.3. Reads of the
+# account tables are spread over them by account.routers.ReplicaRouter.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['account.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use a shared backend in production (e.g. django.core.cache.backends.redis.RedisCache),
+# otherwise every worker process keeps, and invalidates, its own copy. The default
+# LocMemCache is for runserver and tests only: with several processes the throttles
+# count per process, and the change log of the availability filter (account.availability)
+# never reaches the other processes, which then report new values as free.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
 
+# Threads the async views (account.async_views) hash passwords on; bounds concurrent hashing.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 2))
+
+
+# Streaming checks on avatar and logo uploads (account.uploads), ahead of Django's handlers.
+FILE_UPLOAD_HANDLERS = [
+    'account.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv('IMAGE_UPLOAD_MAX_SIZE', 5 * 1024 * 1024))
+IMAGE_UPLOAD_MAX_PIXELS = int(os.getenv('IMAGE_UPLOAD_MAX_PIXELS', 25_000_000))
+
+# Threads that generate profile image derivatives (account.images) after uploads.
+IMAGE_DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', 2))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -133,6 +184,25 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media serving (sodooronline.media). Set one of these to let the web server send the
+# files: MEDIA_ACCEL_REDIRECT to an internal nginx location aliased to MEDIA_ROOT (e.g.
+# /protected-media/), or MEDIA_SENDFILE_HEADER to X-Sendfile (Apache mod_xsendfile) or
+# X-LIGHTTPD-send-file. Versioned derivative URLs are cached for a year, other files for
+# MEDIA_CACHE_MAX_AGE seconds.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT')
+MEDIA_SENDFILE_HEADER = os.getenv('MEDIA_SENDFILE_HEADER')
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60))
+
+# Uploads are deduplicated by content (see account.storage); names and URLs are unchanged.
+STORAGES = {
+    'default': {
+        'BACKEND': 'account.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -144,10 +214,26 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'account.authentication.CachedTokenAuthentication',
+    ],
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', 20)),
+    # Used by the throttles of signup, resend_activation, token/login and availability
+    # (account.throttling); their counters live in the default cache.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', '20/hour'),
+        'signup_identifier': os.getenv('THROTTLE_SIGNUP_IDENTIFIER', '5/hour'),
+        'resend_activation_ip': os.getenv('THROTTLE_RESEND_ACTIVATION_IP', '10/hour'),
+        'resend_activation_identifier': os.getenv('THROTTLE_RESEND_ACTIVATION_IDENTIFIER', '3/hour'),
+        'availability_ip': os.getenv('THROTTLE_AVAILABILITY_IP', '60/hour'),
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '30/min'),
+        'login_identifier': os.getenv('THROTTLE_LOGIN_IDENTIFIER', '10/min'),
+    },
 }
 
+# PAGE_SIZE is read by the per-view pagination classes (account.pagination);
+# there is deliberately no DEFAULT_PAGINATION_CLASS.
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 DJOSER = {
     'PASSWORD_RESET_CONFIRM_URL': '#/password/reset/confirm/{uid}/{token}',
     'ACTIVATION_URL': '#/activate/{uid}/{token}',
@@ -165,6 +251,12 @@ DJOSER = {
         'user': 'account.serializers.CustomUserSerializer',
         'current_user': 'account.serializers.CustomUserSerializer',
     },
+    'EMAIL': {
+        'activation': 'account.email.ActivationEmail',
+        'confirmation': 'account.email.ConfirmationEmail',
+        'password_reset': 'account.email.PasswordResetEmail',
+        'password_changed_confirmation': 'account.email.PasswordChangedConfirmationEmail',
+    },
     'PERMISSIONS': {
         'set_password': ['account.permissions.DenyAll'],
         'username_reset': ['account.permissions.DenyAll'],
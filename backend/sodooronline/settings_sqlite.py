@@ -0,0 +1,54 @@
+"""
+SQLite settings profile for running the project, its tests and the benchmark
+suite locally without a MySQL server.
+
+Usage:
+    python manage.py test account.tests --settings=sodooronline.settings_sqlite
+    python -m benchmarks
+"""
+
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# settings.py reads these at import time; give them local defaults unless the
+# environment (or .env) already provides them.
+load_dotenv()
+os.environ.setdefault('DJANGO_SECRET', 'sqlite-profile-insecure-secret-key')
+os.environ.setdefault('DJANGO_DEBUG', 'True')
+os.environ.setdefault('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,testserver')
+
+from .settings import *  # noqa: E402,F401,F403
+
+
+# Tests and benchmarks run against an in-memory copy of this database.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {
+            'NAME': ':memory:',
+        },
+    },
+    # A second file standing in for a read replica. Nothing copies rows into it, so it
+    # is not in DATABASE_REPLICAS by default; tests enable it with override_settings.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+        'TEST': {
+            'NAME': ':memory:',
+        },
+    },
+}
+
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+MEDIA_ROOT = Path(tempfile.gettempdir()) / 'sodooronline-media'
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
@@ -16,14 +16,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from .media import media_urlpatterns
+from .views import db_pool_stats, email_queue_stats, image_upload_stats
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/v1/auth/', include('djoser.urls')),
-    path('api/v1/auth/', include('djoser.urls.authtoken')),
+    path('api/v1/auth/', include('account.urls')),
+    path('api/v1/db-pool/', db_pool_stats, name='db-pool-stats'),
+    path('api/v1/email-queue/', email_queue_stats, name='email-queue-stats'),
+    path('api/v1/image-uploads/', image_upload_stats, name='image-upload-stats'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+urlpatterns += media_urlpatterns()
@@ -0,0 +1,29 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from account.mailqueue import queue_depth
+from account.uploads import upload_stats
+
+from .db.pool import pool_stats
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_pool_stats(request):
+    """Connection pool size, utilization and wait times of this worker process."""
+    return Response(pool_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def email_queue_stats(request):
+    """Depth of the outgoing email queue drained by send_queued_emails."""
+    return Response(queue_depth())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def image_upload_stats(request):
+    """Accepted and refused avatar/logo uploads, per outcome (see account.uploads)."""
+    return Response(upload_stats())
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sodooronline.settings')
 
 application = get_wsgi_application()
+
+# Build the availability filter now rather than in the first signup check.
+from account.availability import warm_up  # noqa: E402
+
+warm_up()